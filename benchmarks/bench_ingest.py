@@ -0,0 +1,120 @@
+"""Benchmark reading an Apollo export whole versus streaming it in batches.
+
+For each file size, compares pd.read_csv + transform_lead_data on the whole
+file with iter_lead_batches on the same export as CSV, Parquet and Arrow
+IPC, and reports total time, time until the first leads are available and
+peak traced memory. Streaming memory should stay flat as the file grows.
+
+The `pipeline` mode runs main.process_lead_files on the CSV, deduplication
+included, with the status checks and crew runs replaced by counting the
+batches handed to them.
+
+    python benchmarks/bench_ingest.py --rows 10000 100000 --batch-size 50
+"""
+
+import argparse
+import functools
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import mock
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+import fixtures
+
+PACKAGE_SRC = Path(__file__).resolve().parent.parent / 'getting_automated_sales_ai_agent' / 'src'
+
+
+def whole_file(path, batch_size):
+    from getting_automated_sales_ai_agent.utils.lead_reader import transform_lead_data
+
+    yield transform_lead_data(pd.read_csv(path))
+
+
+def streaming(path, batch_size):
+    from getting_automated_sales_ai_agent.utils.lead_reader import iter_lead_batches
+
+    yield from iter_lead_batches(path, batch_size)
+
+
+def consume(read, path, batch_size):
+    """Read every batch; return (leads, seconds, seconds to first batch)."""
+    start = time.perf_counter()
+    first = None
+    leads = 0
+    for batch in read(path, batch_size):
+        if first is None:
+            first = time.perf_counter() - start
+        leads += len(batch)
+    seconds = time.perf_counter() - start
+    return leads, seconds, first or seconds
+
+
+def pipeline(path, batch_size):
+    """Run process_lead_files on the file; return (leads, seconds, seconds to the first crew batch)."""
+    from getting_automated_sales_ai_agent import main as cli
+
+    start = time.perf_counter()
+    first = None
+    leads = 0
+
+    def process_leads(batch):
+        nonlocal first, leads
+        if first is None:
+            first = time.perf_counter() - start
+        leads += len(batch)
+
+    with mock.patch.object(cli, 'pending_leads', lambda batch: batch), \
+            mock.patch.object(cli, 'process_leads', process_leads), \
+            open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        cli.process_lead_files([path], batch_size)
+    seconds = time.perf_counter() - start
+    return leads, seconds, first or seconds
+
+
+def measure(run, path, batch_size):
+    """Return (leads, seconds, seconds to first batch, peak traced MB); memory is traced in a second run."""
+    leads, seconds, first = run(path, batch_size)
+    tracemalloc.start()
+    run(path, batch_size)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return leads, seconds, first, peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark whole-file and streaming lead ingestion')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--batch-size', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    sys.path.insert(0, str(PACKAGE_SRC))
+
+    print(f"{'rows':>8} {'mode':<10} {'total s':>8} {'first s':>8} {'peak MB':>8}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for rows in args.rows:
+            path = fixtures.write_apollo_csv(Path(workdir) / f"apollo_{rows}.csv", rows, 3, args.seed)
+            table = pa.Table.from_pandas(pd.read_csv(path), preserve_index=False)
+            pq.write_table(table, path.with_suffix('.parquet'))
+            feather.write_feather(table, path.with_suffix('.arrow'), compression='uncompressed')
+            del table
+            for mode, run, suffix in (('whole', functools.partial(consume, whole_file), '.csv'),
+                                      ('csv', functools.partial(consume, streaming), '.csv'),
+                                      ('parquet', functools.partial(consume, streaming), '.parquet'),
+                                      ('arrow', functools.partial(consume, streaming), '.arrow'),
+                                      ('pipeline', pipeline, '.csv')):
+                leads, seconds, first, peak = measure(run, path.with_suffix(suffix), args.batch_size)
+                assert leads == rows
+                print(f"{rows:>8} {mode:<10} {seconds:>8.2f} {first:>8.3f} {peak:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""Benchmark how long the CLI takes to start.
+
+Runs each command in a fresh interpreter, as a user would, and reports the
+median wall time over several runs. `import crew` is what every command used
+to pay before main imported the crew lazily, so it is the baseline the other
+commands are compared with.
+
+    python benchmarks/bench_startup.py --repeat 5
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PACKAGE_SRC = Path(__file__).resolve().parent.parent / 'getting_automated_sales_ai_agent' / 'src'
+
+COMMANDS = {
+    'import crew': ['-c', 'import getting_automated_sales_ai_agent.crew'],
+    'run --help': ['-m', 'getting_automated_sales_ai_agent.main', '--help'],
+    'worker --help': ['-m', 'getting_automated_sales_ai_agent.main', 'worker', '--help'],
+    'status --help': ['-m', 'getting_automated_sales_ai_agent.main', 'status', '--help'],
+}
+
+
+def startup_seconds(args, env, repeat):
+    """Median wall time of `python <args>` over `repeat` runs, after one warm-up run for the bytecode cache."""
+    subprocess.run([sys.executable, *args], env=env, capture_output=True, check=True)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], env=env, capture_output=True, check=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark CLI startup time')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join(filter(None, [str(PACKAGE_SRC), os.getenv('PYTHONPATH')]))}
+
+    baseline = None
+    print(f"{'command':<16} {'median s':>9} {'speedup':>8}")
+    for name, command in COMMANDS.items():
+        seconds = startup_seconds(command, env, args.repeat)
+        baseline = baseline or seconds
+        print(f"{name:<16} {seconds:>9.3f} {baseline / seconds:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
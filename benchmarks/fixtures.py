@@ -0,0 +1,130 @@
+"""Deterministic fixture data for the offline benchmarks.
+
+Everything is derived from the configured seed, so two runs with the same
+config see the same leads, companies and website content.
+"""
+
+import csv
+import random
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+FIRST_NAMES = ['Ava', 'Ben', 'Chloe', 'Dev', 'Elena', 'Farid', 'Grace', 'Hiro', 'Isla', 'Jonas',
+               'Kemi', 'Luca', 'Maya', 'Nikhil', 'Olivia', 'Pablo', 'Quinn', 'Rosa', 'Sami', 'Tara']
+LAST_NAMES = ['Anders', 'Brooks', 'Chen', 'Diaz', 'Evans', 'Fischer', 'Garcia', 'Hughes', 'Ito', 'Jensen',
+              'Khan', 'Lopez', 'Moreau', 'Nakamura', 'Okafor', 'Patel', 'Quist', 'Rossi', 'Silva', 'Tanaka']
+TITLES = ['VP of Sales', 'Head of Revenue Operations', 'Chief Technology Officer', 'Director of Marketing',
+          'Sales Operations Manager', 'Founder & CEO', 'Head of Growth', 'IT Director']
+INDUSTRIES = ['Computer Software', 'Information Technology & Services', 'Marketing & Advertising',
+              'Financial Services', 'Logistics & Supply Chain', 'Hospital & Health Care']
+TECHNOLOGIES = ['Salesforce', 'HubSpot', 'Google Analytics', 'AWS', 'Zendesk', 'Slack', 'Stripe', 'Segment']
+LOCATIONS = [('Austin', 'Texas', 'United States'), ('Toronto', 'Ontario', 'Canada'),
+             ('London', 'England', 'United Kingdom'), ('Denver', 'Colorado', 'United States')]
+WORDS = ('platform automation pipeline revenue customers teams workflow analytics integration '
+         'insights growth secure cloud data partners scale onboarding support pricing enterprise '
+         'reporting forecasting outreach engagement retention operations compliance').split()
+
+# Columns of an Apollo export, as read by transform_lead_data
+APOLLO_COLUMNS = [
+    'First Name', 'Last Name', 'Title', 'Company', 'Email', 'Seniority', 'Departments',
+    'Work Direct Phone', 'Mobile Phone', 'Corporate Phone', '# Employees', 'Industry', 'Keywords',
+    'Person Linkedin Url', 'Website', 'Company Linkedin Url', 'Facebook Url', 'Twitter Url',
+    'City', 'State', 'Country', 'Company Address', 'Company City', 'Company State', 'Company Country',
+    'Company Phone', 'SEO Description', 'Technologies', 'Annual Revenue', 'Total Funding',
+    'Latest Funding', 'Latest Funding Amount', 'Apollo Contact Id'
+]
+
+
+def company_domain(index: int) -> str:
+    return f"benchco{index:03d}.com"
+
+
+def company_domains(count: int) -> List[str]:
+    return [company_domain(index) for index in range(count)]
+
+
+def sentence(rng: random.Random, words: int = 12) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+
+def iter_apollo_rows(count: int, leads_per_company: int = 1, seed: int = 42) -> Iterator[Dict[str, str]]:
+    """Yield `count` Apollo export rows, `leads_per_company` contacts per company."""
+    rng = random.Random(f"{seed}:leads")
+    for index in range(count):
+        company_index = index // max(leads_per_company, 1)
+        domain = company_domain(company_index)
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        city, state, country = rng.choice(LOCATIONS)
+        yield {
+            'First Name': first,
+            'Last Name': last,
+            'Title': rng.choice(TITLES),
+            'Company': f"Benchco {company_index:03d}",
+            'Email': f"{first.lower()}.{last.lower()}{index}@{domain}",
+            'Seniority': rng.choice(['vp', 'director', 'c_suite', 'manager']),
+            'Departments': rng.choice(['sales', 'marketing', 'engineering', 'operations']),
+            'Work Direct Phone': f"+1 512 555 {index % 10000:04d}",
+            'Mobile Phone': '',
+            'Corporate Phone': f"+1 512 555 {company_index % 10000:04d}",
+            '# Employees': str(rng.choice([12, 45, 120, 350, 900, 2500])),
+            'Industry': rng.choice(INDUSTRIES),
+            'Keywords': ', '.join(rng.sample(WORDS, 4)),
+            'Person Linkedin Url': f"https://www.linkedin.com/in/{first.lower()}-{last.lower()}-{index}",
+            'Website': f"https://www.{domain}",
+            'Company Linkedin Url': f"https://www.linkedin.com/company/benchco{company_index:03d}",
+            'Facebook Url': '',
+            'Twitter Url': f"https://twitter.com/benchco{company_index:03d}",
+            'City': city,
+            'State': state,
+            'Country': country,
+            'Company Address': f"{100 + company_index} Main Street, {city}",
+            'Company City': city,
+            'Company State': state,
+            'Company Country': country,
+            'Company Phone': f"+1 512 555 {company_index % 10000:04d}",
+            'SEO Description': sentence(rng),
+            'Technologies': ', '.join(rng.sample(TECHNOLOGIES, 3)),
+            'Annual Revenue': str(rng.choice([1, 5, 20, 80, 250]) * 1000000),
+            'Total Funding': str(rng.choice([0, 2, 15, 60]) * 1000000),
+            'Latest Funding': rng.choice(['Seed', 'Series A', 'Series B', '']),
+            'Latest Funding Amount': str(rng.choice([0, 1, 5, 20]) * 1000000),
+            'Apollo Contact Id': f"{seed:08x}{index:016x}",
+        }
+
+
+def apollo_rows(count: int, leads_per_company: int = 1, seed: int = 42) -> List[Dict[str, str]]:
+    return list(iter_apollo_rows(count, leads_per_company, seed))
+
+
+def write_apollo_csv(path, count: int, leads_per_company: int = 1, seed: int = 42) -> Path:
+    """Write an Apollo-style lead export and return its path."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=APOLLO_COLUMNS)
+        writer.writeheader()
+        writer.writerows(iter_apollo_rows(count, leads_per_company, seed))
+    return path
+
+
+def write_airtable_leads_csv(path, count: int, seed: int = 42) -> Path:
+    """Write a CSV with Leads table columns, as loaded by the setup DataLoader."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fields = ['Name', 'Email', 'Company', 'Role', 'LinkedIn URL', 'Company LinkedIn',
+              'Individual Evaluation Status', 'Company Evaluation Status']
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        for row in iter_apollo_rows(count, seed=seed):
+            writer.writerow({
+                'Name': f"{row['First Name']} {row['Last Name']}",
+                'Email': row['Email'],
+                'Company': row['Company'],
+                'Role': row['Title'],
+                'LinkedIn URL': row['Person Linkedin Url'],
+                'Company LinkedIn': row['Company Linkedin Url'],
+                'Individual Evaluation Status': 'Not Started',
+                'Company Evaluation Status': 'Not Started',
+            })
+    return path
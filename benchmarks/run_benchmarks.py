@@ -0,0 +1,340 @@
+"""Offline end-to-end benchmarks for the lead pipeline.
+
+Starts the local stubs (see stubs.py) in a separate process, points the
+agent at them through environment variables and runs each scenario in a
+fresh process, so memory figures and import costs are not shared:
+
+- crawler:     CompanyDataTool over the fixture website farm
+- pipeline:    every tool a lead goes through (Airtable, Proxycurl, OpenAI,
+               CompanyDataTool, Perplexity), leads processed in parallel
+- crew:        GettingAutomatedSalesAiAgent.run() per company group
+- data_loader: setup/airtable_data_loader.py loading a Leads CSV
+
+Reports throughput per minute, p50/p95 latency per stage and per provider
+call, CPU time and peak RSS, and writes the report to benchmarks/results/.
+No request leaves the machine.
+
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --scenario crawler --latency-scale 0.1
+"""
+
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+import requests
+import yaml
+
+import fixtures
+import stubs
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+ROOT = BENCHMARK_DIR.parent
+PACKAGE_SRC = ROOT / 'getting_automated_sales_ai_agent' / 'src'
+SETUP_DIR = ROOT / 'setup'
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of `values` (q in 0-100)."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(q / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def summarize(seconds: List[float]) -> Dict:
+    """Count and p50/p95/max latency in milliseconds."""
+    if not seconds:
+        return {'count': 0}
+    return {
+        'count': len(seconds),
+        'p50_ms': round(percentile(seconds, 50) * 1000, 1),
+        'p95_ms': round(percentile(seconds, 95) * 1000, 1),
+        'max_ms': round(max(seconds) * 1000, 1)
+    }
+
+
+def _rss_mb() -> float:
+    """Current resident memory in MB (Linux), falling back to the peak."""
+    try:
+        with open('/proc/self/statm') as f:
+            return round(int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024, 1)
+    except (OSError, ValueError, AttributeError):
+        return _peak_rss_mb()
+
+
+def _peak_rss_mb() -> float:
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round((peak if sys.platform == 'darwin' else peak * 1024) / 1024 / 1024, 1)
+
+
+class EventCollector:
+    """Metering listener that keeps call latencies by provider and task latencies by stage."""
+
+    def __init__(self):
+        from getting_automated_sales_ai_agent.utils import metering
+
+        self.providers: Dict[str, List[float]] = {}
+        self.stages: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+        metering.subscribe(self.record)
+
+    def record(self, event: Dict):
+        seconds = (event.get('latency_ms') or 0) / 1000
+        if event.get('kind') == 'task':
+            key, target = event.get('stage', 'unknown'), self.stages
+        else:
+            key, target = f"{event.get('provider', 'llm')}.{event.get('operation', 'completion')}", self.providers
+        with self._lock:
+            target.setdefault(key, []).append(seconds)
+
+    def add_stage(self, stage: str, seconds: float):
+        with self._lock:
+            self.stages.setdefault(stage, []).append(seconds)
+
+    def report(self) -> Dict:
+        with self._lock:
+            return {
+                'stages': {stage: summarize(values) for stage, values in sorted(self.stages.items())},
+                'providers': {key: summarize(values) for key, values in sorted(self.providers.items())}
+            }
+
+
+def _sample_leads(settings: Dict, seed: int) -> List:
+    """Fixture Lead records, as transform_lead_data produces them from an Apollo export."""
+    import pandas as pd
+
+    from getting_automated_sales_ai_agent.utils.lead_reader import transform_lead_data
+
+    rows = fixtures.apollo_rows(settings['leads'], settings.get('leads_per_company', 1), seed)
+    return transform_lead_data(pd.DataFrame(rows, columns=fixtures.APOLLO_COLUMNS))
+
+
+def scenario_crawler(config: Dict, workdir: Path) -> Dict:
+    from getting_automated_sales_ai_agent.tools.company_data_tool import CompanyDataTool
+
+    settings = config['scenarios']['crawler']
+    collector = EventCollector()
+    tool = CompanyDataTool(llm=None, use_company_store=False,
+                           politeness_delay=settings.get('politeness_delay', 1.0) * config['latency_scale'])
+    domains = fixtures.company_domains(settings['domains'])
+
+    def crawl(domain):
+        start = time.perf_counter()
+        result = tool._run(domain)
+        collector.add_stage('crawl_domain', time.perf_counter() - start)
+        return result
+
+    with ThreadPoolExecutor(max_workers=settings.get('max_workers', 8)) as executor:
+        results = list(executor.map(crawl, domains))
+    return {'items': len(domains), 'unit': 'domains',
+            'errors': sum(1 for result in results if 'error' in result), **collector.report()}
+
+
+def scenario_pipeline(config: Dict, workdir: Path) -> Dict:
+    from getting_automated_sales_ai_agent.tools import (AirtableTool, CompanyDataTool, OpenAITool,
+                                                        PerplexityTool, ProxycurlTool)
+    from getting_automated_sales_ai_agent.utils import metering
+
+    settings = config['scenarios']['pipeline']
+    collector = EventCollector()
+    leads = _sample_leads(settings, config['seed'])
+    airtable, proxycurl = AirtableTool(), ProxycurlTool(llm=None)
+    openai_tool, perplexity = OpenAITool(), PerplexityTool()
+    company_data = CompanyDataTool(llm=None, politeness_delay=config['scenarios']['crawler'].get(
+        'politeness_delay', 1.0) * config['latency_scale'])
+
+    @contextlib.contextmanager
+    def stage(name):
+        start = time.perf_counter()
+        with metering.attribution(stage=name):
+            yield
+        collector.add_stage(name, time.perf_counter() - start)
+
+    def process(lead) -> bool:
+        lead_id = lead.email
+        start = time.perf_counter()
+        with metering.attribution(lead_id=lead_id):
+            with stage('storage'):
+                found = airtable._run('search', 'Leads', search_field='Email', search_value=lead.email)
+                if 'record_id' not in found:
+                    found = airtable._run('create', 'Leads', data=lead.airtable_fields())
+            with stage('enrichment'):
+                profile = proxycurl._run(lead.linkedin_url)
+            with stage('individual_evaluation'):
+                openai_tool._run(f"Evaluate this lead against the ICP: {json.dumps(profile)[:4000]}")
+            with stage('company_evaluation'):
+                company_data._run(lead.company_website)
+                perplexity._run(f"Recent news and market position of {lead.company}",
+                                domain=lead.company_website)
+            with stage('storage'):
+                if 'record_id' in found:
+                    airtable._run('update', 'Leads', record_id=found['record_id'], data={
+                        'Individual Evaluation Status': 'Completed', 'Company Evaluation Status': 'Completed',
+                        'Individual Score': 72, 'Company Score': 81, 'Lead Tier': 'Medium'})
+        collector.add_stage('lead_total', time.perf_counter() - start)
+        return 'record_id' in found and 'error' not in profile
+
+    with ThreadPoolExecutor(max_workers=settings.get('workers', 4)) as executor:
+        succeeded = list(executor.map(process, leads))
+    return {'items': len(leads), 'unit': 'leads', 'errors': succeeded.count(False), **collector.report()}
+
+
+def scenario_crew(config: Dict, workdir: Path) -> Dict:
+    from getting_automated_sales_ai_agent.crew import GettingAutomatedSalesAiAgent
+    from getting_automated_sales_ai_agent.utils.company_domain import group_leads_by_company
+
+    settings = config['scenarios']['crew']
+    collector = EventCollector()
+    leads = _sample_leads(settings, config['seed'])
+    errors = 0
+    # A run context per group on the shared engine, as process_leads does
+    for company_leads in group_leads_by_company(leads).values():
+        sales_crew = GettingAutomatedSalesAiAgent()
+        sales_crew.inputs['leads'] = company_leads
+        start = time.perf_counter()
+        try:
+            sales_crew.run()
+        except Exception as e:
+            errors += len(company_leads)
+            print(f"Crew run failed: {str(e)}", file=sys.stderr)
+        collector.add_stage('company_group', time.perf_counter() - start)
+    return {'items': len(leads), 'unit': 'leads', 'errors': errors, **collector.report()}
+
+
+def scenario_data_loader(config: Dict, workdir: Path) -> Dict:
+    sys.path.insert(0, str(SETUP_DIR))
+    from airtable_data_loader import DataLoader
+    from config.airtable_config import Tables
+
+    settings = config['scenarios']['data_loader']
+    csv_path = fixtures.write_airtable_leads_csv(workdir / 'leads.csv', settings['records'], config['seed'])
+    start = time.perf_counter()
+    loader = DataLoader()
+    loader.load_table(Tables.LEADS, str(csv_path))
+    return {'items': settings['records'], 'unit': 'records', 'errors': 0,
+            'stages': {'load_table': summarize([time.perf_counter() - start])}, 'providers': {}}
+
+
+SCENARIOS = {
+    'crawler': scenario_crawler,
+    'pipeline': scenario_pipeline,
+    'crew': scenario_crew,
+    'data_loader': scenario_data_loader,
+}
+
+
+def run_scenario(name: str, config: Dict, workdir: str, verbose: bool) -> Dict:
+    """Child process entry point: run one scenario and measure it."""
+    if not verbose:
+        sys.stdout = open(os.devnull, 'w')
+    try:
+        import getting_automated_sales_ai_agent  # noqa: F401
+    except ImportError:
+        sys.path.insert(0, str(PACKAGE_SRC))
+    baseline_rss = _rss_mb()
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    result = SCENARIOS[name](config, Path(workdir))
+    wall = time.perf_counter() - wall_start
+    return {
+        'scenario': name,
+        **result,
+        'wall_time_s': round(wall, 2),
+        'cpu_time_s': round(time.process_time() - cpu_start, 2),
+        'throughput_per_min': round(result['items'] / wall * 60, 1) if wall else None,
+        'memory': {'baseline_rss_mb': baseline_rss, 'peak_rss_mb': _peak_rss_mb()}
+    }
+
+
+def _stub_stats(urls: Dict[str, str]) -> Dict[str, Dict]:
+    return {name: requests.get(f"{url}/__stats", timeout=5).json() for name, url in urls.items()}
+
+
+def _stats_delta(before: Dict, after: Dict) -> Dict:
+    return {name: {stat: value - before.get(name, {}).get(stat, 0) for stat, value in stats.items()}
+            for name, stats in after.items()}
+
+
+def print_report(results: List[Dict]):
+    print(f"\n{'scenario':<12} {'items':>6} {'wall s':>8} {'cpu s':>7} {'per min':>8} {'errors':>6} {'peak MB':>8}")
+    for result in results:
+        print(f"{result['scenario']:<12} {result['items']:>6} {result['wall_time_s']:>8} {result['cpu_time_s']:>7} "
+              f"{result['throughput_per_min']:>8} {result['errors']:>6} {result['memory']['peak_rss_mb']:>8}")
+    for result in results:
+        print(f"\n{result['scenario']} ({result['unit']})")
+        for section in ('stages', 'providers'):
+            for key, stats in result.get(section, {}).items():
+                if stats.get('count'):
+                    print(f"  {key:<40} n={stats['count']:<5} p50={stats['p50_ms']:>9} ms  p95={stats['p95_ms']:>9} ms")
+        for name, stats in result.get('stub_stats', {}).items():
+            if stats.get('requests'):
+                print(f"  stub {name:<35} requests={stats['requests']:<6} 429s={stats.get('rate_limited', 0)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the offline benchmarks against local stub servers')
+    parser.add_argument('--scenario', choices=list(SCENARIOS) + ['all'], default='all')
+    parser.add_argument('--config', type=str, default=str(BENCHMARK_DIR / 'config.yaml'))
+    parser.add_argument('--latency-scale', type=float, help='Multiply all simulated latencies (overrides config)')
+    parser.add_argument('--output', type=str, help='Report path (default: benchmarks/results/benchmark_<time>.json)')
+    parser.add_argument('--verbose', action='store_true', help="Show the scenarios' own output")
+    args = parser.parse_args()
+
+    with open(args.config) as f:
+        config = yaml.safe_load(f)
+    if args.latency_scale is not None:
+        config['latency_scale'] = args.latency_scale
+    config.setdefault('latency_scale', 1.0)
+    names = list(SCENARIOS) if args.scenario == 'all' else [args.scenario]
+
+    context = multiprocessing.get_context('spawn')
+    ready = context.Queue()
+    stub_process = context.Process(target=stubs.serve, args=(config, ready), daemon=True)
+    stub_process.start()
+    results = []
+    try:
+        urls = ready.get(timeout=30)
+        os.environ.update(stubs.stub_environment(urls))
+        for name in names:
+            print(f"Running {name}...")
+            with tempfile.TemporaryDirectory() as workdir:
+                # A cold company store and an empty run journal per scenario; the
+                # crew's usage logs and traces stay out of the package's logs/
+                os.environ['COMPANY_STORE_PATH'] = str(Path(workdir) / 'company_store.sqlite3')
+                os.environ['RUN_JOURNAL_PATH'] = str(Path(workdir) / 'run_journal.sqlite3')
+                os.environ['CREW_LOG_DIR'] = str(Path(workdir) / 'logs')
+                before = _stub_stats(urls)
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                    result = pool.submit(run_scenario, name, config, workdir, args.verbose).result()
+                result['stub_stats'] = _stats_delta(before, _stub_stats(urls))
+            results.append(result)
+    finally:
+        stub_process.terminate()
+
+    print_report(results)
+    output = Path(args.output) if args.output else (
+        BENCHMARK_DIR / 'results' / f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({'config': config, 'results': results}, f, indent=2)
+    print(f"\nReport written to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,491 @@
+"""Local stand-ins for every external service the agent talks to.
+
+Each stub is a small threaded HTTP server that answers like the real API
+(OpenAI and Perplexity chat completions, Proxycurl profiles, the Airtable
+REST API) after a simulated latency, answers HTTP 429 above its configured
+request rate and returns payloads of realistic size. A fixture website farm
+serves generated company sites; it acts as an HTTP proxy, so the crawler
+fetches http://<company domain>/ as usual and every host is answered
+locally.
+
+Latencies are drawn from a random generator seeded with the request itself,
+so the same request gets the same delay in every run regardless of thread
+scheduling.
+
+Run standalone to poke at the stubs by hand:
+
+    python benchmarks/stubs.py
+"""
+
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from fixtures import WORDS, sentence
+
+BASE_NAME = "AI Sales Agent Prospecting"
+BASE_ID = "appBenchmark0001"
+
+
+class RateLimiter:
+    """Allow at most `rps` requests in any one-second window."""
+
+    def __init__(self, rps: Optional[float]):
+        self.rps = rps
+        self._times = deque()
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        if not self.rps:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            while self._times and now - self._times[0] >= 1:
+                self._times.popleft()
+            if len(self._times) >= self.rps:
+                return False
+            self._times.append(now)
+            return True
+
+
+class StubServer(ThreadingHTTPServer):
+    """Threaded HTTP server carrying one provider's simulation settings and counters."""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, name: str, handler, profile: Dict, seed: int, latency_scale: float = 1.0):
+        super().__init__(('127.0.0.1', 0), handler)
+        self.name = name
+        self.profile = profile
+        self.seed = seed
+        self.latency_scale = latency_scale
+        self.limiter = RateLimiter(profile.get('rate_limit_rps'))
+        self.stats = Counter()
+        self.tables: Dict[Tuple[str, str], Dict] = {}  # Airtable records by (base, table)
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def delay(self, key: str) -> float:
+        """Simulated latency in seconds for a request identified by `key`."""
+        rng = random.Random(f"{self.seed}:{self.name}:{key}")
+        mean = self.profile.get('latency_ms', 0)
+        jitter = self.profile.get('jitter_ms', 0)
+        return max(0.0, rng.gauss(mean, jitter)) / 1000 * self.latency_scale
+
+    def count(self, stat: str, amount: int = 1):
+        with self.lock:
+            self.stats[stat] += amount
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so clients reuse connections as they would against the real APIs
+    protocol_version = 'HTTP/1.1'
+    server: StubServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def _body(self) -> bytes:
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def _send(self, status: int, body: bytes, content_type: str = 'application/json',
+              headers: Optional[Dict] = None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, str(value))
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.count('requests')
+        self.server.count('bytes_sent', len(body))
+
+    def _send_json(self, status: int, payload, headers: Optional[Dict] = None):
+        self._send(status, json.dumps(payload).encode('utf-8'), headers=headers)
+
+    def _admit(self, key: str) -> bool:
+        """Apply the rate limit and simulated latency; False if the request got a 429."""
+        if not self.server.limiter.allow():
+            self.server.count('rate_limited')
+            self._send_json(429, {'error': {'message': 'Rate limit exceeded', 'type': 'rate_limit'}},
+                            headers={'Retry-After': 1})
+            return False
+        time.sleep(self.server.delay(key))
+        return True
+
+    def _stats(self) -> bool:
+        """Serve GET /__stats with this stub's counters."""
+        if self.path != '/__stats':
+            return False
+        with self.server.lock:
+            payload = dict(self.server.stats)
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        return True
+
+
+def _request_key(*parts) -> str:
+    return hashlib.sha1('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+
+class ChatCompletionsHandler(StubHandler):
+    """OpenAI-compatible /chat/completions, used for both OpenAI and Perplexity."""
+
+    def do_GET(self):
+        if not self._stats():
+            self._send_json(404, {'error': {'message': 'Not found'}})
+
+    def do_POST(self):
+        body = self._body()
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send_json(404, {'error': {'message': 'Not found'}})
+            return
+        key = _request_key(self.path, body)
+        if not self._admit(key):
+            return
+        request = json.loads(body or b'{}')
+        prompt = ' '.join(str(message.get('content', '')) for message in request.get('messages', []))
+        content = self._content(request, prompt, random.Random(key))
+        prompt_tokens = len(prompt) // 4 + 1
+        completion_tokens = len(content) // 4 + 1
+        self._send_json(200, {
+            'id': f"chatcmpl-{key[:24]}",
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': request.get('model', 'gpt-4o'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop'
+            }],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'total_tokens': prompt_tokens + completion_tokens
+            }
+        })
+
+    def _content(self, request: Dict, prompt: str, rng: random.Random) -> str:
+        words = self.server.profile.get('completion_tokens', 300) * 3 // 4
+        if (request.get('response_format') or {}).get('type') == 'json_object':
+            if '"urls"' in prompt:
+                # Link selection: pick the first few URLs offered in the prompt
+                urls = list(dict.fromkeys(re.findall(r'\["(https?://[^"]+)"', prompt)))
+                return json.dumps({'urls': urls[:5]})
+            return json.dumps({
+                'company_name': 'Benchco',
+                'industry': 'Computer Software',
+                'description': ' '.join(rng.choice(WORDS) for _ in range(words // 2)),
+                'products_and_services': [sentence(rng, 4) for _ in range(5)],
+                'technologies_used': ['Salesforce', 'AWS', 'Segment'],
+                'company_size': '51-200',
+                'headquarters_location': 'Austin, Texas',
+                'mission': sentence(rng, 16)
+            })
+        # CrewAI agents stop at "Final Answer:"; plain tool prompts just get text back
+        return "Thought: I now can give a great answer\nFinal Answer: " + ' '.join(
+            rng.choice(WORDS) for _ in range(words))
+
+
+class ProxycurlHandler(StubHandler):
+    """GET /proxycurl/api/v2/linkedin, returning a profile of `payload_kb` size."""
+
+    def do_GET(self):
+        if self._stats():
+            return
+        parts = urlsplit(self.path)
+        if not parts.path.rstrip('/').endswith('/api/v2/linkedin'):
+            self._send_json(404, {'description': 'Not found', 'code': 404})
+            return
+        query = parse_qs(parts.query)
+        profile_url = (query.get('linkedin_profile_url') or query.get('twitter_profile_url')
+                       or query.get('facebook_profile_url') or [''])[0]
+        if not self._admit(_request_key(self.path)):
+            return
+        self._send_json(200, self._profile(profile_url), headers={
+            'x-credits-used': self.server.profile.get('credits_per_call', 1),
+            'x-credits-remaining': 10000
+        })
+
+    def _profile(self, profile_url: str) -> Dict:
+        rng = random.Random(_request_key(self.server.seed, profile_url))
+        slug = profile_url.rstrip('/').rsplit('/', 1)[-1]
+        profile = {
+            'public_identifier': slug,
+            'full_name': slug.replace('-', ' ').title(),
+            'headline': sentence(rng, 8),
+            'occupation': sentence(rng, 5),
+            'summary': ' '.join(sentence(rng) for _ in range(6)),
+            'country_full_name': 'United States',
+            'skills': rng.sample(WORDS, 10),
+            'experiences': [],
+            'education': [{'school': 'State University', 'degree_name': 'BSc', 'field_of_study': 'Economics'}]
+        }
+        target = self.server.profile.get('payload_kb', 40) * 1024
+        size = len(json.dumps(profile))
+        while size < target:
+            experience = {
+                'company': f"Company {len(profile['experiences'])}",
+                'title': sentence(rng, 4),
+                'description': ' '.join(sentence(rng) for _ in range(4)),
+                'starts_at': {'day': 1, 'month': rng.randint(1, 12), 'year': rng.randint(2005, 2022)},
+                'location': 'Austin, Texas'
+            }
+            profile['experiences'].append(experience)
+            size += len(json.dumps(experience))
+        return profile
+
+
+class AirtableHandler(StubHandler):
+    """Enough of the Airtable REST API for pyairtable: list, get, create and update."""
+
+    def _table(self) -> Tuple[Optional[Dict], Optional[str]]:
+        """Return (records of the table in the path, record id or None)."""
+        parts = [unquote(part) for part in urlsplit(self.path).path.split('/') if part]
+        if len(parts) < 3 or parts[0] != 'v0':
+            return None, None
+        tables = self.server.tables
+        with self.server.lock:
+            records = tables.setdefault((parts[1], parts[2]), {})
+        record_id = parts[3] if len(parts) > 3 and parts[3] != 'listRecords' else None
+        return records, record_id
+
+    def do_GET(self):
+        if self._stats():
+            return
+        if not self._admit(_request_key(self.path)):
+            return
+        if urlsplit(self.path).path.rstrip('/') == '/v0/meta/bases':
+            self._send_json(200, {'bases': [{'id': BASE_ID, 'name': BASE_NAME, 'permissionLevel': 'create'}]})
+            return
+        records, record_id = self._table()
+        if records is None:
+            self._send_json(404, {'error': 'NOT_FOUND'})
+        elif record_id:
+            record = records.get(record_id)
+            self._send_json(200 if record else 404, record or {'error': 'NOT_FOUND'})
+        else:
+            query = {key: values[0] for key, values in parse_qs(urlsplit(self.path).query).items()}
+            self._list(records, query)
+
+    def do_POST(self):
+        body = self._body()
+        if not self._admit(_request_key(self.path, body)):
+            return
+        records, _ = self._table()
+        if records is None:
+            self._send_json(404, {'error': 'NOT_FOUND'})
+            return
+        payload = json.loads(body or b'{}')
+        if urlsplit(self.path).path.rstrip('/').endswith('/listRecords'):
+            self._list(records, payload)
+        elif 'records' in payload:
+            self._send_json(200, {'records': [self._create(records, item.get('fields', {}))
+                                              for item in payload['records']]})
+        else:
+            self._send_json(200, self._create(records, payload.get('fields', {})))
+
+    def do_PATCH(self):
+        body = self._body()
+        if not self._admit(_request_key(self.path, body)):
+            return
+        records, record_id = self._table()
+        payload = json.loads(body or b'{}')
+        if records is None:
+            self._send_json(404, {'error': 'NOT_FOUND'})
+        elif record_id:
+            updated = self._update(records, record_id, payload.get('fields', {}))
+            self._send_json(200 if updated else 404, updated or {'error': 'NOT_FOUND'})
+        else:
+            self._send_json(200, {'records': [self._update(records, item.get('id'), item.get('fields', {}))
+                                              for item in payload.get('records', [])]})
+
+    do_PUT = do_PATCH
+
+    def _create(self, records: Dict, fields: Dict) -> Dict:
+        with self.server.lock:
+            record_id = f"rec{len(records):014d}"
+            record = {'id': record_id, 'createdTime': time.strftime('%Y-%m-%dT%H:%M:%S.000Z', time.gmtime()),
+                      'fields': dict(fields)}
+            records[record_id] = record
+        return record
+
+    def _update(self, records: Dict, record_id: str, fields: Dict) -> Optional[Dict]:
+        with self.server.lock:
+            record = records.get(record_id)
+            if record is not None:
+                record['fields'].update(fields)
+        return record
+
+    def _list(self, records: Dict, query: Dict):
+        with self.server.lock:
+            matches = [record for record in records.values() if _matches(record, query.get('filterByFormula'))]
+        page_size = min(int(query.get('pageSize') or 100), self.server.profile.get('page_size', 100))
+        offset = int(query.get('offset') or 0)
+        page = {'records': matches[offset:offset + page_size]}
+        if offset + page_size < len(matches):
+            page['offset'] = str(offset + page_size)
+        self._send_json(200, page)
+
+
+# LOWER({Field}) = LOWER('value') or {Field} = 'value', as built by the tools
+_FORMULA = re.compile(r"(?:LOWER\()?\{?([^{}()=]+?)\}?\)?\s*=\s*(?:LOWER\()?'(.*?)'\)?$")
+
+
+def _matches(record: Dict, formula: Optional[str]) -> bool:
+    if not formula:
+        return True
+    match = _FORMULA.match(formula.strip())
+    if not match:
+        return True
+    field, value = match.group(1).strip(), match.group(2)
+    actual = str(record['fields'].get(field, ''))
+    return actual.lower() == value.lower() if formula.lstrip().startswith('LOWER') else actual == value
+
+
+class WebsiteFarmHandler(StubHandler):
+    """HTTP proxy that answers every host with a generated company website."""
+
+    PAGE_NAMES = ['about', 'products', 'solutions', 'pricing', 'customers', 'team', 'careers',
+                  'contact', 'partners', 'security', 'blog', 'press', 'integrations', 'resources']
+
+    def do_GET(self):
+        if self._stats():
+            return
+        parts = urlsplit(self.path)
+        host = (parts.hostname or self.headers.get('Host', 'localhost')).split(':')[0]
+        path = parts.path or '/'
+        if not self._admit(_request_key(host, path)):
+            return
+        status, content_type, body = self._page(host, path)
+        self._send(status, body, content_type)
+
+    def _site(self, host: str):
+        """Return (page paths, has sitemap) for a host."""
+        rng = random.Random(f"{self.server.seed}:site:{host}")
+        count = self.server.profile.get('pages', 30)
+        paths = []
+        for index in range(count):
+            name = self.PAGE_NAMES[index % len(self.PAGE_NAMES)]
+            paths.append(f"/{name}" if index < len(self.PAGE_NAMES) else f"/{name}/{index}")
+        return paths, rng.random() < self.server.profile.get('sitemap_share', 0.5)
+
+    def _page(self, host: str, path: str) -> Tuple[int, str, bytes]:
+        paths, has_sitemap = self._site(host)
+        base = f"http://{host}"
+        if path == '/robots.txt':
+            lines = ['User-agent: *', 'Disallow: /private/']
+            if has_sitemap:
+                lines.append(f"Sitemap: {base}/sitemap.xml")
+            return 200, 'text/plain', '\n'.join(lines).encode('utf-8')
+        if path == '/sitemap.xml':
+            if not has_sitemap:
+                return 404, 'text/html', b'<html><body>Not found</body></html>'
+            urls = ''.join(f"<url><loc>{base}{page}</loc></url>" for page in ['/'] + paths)
+            return 200, 'application/xml', (
+                '<?xml version="1.0" encoding="UTF-8"?>'
+                f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>'
+            ).encode('utf-8')
+        if path != '/' and path.rstrip('/') not in paths:
+            return 404, 'text/html', b'<html><body>Not found</body></html>'
+
+        rng = random.Random(f"{self.server.seed}:page:{host}:{path}")
+        title = path.strip('/').replace('/', ' ').title() or 'Home'
+        nav = ''.join(f'<a href="{page}">{page.strip("/").split("/")[0].title()}</a>' for page in paths)
+        html = [f"<html><head><title>{host} - {title}</title></head><body>",
+                f"<nav>{nav}</nav><h1>{title}</h1>"]
+        size = sum(len(part) for part in html)
+        target = self.server.profile.get('page_kb', 60) * 1024
+        while size < target:
+            paragraph = f"<p>{sentence(rng, 30)}</p>"
+            html.append(paragraph)
+            size += len(paragraph)
+        html.append('<footer><a href="/private/admin">Admin</a></footer></body></html>')
+        return 200, 'text/html; charset=utf-8', ''.join(html).encode('utf-8')
+
+
+HANDLERS = {
+    'openai': ChatCompletionsHandler,
+    'perplexity': ChatCompletionsHandler,
+    'proxycurl': ProxycurlHandler,
+    'airtable': AirtableHandler,
+    'websites': WebsiteFarmHandler,
+}
+
+
+def start_stubs(config: Dict) -> Dict[str, StubServer]:
+    """Start one stub server per provider plus the website farm, each on a daemon thread."""
+    servers = {}
+    profiles = {**config.get('providers', {}), 'websites': config.get('websites', {})}
+    for name, handler in HANDLERS.items():
+        server = StubServer(name, handler, profiles.get(name) or {}, config.get('seed', 42),
+                            config.get('latency_scale', 1.0))
+        threading.Thread(target=server.serve_forever, name=f"stub-{name}", daemon=True).start()
+        servers[name] = server
+    return servers
+
+
+def stub_environment(urls: Dict[str, str]) -> Dict[str, str]:
+    """Environment variables that point the agent, its tools and the DataLoader at the stubs."""
+    return {
+        'OPENAI_API_KEY': 'sk-benchmark',
+        'OPENAI_BASE_URL': f"{urls['openai']}/v1",
+        'PERPLEXITY_API_KEY': 'pplx-benchmark',
+        'PERPLEXITY_BASE_URL': urls['perplexity'],
+        'PROXYCURL_API_KEY': 'proxycurl-benchmark',
+        'PROXYCURL_BASE_URL': f"{urls['proxycurl']}/proxycurl",
+        'AI_AGENT_AIRTABLE_API_KEY': 'pat-benchmark',
+        'AIRTABLE_BASE_ID': BASE_ID,
+        'AIRTABLE_ENDPOINT_URL': urls['airtable'],
+        # Company sites are fetched over plain HTTP through the website farm
+        'COMPANY_CRAWL_SCHEME': 'http',
+        'HTTP_PROXY': urls['websites'],
+        'http_proxy': urls['websites'],
+        'NO_PROXY': '127.0.0.1,localhost',
+        'no_proxy': '127.0.0.1,localhost',
+        # Nothing may leave the machine
+        'CREWAI_DISABLE_TELEMETRY': 'true',
+        'CREWAI_TRACING_ENABLED': 'false',
+        'OTEL_SDK_DISABLED': 'true',
+        'LITELLM_LOCAL_MODEL_COST_MAP': 'True',
+    }
+
+
+def serve(config: Dict, ready):
+    """Process entry point: start the stubs, report their URLs on `ready` and run until killed."""
+    servers = start_stubs(config)
+    ready.put({name: server.url for name, server in servers.items()})
+    threading.Event().wait()
+
+
+if __name__ == '__main__':
+    from pathlib import Path
+
+    import yaml
+
+    with open(Path(__file__).parent / 'config.yaml') as f:
+        stub_config = yaml.safe_load(f)
+    stub_servers = start_stubs(stub_config)
+    for variable, value in stub_environment({name: s.url for name, s in stub_servers.items()}).items():
+        print(f"export {variable}={value}")
+    print("\nStubs running; Ctrl+C to stop")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
@@ -1,7 +1,6 @@
 # agents/pain_point_agent.py
 
 from crewai import Agent
-from langchain_openai import ChatOpenAI
 from ..tools.perplexity_tool import PerplexityTool
 from ..tools.openai_tool import OpenAITool
 from ..tools.airtable_tool import AirtableTool
@@ -1,19 +1,22 @@
 # crew.py
 
 from crewai import Agent, Crew, Process, Task, LLM
-from langchain_openai import ChatOpenAI
+from crewai.tasks.conditional_task import ConditionalTask
 from dotenv import load_dotenv
 import os
 from pathlib import Path
 import yaml
 import json
-from litellm import completion
+import hashlib
 from datetime import datetime
+import time
+import threading
+import itertools
+from typing import Dict, Optional
 
 # Import tools
 from .tools.proxycurl_tool import ProxycurlTool
 from .tools.company_data_tool import CompanyDataTool
-from .tools.reddit_tool import RedditTool
 from .tools.airtable_tool import AirtableTool
 from .tools.perplexity_tool import PerplexityTool
 from .tools.openai_tool import OpenAITool
@@ -24,16 +27,41 @@ from .agents.email_campaign_agent import get_email_campaign_agent
 
 # Import token tracker
 from .utils.token_tracker import TokenTracker
+from .utils.tracing import Tracer
+from .utils.metrics import get_metrics
+from .utils.logging_config import configure_logging
+from .utils.company_domain import group_leads_by_company, is_company_key
+from .utils.company_store import get_company_store
+from .utils import metering
+from .utils.budget import BudgetExceeded, get_budget_controller
+from .utils.run_journal import JournaledOutput, get_run_journal
 
-class GettingAutomatedSalesAiAgent:
-    """GettingAutomatedSalesAiAgent crew"""
+# The last task of each lead; a lead is done once its output is journaled
+FINAL_TASK = 'store_campaign_task'
+
+# Numbers the runs of this process, so log file names stay unique
+_run_counter = itertools.count(1)
+
+
+class SalesCrewEngine:
+    """Configuration, LLM and tools shared by every crew run in a process.
+
+    Building these reads two YAML files and creates five tools (several with
+    their own HTTP client), so it happens once per process through
+    get_crew_engine(). CrewAI agents keep state from the runs they take part
+    in (their execution count, the crew they are bound to), so each run
+    builds its own agents on the shared LLM and tools with build_agents().
+    Runs use the tools one after another; two runs must not share an engine
+    at the same time.
+    """
 
     def __init__(self):
         # Load environment variables
         load_dotenv()
+        configure_logging()
         
-        # Initialize token tracker
-        self.token_tracker = TokenTracker()
+        # Token, dollar and API credit ceilings for the run and each lead
+        self.budget = get_budget_controller()
         
         # Load configurations
         config_dir = Path(__file__).parent / "config"
@@ -52,17 +80,17 @@ class GettingAutomatedSalesAiAgent:
         with open(icp_config_path, 'r') as f:
             self.icp_config = yaml.safe_load(f)
         
-        self.inputs = {
-            'leads': None,  # Will be set later
-            'config': self.icp_config  # Include ICP config here
-        }
+        # Stored company evaluations are only reused under the criteria they were made with
+        evaluation_config = {'icp': self.icp_config, 'company_evaluator': self.crew_config.get('company_evaluator')}
+        self.evaluation_key = hashlib.sha1(
+            json.dumps(evaluation_config, sort_keys=True, default=str).encode('utf-8')
+        ).hexdigest()[:16]
         
-        # Initialize LLM using CrewAI's LLM class with provider prefix and token tracking
+        # Initialize LLM using CrewAI's LLM class with provider prefix
         self.llm = LLM(
             model="openai/gpt-4o",
             temperature=0.7,
-            api_key=os.getenv('OPENAI_API_KEY'),
-            callbacks=[self.token_tracker.callback]  # Add token tracking callback
+            api_key=os.getenv('OPENAI_API_KEY')
         )
 
         # Initialize tools with error handling and API key validation
@@ -86,24 +114,26 @@ class GettingAutomatedSalesAiAgent:
             print(f"Error initializing tools: {str(e)}")
             raise
 
-        # Initialize agents from config
-        self.agents = self._initialize_agents()
-
-    def _initialize_agents(self):
-        """Initialize agents from config"""
+    def build_agents(self):
+        """Create a run's worker agents and manager from config; returns (agents, manager)"""
         try:
+            # Tools count their uses per agent run; start each run from zero
+            for tool in self.tools.values():
+                tool.reset_usage_count()
+            
             # Initialize agents dictionary
             agents = {}
             
             # Initialize manager agent without tools
             manager_config = self.crew_config['manager']
-            self.manager = Agent(
+            manager = Agent(
                 role=manager_config['role'],
                 goal=manager_config['goal'],
                 backstory=manager_config['backstory'],
                 llm=self.llm,
                 allow_delegation=True,
-                memory=True
+                memory=True,
+                step_callback=self.enforce_budget
             )
                 
             # Create data manager agent
@@ -162,7 +192,7 @@ class GettingAutomatedSalesAiAgent:
                 verbose=self.crew_config['email_campaign_agent']['verbose']
             )
             
-            return agents
+            return agents, manager
             
         except KeyError as e:
             print(f"Error initializing agents: Missing configuration for {str(e)}")
@@ -171,19 +201,120 @@ class GettingAutomatedSalesAiAgent:
             print(f"Error initializing agents: {str(e)}")
             raise
 
+    def enforce_budget(self, step):
+        """Agent step callback: stop the crew once the run is over budget.
+
+        A lead over its own ceilings only loses its remaining tasks (see
+        `_within_budget`); the task it is in finishes within the agent's
+        max_iter with its tool calls refused, and the batch carries on.
+        """
+        exceeded = self.budget.run_exceeded()
+        if exceeded is not None:
+            raise exceeded
+        lead_id = metering.current_attribution().get('lead_id')
+        exceeded = self.budget.lead_exceeded(lead_id)
+        if exceeded is not None:
+            self.budget.cancel_lead(lead_id, str(exceeded))
+
+
+_default_engine: Optional[SalesCrewEngine] = None
+_default_engine_lock = threading.Lock()
+
+
+def get_crew_engine() -> SalesCrewEngine:
+    """Return the process-wide crew engine, creating it on first use."""
+    global _default_engine
+    if _default_engine is None:
+        with _default_engine_lock:
+            if _default_engine is None:
+                _default_engine = SalesCrewEngine()
+    return _default_engine
+
+
+class GettingAutomatedSalesAiAgent:
+    """GettingAutomatedSalesAiAgent crew
+
+    Holds the state of one crew run (leads, agents, task attribution, token
+    usage and trace); configuration, the LLM and tools come from the shared
+    engine, so creating one per batch of leads is cheap.
+    """
+
+    def __init__(self, engine: Optional[SalesCrewEngine] = None):
+        self.engine = engine or get_crew_engine()
+        self.crew_config = self.engine.crew_config
+        self.icp_config = self.engine.icp_config
+        self.llm = self.engine.llm
+        self.tools = self.engine.tools
+        # Fresh agents per run, so no run inherits another's agent state
+        self.agents, self.manager = self.engine.build_agents()
+        
+        # Initialize token tracker, streaming every usage event to logs/ (or CREW_LOG_DIR)
+        self.log_dir = Path(os.getenv('CREW_LOG_DIR') or Path(__file__).parent / "logs")
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        # Workers started together begin runs in the same second, so the pid
+        # and this process's run number keep their log files apart
+        self.run_stamp = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}_{next(_run_counter)}"
+        self.token_tracker = TokenTracker(
+            log_path=str(self.log_dir / f"token_usage_{self.run_stamp}.jsonl")
+        )
+        # CrewAI resets litellm.callbacks on every call, so track through success_callback
+        self.token_tracker.register_litellm_callback()
+        
+        # Spans per lead, task and tool call; exported after each run
+        self.tracer = Tracer(path=str(self.log_dir / f"trace_{self.run_stamp}.jsonl"))
+        
+        # Company knowledge shared across runs, keyed by domain
+        self.company_store = get_company_store()
+        self.company_eval_tasks = {}
+        
+        # Finished tasks per lead, reused when an interrupted run is restarted;
+        # only leads with an identifier that holds across runs are journaled
+        self.journal = get_run_journal()
+        self.journaled_leads = set()
+        
+        # Lead, task name and stage for each task, used to attribute usage
+        self.task_attribution = {}
+        self._active_tasks = []
+        self._task_cursor = 0
+        self._task_started = None
+        
+        # Token, dollar and API credit ceilings for the run and each lead
+        self.budget = self.engine.budget
+        
+        # Process-wide counters and histograms, served by --metrics-port
+        self.metrics = get_metrics()
+        
+        self.inputs = {
+            'leads': None,  # Will be set later
+            'config': self.icp_config  # Include ICP config here
+        }
+
     def create_tasks(self):
         """Create tasks for processing leads"""
         if not self.inputs.get('leads'):
             raise ValueError("No leads data provided to analyze")
         
         tasks = []
-        for lead in self.inputs['leads']:
+        self.task_attribution = {}
+        # Contacts at the same company share one company evaluation, so group
+        # leads by normalized company domain and keep each group together
+        lead_groups = group_leads_by_company(self.inputs['leads'])
+        company_eval_tasks = {}
+        stored_evaluations = {}
+        for company, lead in [(key, lead) for key, group in lead_groups.items() for lead in group]:
             # Use email as unique identifier
-            lead_id = f"LEAD_{lead.get('email', '').replace('@', '_at_').replace('.', '_dot_')}"
+            lead_id = self._lead_id(lead)
+            raw_data = json.dumps(lead.to_dict())
+            journaled = {}
+            if lead.identified:
+                self.journaled_leads.add(lead_id)
+                journaled = self.journal.completed_tasks(lead_id)
+            if journaled:
+                print(f"Resuming {lead_id}: reusing {', '.join(journaled)} from an earlier run")
             
             # Create initial task context
             task_context = {
-                'description': f"Context for lead {lead.get('name')}",
+                'description': f"Context for lead {lead.name}",
                 'expected_output': "Lead and configuration data",
                 'lead': lead,
                 'config': self.icp_config,
@@ -192,39 +323,40 @@ class GettingAutomatedSalesAiAgent:
             }
             
             # Store Lead Task - Initial storage without Proxycurl data
-            store_task = Task(
+            store_task = self._new_task(
+                journaled.get('store_task'),
                 description=f"""
                 Store or update the following lead data in Airtable:
 
                 Lead Data:
-                - Email: {lead.get('email')}
-                - Name: {lead.get('name')}
-                - Company: {lead.get('company')}
-                - Role: {lead.get('role')}
-                - LinkedIn URL: {lead.get('linkedin_url', '')}
-                - Company LinkedIn: {lead.get('company_linkedin_url', '')}
-                - Raw Data: {json.dumps(lead)}
+                - Email: {lead.email}
+                - Name: {lead.name}
+                - Company: {lead.company}
+                - Role: {lead.role}
+                - LinkedIn URL: {lead.linkedin_url}
+                - Company LinkedIn: {lead.company_linkedin_url}
+                - Raw Data: {raw_data}
 
                 Steps:
                 1. First, search for this exact email in Airtable:
                    action: search
                    table_name: Leads
                    search_field: Email
-                   search_value: {lead.get('email')}
+                   search_value: {lead.email}
                 
                 2. If not found, create a new record with these exact values:
                    action: create
                    table_name: Leads
                    data:
-                     Email: {lead.get('email')}
-                     Name: {lead.get('name')}
-                     Company: {lead.get('company')}
-                     Role: {lead.get('role')}
-                     LinkedIn URL: {lead.get('linkedin_url', '')}
-                     Company LinkedIn: {lead.get('company_linkedin_url', '')}
+                     Email: {lead.email}
+                     Name: {lead.name}
+                     Company: {lead.company}
+                     Role: {lead.role}
+                     LinkedIn URL: {lead.linkedin_url}
+                     Company LinkedIn: {lead.company_linkedin_url}
                      Individual Evaluation Status: Not Started
                      Company Evaluation Status: Not Started
-                     Raw Data: {json.dumps(lead)}
+                     Raw Data: {raw_data}
                 
                 3. Return the Airtable record ID and current evaluation statuses.
                 """,
@@ -232,14 +364,15 @@ class GettingAutomatedSalesAiAgent:
                 agent=self.agents['data_manager'],
                 context=[task_context]
             )
-            tasks.append(store_task)
+            tasks.append(self._tag_task(store_task, lead_id, 'store_task', 'storage'))
 
             # Proxycurl Enrichment Task
-            proxycurl_task = Task(
+            proxycurl_task = self._new_task(
+                journaled.get('proxycurl_task'),
                 description=f"""
                 Enrich the lead data using the proxycurl_tool.
                 
-                LinkedIn URL to analyze: {lead.get('linkedin_url', '')}
+                LinkedIn URL to analyze: {lead.linkedin_url}
                 
                 Steps:
                 1. Use the proxycurl_tool to fetch data for the LinkedIn URL above
@@ -252,18 +385,19 @@ class GettingAutomatedSalesAiAgent:
                 }}
                 
                 Lead context:
-                - Name: {lead.get('name')}
-                - Company: {lead.get('company')}
-                - Role: {lead.get('role')}
+                - Name: {lead.name}
+                - Company: {lead.company}
+                - Role: {lead.role}
                 """,
                 expected_output="Enriched lead data from Proxycurl in JSON format",
                 agent=self.agents['data_enricher'],
                 context=[store_task]
             )
-            tasks.append(proxycurl_task)
+            tasks.append(self._tag_task(proxycurl_task, lead_id, 'proxycurl_task', 'enrichment'))
 
             # Update Proxycurl Data Task
-            update_proxycurl_task = Task(
+            update_proxycurl_task = self._new_task(
+                journaled.get('update_proxycurl_task'),
                 description=f"""
                 Store the COMPLETE Proxycurl Result in Airtable exactly as received.
                 
@@ -288,10 +422,11 @@ class GettingAutomatedSalesAiAgent:
                 agent=self.agents['data_manager'],
                 context=[store_task, proxycurl_task]
             )
-            tasks.append(update_proxycurl_task)
+            tasks.append(self._tag_task(update_proxycurl_task, lead_id, 'update_proxycurl_task', 'storage'))
 
             # Individual Evaluation Task
-            indiv_eval_task = Task(
+            indiv_eval_task = self._new_task(
+                journaled.get('indiv_eval_task'),
                 description=f"""
                 {self.crew_config['individual_evaluator']['backstory']}
                 
@@ -307,12 +442,12 @@ class GettingAutomatedSalesAiAgent:
                 
                 DO NOT try to fetch new data from LinkedIn directly.
                 
-                Evaluate {lead.get('name')} from {lead.get('company')} using:
+                Evaluate {lead.name} from {lead.company} using:
                 1. Initial Data:
-                   - Name: {lead.get('name')}
-                   - Company: {lead.get('company')}
-                   - Role: {lead.get('role')}
-                   - LinkedIn: {lead.get('linkedin_url', '')}
+                   - Name: {lead.name}
+                   - Company: {lead.company}
+                   - Role: {lead.role}
+                   - LinkedIn: {lead.linkedin_url}
                 
                 2. Enriched Data:
                    Extract these details from proxycurl_task.output.data:
@@ -374,10 +509,11 @@ class GettingAutomatedSalesAiAgent:
                 agent=self.agents['individual_evaluator'],
                 context=[store_task, proxycurl_task, update_proxycurl_task]
             )
-            tasks.append(indiv_eval_task)
+            tasks.append(self._tag_task(indiv_eval_task, lead_id, 'indiv_eval_task', 'individual_evaluation'))
 
             # Update Individual Evaluation Task
-            update_indiv_task = Task(
+            update_indiv_task = self._new_task(
+                journaled.get('update_indiv_task'),
                 description=f"""
                 Update the lead record in Airtable with the individual evaluation results.
                 
@@ -405,53 +541,80 @@ class GettingAutomatedSalesAiAgent:
                 agent=self.agents['data_manager'],
                 context=[store_task, indiv_eval_task]
             )
-            tasks.append(update_indiv_task)
+            tasks.append(self._tag_task(update_indiv_task, lead_id, 'update_indiv_task', 'storage'))
             
             # Company Evaluation Task
-            company_eval_task = Task(
-                description=f"""
-                {self.crew_config['company_evaluator']['backstory']}
+            if company not in company_eval_tasks:
+                stored_evaluation = self._get_stored_company_evaluation(company)
+                if stored_evaluation:
+                    print(f"Using stored company evaluation for {company} from {stored_evaluation['updated_at']}")
+                    stored_evaluations[company] = stored_evaluation
+                    company_eval_tasks[company] = None
+            if company not in company_eval_tasks:
+                company_eval_task = self._new_task(
+                    journaled.get('company_eval_task'),
+                    description=f"""
+                    {self.crew_config['company_evaluator']['backstory']}
                 
-                Goal: {self.crew_config['company_evaluator']['goal']}
+                    Goal: {self.crew_config['company_evaluator']['goal']}
                 
-                Evaluate company {lead.get('company')} against ICP criteria:
-                - Target Industries: {', '.join(self.icp_config.get('target_industries', []))}
-                - Industries: {', '.join(self.icp_config.get('industries', []))}
-                - Business Models: {', '.join(self.icp_config.get('business_models', []))}
-                - Company Size: {self.icp_config.get('company_size', {})}
-                - Technologies: {', '.join(self.icp_config.get('technologies', []))}
-                - Growth Stages: {', '.join(self.icp_config.get('growth_stages', []))}
-                - Employee Count Range: {self.icp_config.get('minimum_requirements', {}).get('employee_count_min')} - {self.icp_config.get('minimum_requirements', {}).get('employee_count_max')}
+                    Evaluate company {lead.company} against ICP criteria:
+                    - Target Industries: {', '.join(self.icp_config.get('target_industries', []))}
+                    - Industries: {', '.join(self.icp_config.get('industries', []))}
+                    - Business Models: {', '.join(self.icp_config.get('business_models', []))}
+                    - Company Size: {self.icp_config.get('company_size', {})}
+                    - Technologies: {', '.join(self.icp_config.get('technologies', []))}
+                    - Growth Stages: {', '.join(self.icp_config.get('growth_stages', []))}
+                    - Employee Count Range: {self.icp_config.get('minimum_requirements', {}).get('employee_count_min')} - {self.icp_config.get('minimum_requirements', {}).get('employee_count_max')}
                 
-                Company Data: {json.dumps(lead, indent=2)}
+                    Company key: {company}
+                    Company Data: {json.dumps(lead.to_dict(), indent=2)}
+                    
+                    This evaluation is shared by every contact at this company, so evaluate the
+                    company itself and crawl its website at most once.
+                    For research about this company, call the perplexity_tool with domain: {company};
+                    it returns a stored brief on the company rather than answering a specific query.
                 
-                1. Industry alignment
-                2. Company size match
-                3. Location/market presence
-                4. Growth indicators
-                5. Technology stack
-                6. Business model alignment
+                    1. Industry alignment
+                    2. Company size match
+                    3. Location/market presence
+                    4. Growth indicators
+                    5. Technology stack
+                    6. Business model alignment
                 
-                Provide:
-                1. Overall company ICP alignment score (0-100)
-                2. Detailed analysis of company fit
-                3. Specific insights about growth potential
-                4. Recommendation for engagement strategy
+                    Provide:
+                    1. Overall company ICP alignment score (0-100)
+                    2. Detailed analysis of company fit
+                    3. Specific insights about growth potential
+                    4. Recommendation for engagement strategy
                 
-                Base your evaluation on both the initial company data and the enriched Proxycurl data.
-                """,
-                expected_output="Company evaluation report with ICP alignment score",
-                agent=self.agents['company_evaluator'],
-                context=[store_task, update_proxycurl_task, indiv_eval_task]
-            )
-            tasks.append(company_eval_task)
+                    Base your evaluation on both the initial company data and the enriched Proxycurl data.
+                    """,
+                    expected_output="Company evaluation report with ICP alignment score",
+                    agent=self.agents['company_evaluator'],
+                    context=[store_task, update_proxycurl_task, indiv_eval_task]
+                )
+                tasks.append(self._tag_task(company_eval_task, lead_id, 'company_eval_task', 'company_evaluation'))
+                company_eval_tasks[company] = company_eval_task
+            company_eval_task = company_eval_tasks[company]
+
+            # Evaluations from earlier runs are passed inline instead of through task context
+            if company in stored_evaluations:
+                evaluation_source = (
+                    f"Use these stored company evaluation results (evaluated {stored_evaluations[company]['updated_at']})\n"
+                    f"{stored_evaluations[company]['data']}\n\n"
+                    "Use these results"
+                )
+            else:
+                evaluation_source = "Use the evaluation results from the previous task"
 
             # Update Company Evaluation Task
-            update_company_task = Task(
+            update_company_task = self._new_task(
+                journaled.get('update_company_task'),
                 description=f"""
                 Update the lead record in Airtable with the company evaluation results.
                 
-                Use the evaluation results from the previous task to update these fields:
+                {evaluation_source} to update these fields:
                 1. Company Score: Convert score to a number (e.g., "85/100" becomes 85)
                 2. Company Analysis
                 3. Company Evaluation Status: Set to "Completed"
@@ -470,98 +633,200 @@ class GettingAutomatedSalesAiAgent:
                 """,
                 expected_output="Updated Airtable record with company evaluation",
                 agent=self.agents['data_manager'],
-                context=[store_task, company_eval_task]
+                context=[task for task in (store_task, company_eval_task) if task]
             )
-            tasks.append(update_company_task)
+            tasks.append(self._tag_task(update_company_task, lead_id, 'update_company_task', 'storage'))
         
-        # Pain Point Analysis Task (for qualified leads)
-        pain_point_task = Task(
-            description=f"""
-            {self.crew_config['pain_point_agent']['backstory']}
-            
-            Goal: {self.crew_config['pain_point_agent']['goal']}
-            
-            Analyze pain points for {lead.get('company')} based on:
-            1. Individual evaluation results from previous task
-            2. Company evaluation results from previous task
-            3. Industry context
-            4. Company size and growth stage
-            5. Technology stack
-            
-            Review the evaluation results from the individual and company evaluation tasks in your context.
-            
-            Provide:
-            1. List of identified pain points
-            2. Priority ranking for each pain point
-            3. Evidence supporting each pain point
-            4. Recommendations for addressing each pain point
-            
-            Base your analysis on the evaluation results and enriched data.
-            """,
-            expected_output="Pain point analysis with prioritized recommendations",
-            agent=self.agents['pain_point_agent'],
-            context=[store_task, indiv_eval_task, company_eval_task]
-        )
-        tasks.append(pain_point_task)
+            # Pain Point Analysis Task (for qualified leads)
+            pain_point_task = self._new_task(
+                journaled.get('pain_point_task'),
+                description=f"""
+                {self.crew_config['pain_point_agent']['backstory']}
+                
+                Goal: {self.crew_config['pain_point_agent']['goal']}
+                
+                Analyze pain points for {lead.company} based on:
+                1. Individual evaluation results from previous task
+                2. Company evaluation results from previous task
+                3. Industry context
+                4. Company size and growth stage
+                5. Technology stack
+                
+                Review the evaluation results from the individual and company evaluation tasks in your context.
+                
+                Provide:
+                1. List of identified pain points
+                2. Priority ranking for each pain point
+                3. Evidence supporting each pain point
+                4. Recommendations for addressing each pain point
+                
+                Base your analysis on the evaluation results and enriched data.
+                """,
+                expected_output="Pain point analysis with prioritized recommendations",
+                agent=self.agents['pain_point_agent'],
+                context=[task for task in (store_task, indiv_eval_task, company_eval_task) if task]
+            )
+            tasks.append(self._tag_task(pain_point_task, lead_id, 'pain_point_task', 'pain_points'))
 
-        # Email Campaign Task
-        email_campaign_task = Task(
-            description=f"""
-            {self.crew_config['email_campaign_agent']['backstory']}
-            
-            Goal: {self.crew_config['email_campaign_agent']['goal']}
-            
-            Generate a personalized email campaign for {lead.get('name')} at {lead.get('company')} using:
-            1. Individual evaluation insights from previous task
-            2. Company evaluation insights from previous task
-            3. Identified pain points from previous task
-            4. Our solution's value proposition
-            
-            Lead Context:
-            - Role: {lead.get('role')}
-            - Industry: {lead.get('industry')}
-            - Company Size: {lead.get('employees')}
-            
-            Review the pain points analysis from the previous task in your context.
-            
-            Create:
-            1. Initial outreach email
-            2. Follow-up sequence (2-3 emails)
-            3. Specific value propositions for each email
-            4. Call-to-action suggestions
-            
-            Ensure emails are:
-            - Personalized to the lead's context
-            - Address specific pain points
-            - Include relevant social proof
-            - Have clear next steps
-            """,
-            expected_output="Personalized email campaign sequence",
-            agent=self.agents['email_campaign_agent'],
-            context=[store_task, pain_point_task, indiv_eval_task, company_eval_task]
-        )
-        tasks.append(email_campaign_task)
+            # Email Campaign Task
+            email_campaign_task = self._new_task(
+                journaled.get('email_campaign_task'),
+                description=f"""
+                {self.crew_config['email_campaign_agent']['backstory']}
+                
+                Goal: {self.crew_config['email_campaign_agent']['goal']}
+                
+                Generate a personalized email campaign for {lead.name} at {lead.company} using:
+                1. Individual evaluation insights from previous task
+                2. Company evaluation insights from previous task
+                3. Identified pain points from previous task
+                4. Our solution's value proposition
+                
+                Lead Context:
+                - Role: {lead.role}
+                - Industry: {lead.industry}
+                - Company Size: {lead.employees}
+                
+                Review the pain points analysis from the previous task in your context.
+                
+                Create:
+                1. Initial outreach email
+                2. Follow-up sequence (2-3 emails)
+                3. Specific value propositions for each email
+                4. Call-to-action suggestions
+                
+                Ensure emails are:
+                - Personalized to the lead's context
+                - Address specific pain points
+                - Include relevant social proof
+                - Have clear next steps
+                """,
+                expected_output="Personalized email campaign sequence",
+                agent=self.agents['email_campaign_agent'],
+                context=[task for task in (store_task, pain_point_task, indiv_eval_task, company_eval_task) if task]
+            )
+            tasks.append(self._tag_task(email_campaign_task, lead_id, 'email_campaign_task', 'email_campaign'))
 
-        # Store Email Campaign Task
-        store_campaign_task = Task(
-            description=f"""
-            Store the email campaign in Airtable.
-            
-            Update the lead record with:
-            1. Email Campaign: Full campaign sequence
-            2. Campaign Status: Ready
-            3. Last Updated: Current date
-            
-            Airtable record ID is available in the task context.
-            """,
-            expected_output="Updated Airtable record with email campaign",
-            agent=self.agents['data_manager'],
-            context=[store_task, email_campaign_task]
-        )
-        tasks.append(store_campaign_task)
-        
+            # Store Email Campaign Task
+            store_campaign_task = self._new_task(
+                journaled.get('store_campaign_task'),
+                description=f"""
+                Store the email campaign in Airtable.
+                
+                Update the lead record with:
+                1. Email Campaign: Full campaign sequence
+                2. Campaign Status: Ready
+                3. Last Updated: Current date
+                
+                Airtable record ID is available in the task context.
+                """,
+                expected_output="Updated Airtable record with email campaign",
+                agent=self.agents['data_manager'],
+                context=[store_task, email_campaign_task]
+            )
+            tasks.append(self._tag_task(store_campaign_task, lead_id, 'store_campaign_task', 'storage'))
         
-        return tasks
+        self.company_eval_tasks = company_eval_tasks
+        return [task for task in tasks if not isinstance(task, JournaledOutput)]
+
+    @staticmethod
+    def _lead_id(lead):
+        return lead.lead_id
+
+    def _new_task(self, journaled_output=None, **kwargs):
+        """Create a task that is skipped once its lead or the run is over budget.
+
+        A task an earlier run finished is not created again: its journaled
+        output is returned in its place, and tasks that use it as context get
+        that output inline in their description instead.
+
+        CrewAI requires the first task of a crew to be unconditional, and no
+        task has been tagged yet when the first one is created.
+        """
+        if journaled_output is not None:
+            return journaled_output
+        context = kwargs.get('context')
+        if context:
+            earlier = [task for task in context if isinstance(task, JournaledOutput)]
+            if earlier:
+                kwargs['context'] = [task for task in context if not isinstance(task, JournaledOutput)]
+                kwargs['description'] += ''.join(
+                    f"\n\nOutput of {task.task} from an earlier run (finished {task.completed_at}):\n{task.output}"
+                    for task in earlier
+                )
+        if not self.task_attribution:
+            return Task(**kwargs)
+        return ConditionalTask(condition=self._within_budget, **kwargs)
+
+    def _tag_task(self, task, lead_id, name, stage):
+        """Record which lead, task name and pipeline stage a task belongs to"""
+        if not isinstance(task, JournaledOutput):
+            self.task_attribution[id(task)] = {'lead_id': lead_id, 'task': name, 'stage': stage}
+        return task
+
+    def _start_task_attribution(self, tasks):
+        """Attribute usage to the first task before kickoff"""
+        self._active_tasks = list(tasks)
+        self._task_cursor = 0
+        self._activate_task(0)
+
+    def _activate_task(self, index):
+        self._task_cursor = index
+        self._task_started = time.perf_counter()
+        if index < len(self._active_tasks):
+            metering.set_run_attribution(**self.task_attribution.get(id(self._active_tasks[index]), {}))
+        else:
+            metering.clear_run_attribution()
+
+    def _on_task_complete(self, output):
+        """Crew task callback: report the finished task's wall time, journal its output and move on.
+
+        Tasks run in list order, so the next task becomes the attribution target.
+        """
+        if self._task_cursor < len(self._active_tasks):
+            elapsed = time.perf_counter() - self._task_started
+            metering.emit({
+                'kind': 'task',
+                'start_time': time.time() - elapsed,
+                'latency_ms': round(elapsed * 1000, 1)
+            })
+            attribution = self.task_attribution.get(id(self._active_tasks[self._task_cursor]), {})
+            if attribution.get('lead_id') in self.journaled_leads:
+                self.journal.record_task(attribution['lead_id'], attribution.get('task'), getattr(output, 'raw', None))
+        self._activate_task(self._task_cursor + 1)
+
+    def _within_budget(self, previous_output):
+        """Task condition: skip the task if its lead or the run is out of budget.
+
+        Skipped tasks never reach the task callback, so attribution moves on here.
+        """
+        attribution = {}
+        if self._task_cursor < len(self._active_tasks):
+            attribution = self.task_attribution.get(id(self._active_tasks[self._task_cursor]), {})
+        lead_id = attribution.get('lead_id')
+        exceeded = self.budget.exceeded(lead_id)
+        if exceeded is None:
+            return True
+        print(f"Skipping {attribution.get('task')} for {lead_id}: {str(exceeded)}")
+        self.budget.cancel_lead(lead_id, str(exceeded))
+        self._activate_task(self._task_cursor + 1)
+        return False
+
+    def _get_stored_company_evaluation(self, company):
+        """Return a fresh company evaluation made under the current ICP config from the company store, if any"""
+        if not is_company_key(company):
+            return None
+        return self.company_store.get_with_timestamp(company, 'evaluation', item_key=self.engine.evaluation_key)
+
+    def _save_company_evaluations(self):
+        """Store the output of each company evaluation task for reuse in later runs"""
+        for company, task in self.company_eval_tasks.items():
+            if task is None or not is_company_key(company):
+                continue
+            output = getattr(task, 'output', None)
+            raw_output = getattr(output, 'raw', None)
+            if raw_output:
+                self.company_store.put(company, 'evaluation', raw_output, item_key=self.engine.evaluation_key)
 
     @property
     def crew(self):
@@ -580,27 +845,87 @@ class GettingAutomatedSalesAiAgent:
             tasks=self.create_tasks(),
             process=process_type,
             manager_agent=self.manager,
-            verbose=verbose
+            verbose=verbose,
+            task_callback=self._on_task_complete,
+            step_callback=self.engine.enforce_budget
         )
 
+    def _report_lead_outcomes(self, outcome):
+        """Count this run's leads in the leads_processed_total metric"""
+        lead_ids = {self._lead_id(lead) for lead in self.inputs.get('leads') or []}
+        cancelled = lead_ids & set(self.budget.cancelled_leads) if outcome == 'completed' else set()
+        if cancelled:
+            self.metrics.inc('leads_processed_total', len(cancelled), outcome='cancelled')
+        if lead_ids - cancelled:
+            self.metrics.inc('leads_processed_total', len(lead_ids - cancelled), outcome=outcome)
+
+    def _journal_completed_leads(self):
+        """Mark this run's leads whose final task is journaled as done, so restarted runs skip them
+
+        A lead whose tasks failed or were skipped never journals its final
+        task, so it stays pending.
+        """
+        self.journal.record_leads(self.journal.leads_with_task(self.journaled_leads, FINAL_TASK))
+
+    def over_budget_leads(self) -> Dict[str, str]:
+        """This run's leads that reached one of their own ceilings, with the reason
+
+        Their remaining tasks were skipped, so their results are partial.
+        """
+        over_budget = {}
+        for lead in self.inputs.get('leads') or []:
+            exceeded = self.budget.lead_exceeded(self._lead_id(lead))
+            if exceeded is not None:
+                over_budget[self._lead_id(lead)] = str(exceeded)
+        return over_budget
+
+    def _save_usage_summary(self):
+        """Save and print token usage and budget, and export the trace; detailed events are already streamed"""
+        log_path = self.log_dir / f"token_usage_{self.run_stamp}.json"
+        self.token_tracker.save_usage_log(str(log_path))
+        self.tracer.export()
+        
+        print("\nToken Usage Summary:")
+        print(json.dumps(self.token_tracker.get_usage_summary(), indent=2))
+        print("\nBudget Summary:")
+        print(json.dumps(self.budget.get_summary(), indent=2))
+
     def run(self):
-        """Execute the crew's tasks and return results"""
+        """Execute the crew's tasks and return results
+
+        A run context runs once: its usage log and trace are closed when it
+        finishes, so create a new GettingAutomatedSalesAiAgent per batch.
+        """
         try:
+            # Don't start new leads once the run budget is spent
+            self.budget.check()
+            
             # Create and run the crew
             crew_instance = self.crew
+            self._start_task_attribution(crew_instance.tasks)
             results = crew_instance.kickoff()
-            
-            # Save token usage log
-            log_dir = Path(__file__).parent / "logs"
-            log_dir.mkdir(exist_ok=True)
-            log_path = log_dir / f"token_usage_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-            self.token_tracker.save_usage_log(str(log_path))
-            
-            print("\nToken Usage Summary:")
-            print(json.dumps(self.token_tracker.get_usage_summary(), indent=2))
+            self._save_company_evaluations()
+            self._report_lead_outcomes('completed')
+            self._save_usage_summary()
             
             return results
             
+        except BudgetExceeded as e:
+            print(f"Crew run cancelled: {str(e)}")
+            self._report_lead_outcomes('cancelled')
+            self._save_usage_summary()
+            raise
         except Exception as e:
             print(f"Error executing crew tasks: {str(e)}")
-            raise
\ No newline at end of file
+            self._report_lead_outcomes('failed')
+            # Keep the cost data and trace of the partial run
+            self.token_tracker.flush()
+            self.tracer.export()
+            raise
+        finally:
+            # Also after a failed run, so leads that finished before the failure are not run again
+            self._journal_completed_leads()
+            metering.clear_run_attribution()
+            # Write the usage log's last events now rather than at exit, and let go of this run
+            self.token_tracker.close()
+            self.tracer.close()
\ No newline at end of file
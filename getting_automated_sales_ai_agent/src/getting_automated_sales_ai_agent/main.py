@@ -4,63 +4,38 @@
 import sys
 import warnings
 import argparse
-import pandas as pd
 import os
+import socket
+import threading
+import time
+import multiprocessing
+from contextlib import closing, contextmanager
 from pathlib import Path
 from dotenv import load_dotenv
-from getting_automated_sales_ai_agent.crew import GettingAutomatedSalesAiAgent
-import csv
-from getting_automated_sales_ai_agent.tools import AirtableTool
+# The crew (crewai, litellm, the tools' client libraries) and the lead readers
+# (pandas) take seconds to import, so they are imported in the functions that
+# use them and commands that need neither, like --help, start immediately
+from getting_automated_sales_ai_agent.utils.budget import BudgetExceeded
+from getting_automated_sales_ai_agent.utils.lead_index import LeadIndex
+from getting_automated_sales_ai_agent.utils.lead_queue import LeadQueue, MAX_ATTEMPTS, VISIBILITY_TIMEOUT_SECONDS
+from getting_automated_sales_ai_agent.utils.lead_status import (STALE_LEAD_DAYS, StatusSnapshots, fetch_lead_records,
+                                                                summarize_leads)
+from getting_automated_sales_ai_agent.utils.metrics import start_metrics_server
+from getting_automated_sales_ai_agent.utils.logging_config import configure_logging
+from getting_automated_sales_ai_agent.utils.profiler import RunProfiler, profile_section
+from getting_automated_sales_ai_agent.utils.run_journal import get_run_journal
+from datetime import datetime
 
 warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
 
-def transform_lead_data(df):
-    # Transform DataFrame to list of dictionaries with proper structure
-    leads = []
-    for _, row in df.iterrows():
-        lead = {
-            'name': f"{row['First Name']} {row['Last Name']}",
-            'company': row['Company'],
-            'linkedin_url': row['Person Linkedin Url'],
-            'role': row['Title'],
-            'industry': row['Industry'],
-            'company_website': row['Website'],
-            'email': row['Email'],
-            'company_linkedin_url': row['Company Linkedin Url'],
-            'technologies': row['Technologies'],
-            'employees': row['# Employees'],
-            'revenue': row['Annual Revenue'],
-            'location': f"{row['City']}, {row['State']}, {row['Country']}",
-            'company_location': f"{row['Company City']}, {row['Company State']}, {row['Company Country']}",
-            'keywords': row['Keywords'],
-            'seo_description': row['SEO Description'],
-            'departments': row['Departments'],
-            'seniority': row['Seniority'],
-            'social_media': {
-                'facebook': row['Facebook Url'],
-                'twitter': row['Twitter Url']
-            },
-            'phone': {
-                'work': row['Work Direct Phone'],
-                'mobile': row['Mobile Phone'],
-                'corporate': row['Corporate Phone']
-            },
-            'company_details': {
-                'address': row['Company Address'],
-                'phone': row['Company Phone'],
-                'total_funding': row['Total Funding'],
-                'latest_funding': row['Latest Funding'],
-                'latest_funding_amount': row['Latest Funding Amount']
-            }
-        }
-        # Clean up None or NaN values
-        lead = {k: (v if pd.notna(v) else '') for k, v in lead.items()}
-        lead['social_media'] = {k: (v if pd.notna(v) else '') for k, v in lead['social_media'].items()}
-        lead['phone'] = {k: (v if pd.notna(v) else '') for k, v in lead['phone'].items()}
-        lead['company_details'] = {k: (v if pd.notna(v) else '') for k, v in lead['company_details'].items()}
-        
-        leads.append(lead)
-    return leads
+# Leads read from a CSV and handed to one crew run at a time
+LEAD_BATCH_SIZE = 50
+
+# Unique leads read back from the lead index per queue insert
+ENQUEUE_BATCH_SIZE = 500
+
+# How often an idle worker started with --wait checks the queue for new leads
+QUEUE_POLL_SECONDS = 10
 
 def load_config():
     """Load environment variables and basic configuration"""
@@ -92,21 +67,29 @@ def load_config():
     return config
 
 def process_leads(leads):
-    """Process a single lead"""
+    """Process a batch of leads in one crew run"""
+    from getting_automated_sales_ai_agent.crew import GettingAutomatedSalesAiAgent
+    
     try:
+        # Cheap: configuration, tools and agents come from the process-wide engine
         crew = GettingAutomatedSalesAiAgent()
-        crew.inputs['leads'] = leads  # This will be a list with just one lead
+        crew.inputs['leads'] = leads
         result = crew.run()
         print("\nCompleted analysis")
         return result
+    except BudgetExceeded:
+        # Only the run budget stops a run; callers stop instead of starting more batches
+        raise
     except Exception as e:
         print(f"Error processing leads: {str(e)}")
 
 def check_lead_status(email):
     """Check if a lead has already been fully evaluated in Airtable"""
+    from getting_automated_sales_ai_agent.crew import get_crew_engine
+    
     try:
-        # Initialize AirtableTool
-        airtable_tool = AirtableTool()
+        # Reuse the engine's AirtableTool and its HTTP session across leads
+        airtable_tool = get_crew_engine().tools['airtable_tool']
         
         # Search for the lead in Airtable using _run instead of execute
         result = airtable_tool._run(
@@ -144,62 +127,237 @@ def check_lead_status(email):
         print(f"Error checking lead status: {str(e)}")
         return False, f"Error checking status: {str(e)}"
 
-def process_csv_files(input_dir):
-    """Process all CSV files in the input directory"""
-    csv_files = list(Path(input_dir).glob('*.csv'))
-    print(f"Looking for CSV files in: {input_dir}")
-    
-    for csv_file in csv_files:
-        print(f"Processing file: {csv_file.name}")
+def index_leads(files, read_leads):
+    """Read leads from every file into one index, merging contacts listed more than once"""
+    index = LeadIndex()
+    for lead_file in files:
+        print(f"Reading file: {lead_file.name}")
         try:
-            # Read the CSV file
-            df = pd.read_csv(csv_file)
-            
-            # Transform all leads
-            all_leads = transform_lead_data(df)
-            
-            if not all_leads:
-                print("No leads found in CSV")
+            with profile_section('read_leads'):
+                total_leads = 0
+                new_leads = 0
+                for leads in read_leads(lead_file):
+                    total_leads += len(leads)
+                    new_leads += index.add_all(leads)
+            if not total_leads:
+                print("No leads found in file")
+            else:
+                print(f"Read {total_leads} leads, {new_leads} not seen in earlier rows or files")
+        except Exception as e:
+            print(f"Error reading lead file {lead_file}: {str(e)}")
+    if index.duplicates:
+        print(f"Merged {index.duplicates} duplicate leads; {len(index)} unique leads to process")
+    return index
+
+def pending_leads(leads):
+    """Filter out already processed leads: the local run journal is checked first, Airtable only for leads the journal has not seen finish"""
+    leads_to_process = []
+    with profile_section('check_lead_status'):
+        journaled = get_run_journal().completed_leads(lead.lead_id for lead in leads)
+        for lead in leads:
+            if lead.lead_id in journaled:
+                print(f"Skipping lead {lead.email}: completed in an earlier run")
                 continue
-            
-            # Filter out already processed leads
-            leads_to_process = []
-            for lead in all_leads:
-                is_completed, reason = check_lead_status(lead.get('email'))
-                if is_completed:
-                    print(f"Skipping lead {lead.get('email')}: {reason}")
-                else:
-                    leads_to_process.append(lead)
+            is_completed, reason = check_lead_status(lead.email)
+            if is_completed:
+                print(f"Skipping lead {lead.email}: {reason}")
+            else:
+                leads_to_process.append(lead)
+    return leads_to_process
+
+def process_csv_files(input_dir, batch_size=LEAD_BATCH_SIZE):
+    """Process all lead files (CSV, Parquet, Arrow) in the input directory, each unique lead once, in batches of leads"""
+    from getting_automated_sales_ai_agent.utils.lead_reader import lead_files
+    
+    print(f"Looking for lead files in: {input_dir}")
+    process_lead_files(lead_files(input_dir), batch_size)
+
+def process_lead_files(files, batch_size=LEAD_BATCH_SIZE):
+    """Process the unique leads of the given files in batches, skipping leads already processed"""
+    from getting_automated_sales_ai_agent.utils.lead_reader import iter_lead_batches
+    
+    # Exports overlap, so every file is indexed before anything is processed;
+    # the unique leads wait in the index's temporary database, not in memory
+    with closing(index_leads(files, iter_lead_batches)) as index:
+        read = 0
+        for batch in index.batches(batch_size):
+            read += len(batch)
+            leads_to_process = pending_leads(batch)
             
             if not leads_to_process:
-                print("All leads have been processed")
+                print("All leads in this batch have been processed")
                 continue
                 
-            print(f"\nProcessing {len(leads_to_process)} leads from {csv_file.name}")
+            print(f"\nProcessing {len(leads_to_process)} leads "
+                  f"({read} of {len(index)} unique leads)")
             
             # Process remaining leads
-            process_leads(leads_to_process)
-            
+            try:
+                with profile_section('crew_run'):
+                    process_leads(leads_to_process)
+            except BudgetExceeded as e:
+                print(f"Stopping: {str(e)}")
+                break
+
+def enqueue_lead_files(files):
+    """Add the unique leads of the given files to the work queue"""
+    from getting_automated_sales_ai_agent.utils.lead_reader import iter_lead_batches
+    
+    queue = LeadQueue()
+    with closing(index_leads(files, iter_lead_batches)) as index:
+        added = sum(queue.enqueue(batch) for batch in index.batches(ENQUEUE_BATCH_SIZE))
+        unique = len(index)
+    print(f"\nEnqueued {added} leads ({unique - added} were already in the queue)")
+    print(f"Queue: {queue.counts()}")
+
+def fail_over_budget(queue, worker, leased, crew):
+    """Fail the leased leads that went over their own budget in `crew`'s run; return the other row ids"""
+    over_budget = crew.over_budget_leads() if crew is not None else {}
+    rest = []
+    for row_id, lead in leased:
+        if lead.lead_id in over_budget:
+            queue.fail([row_id], worker, over_budget[lead.lead_id])
+        else:
+            rest.append(row_id)
+    return rest
+
+def work_queue(batch_size=LEAD_BATCH_SIZE, visibility_timeout=VISIBILITY_TIMEOUT_SECONDS,
+               max_attempts=MAX_ATTEMPTS, wait=False):
+    """Lease batches of leads from the work queue and run the crew on them until the queue is empty"""
+    from getting_automated_sales_ai_agent.crew import GettingAutomatedSalesAiAgent
+    
+    configure_logging()
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    queue = LeadQueue(visibility_timeout=visibility_timeout, max_attempts=max_attempts)
+    print(f"Worker {worker} started")
+    
+    while True:
+        leased = queue.lease(worker, batch_size)
+        if not leased:
+            if not wait:
+                break
+            time.sleep(QUEUE_POLL_SECONDS)
+            continue
+        ids = [row_id for row_id, _ in leased]
+        
+        # Keep the lease while the crew runs, which can outlast the visibility timeout
+        finished = threading.Event()
+        def extend_lease():
+            while not finished.wait(visibility_timeout / 3):
+                queue.extend(ids, worker)
+        heartbeat = threading.Thread(target=extend_lease, daemon=True)
+        heartbeat.start()
+        crew = None
+        try:
+            leads_to_process = pending_leads([lead for _, lead in leased])
+            if leads_to_process:
+                print(f"\nWorker {worker} processing {len(leads_to_process)} leads")
+                crew = GettingAutomatedSalesAiAgent()
+                crew.inputs['leads'] = leads_to_process
+                crew.run()
+        except BudgetExceeded as e:
+            # The run budget is spent: hand the other leads to another worker and stop this one
+            queue.release(fail_over_budget(queue, worker, leased, crew), worker)
+            print(f"Worker {worker} stopping: {str(e)}")
+            break
         except Exception as e:
-            print(f"Error processing CSV file {csv_file}: {str(e)}")
+            queue.fail(ids, worker, str(e))
+            print(f"Worker {worker} failed a batch of {len(ids)} leads: {str(e)}")
+        else:
+            queue.ack(fail_over_budget(queue, worker, leased, crew), worker)
+        finally:
+            finished.set()
+            heartbeat.join()
+    
+    print(f"Worker {worker} finished. Queue: {queue.counts()}")
+
+def run_workers(workers, metrics_port=None, profile=False, profile_memory=False, **options):
+    """Run queue workers in this process, or in `workers` separate processes
+
+    Metrics and profiling options apply to the separate processes only; a
+    single worker runs in this process, which serves and profiles itself.
+    """
+    if workers <= 1:
+        work_queue(**options)
+        return
+    context = multiprocessing.get_context('spawn')
+    processes = [context.Process(target=worker_process, args=(index, metrics_port, profile, profile_memory),
+                                 kwargs=options)
+                 for index in range(workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
 
-def load_leads_from_csv(file_path):
-    """Load leads from a CSV file"""
-    leads = []
-    with open(file_path, 'r') as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            leads.append({
-                'name': row.get('Name', ''),
-                'email': row.get('Email', ''),
-                'company': row.get('Company', ''),
-                'role': row.get('Title', ''),
-                'linkedin_url': row.get('LinkedIn URL', ''),
-                'company_website': row.get('Company Website', '')
-            })
-    return leads
+def worker_process(index, metrics_port=None, profile=False, profile_memory=False, **options):
+    """Entry point of a spawned worker: each serves its own metrics (on metrics_port + index) and writes its own profile"""
+    if metrics_port:
+        start_metrics_server(metrics_port + index)
+    with profiled(profile, profile_memory, suffix=f"_worker{index}"):
+        work_queue(**options)
+
+def report_status(stale_days=STALE_LEAD_DAYS):
+    """Print lead counts by evaluation status and tier, stale leads and throughput since the last status report"""
+    load_dotenv()
+    start = time.perf_counter()
+    # One paginated read of the fields the report needs, instead of a search per lead
+    records = fetch_lead_records()
+    report = summarize_leads(records, stale_days)
+    print(f"Read {report.total} leads from Airtable in {time.perf_counter() - start:.2f}s\n")
+    
+    print(f"Both evaluations completed: {report.completed}")
+    print(f"Stale (unfinished, no activity for {stale_days:g} days): {report.stale}")
+    for name, counts in report.by_status.items():
+        print(f"{name}: " + ', '.join(f"{status} {count}" for status, count in counts.items()))
+    print("Lead Tier: " + ', '.join(f"{tier} {count}" for tier, count in report.by_tier.items()))
+    
+    snapshots = StatusSnapshots()
+    previous = snapshots.load()
+    if previous:
+        hours = (report.generated_at - previous.generated_at) / 3600
+        completed = report.completed - previous.completed
+        since = datetime.fromtimestamp(previous.generated_at).strftime('%Y-%m-%d %H:%M')
+        rate = f" ({completed / hours:.1f}/hour)" if hours > 0 else ""
+        print(f"\nSince the last status report ({since}, {hours:.1f}h ago): "
+              f"{completed:+d} completed{rate}, {report.total - previous.total:+d} leads")
+    snapshots.save(report)
+
+def metrics_port(port=None):
+    """The metrics port given, else METRICS_PORT, else None"""
+    port = port or os.getenv('METRICS_PORT')
+    return int(port) if port else None
+
+def start_metrics(port=None):
+    """Start the Prometheus metrics endpoint if a port is given or METRICS_PORT is set"""
+    port = metrics_port(port)
+    if port:
+        start_metrics_server(port)
+
+@contextmanager
+def profiled(enabled, trace_allocations=False, suffix=''):
+    """Profile the block (CPU samples, stage timings, peak memory) if enabled and write a report to logs/"""
+    profiler = RunProfiler(trace_allocations=trace_allocations) if enabled else None
+    if profiler:
+        profiler.start()
+    try:
+        yield
+    finally:
+        if profiler:
+            profiler.stop()
+            # Written next to the token usage logs
+            log_dir = Path(os.getenv('CREW_LOG_DIR') or Path(__file__).parent / 'logs')
+            report_path = log_dir / f"profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}{suffix}.json"
+            profiler.write_report(report_path)
+            print(f"\nProfile report written to {report_path}")
 
 def main():
+    from getting_automated_sales_ai_agent.crew import GettingAutomatedSalesAiAgent
+    from getting_automated_sales_ai_agent.utils.company_domain import group_leads_by_company
+    from getting_automated_sales_ai_agent.utils.lead_reader import read_simple_leads
+    
+    configure_logging()
+    start_metrics()
+    
     # Find CSV files in the inputs directory
     input_dir = Path(__file__).parent.parent.parent / 'inputs'
     print(f"\nLooking for CSV files in: {input_dir}")
@@ -209,56 +367,99 @@ def main():
         print("No CSV files found in the inputs directory")
         return
     
-    # Process each CSV file
-    for csv_file in csv_files:
-        print(f"\nProcessing file: {csv_file.name}")
-        
-        # Load leads from CSV
-        leads = load_leads_from_csv(csv_file)
-        
-        # Initialize the crew
-        sales_crew = GettingAutomatedSalesAiAgent()
-        
-        # Process each lead
-        for lead in leads:
-            try:
-                print(f"\nProcessing lead:")
-                print(f"Name: {lead['name']}")
-                print(f"Email: {lead['email']}")
-                print(f"Company: {lead['company']}")
-                
-                # Set the lead data for processing
-                sales_crew.inputs['leads'] = [lead]
-                
-                # Run the crew with hierarchical process
-                result = sales_crew.run()
-                
-                # Print results and usage statistics
-                print("\nProcessing Results:")
-                print(result)
-                
-            except Exception as e:
-                print(f"Error processing lead: {str(e)}")
-                continue
+    # Load each unique lead from the CSV files
+    with closing(index_leads(csv_files, lambda csv_file: [read_simple_leads(csv_file)])) as index:
+        leads = list(index)
+    
+    # Process contacts at the same company together so the company is
+    # crawled, researched and evaluated once per domain
+    for company, company_leads in group_leads_by_company(leads).items():
+        try:
+            print(f"\nProcessing {len(company_leads)} lead(s) for company: {company}")
+            for lead in company_leads:
+                print(f"Name: {lead.name}")
+                print(f"Email: {lead.email}")
+                print(f"Company: {lead.company}")
+            
+            # A run context per group on the shared engine; a run closes its usage log and trace
+            sales_crew = GettingAutomatedSalesAiAgent()
+            sales_crew.inputs['leads'] = company_leads
+            
+            # Run the crew with hierarchical process
+            result = sales_crew.run()
+            
+            # Print results and usage statistics
+            print("\nProcessing Results:")
+            print(result)
+            
+        except BudgetExceeded as e:
+            print(f"Stopping: {str(e)}")
+            break
+        except Exception as e:
+            print(f"Error processing lead: {str(e)}")
+            continue
 
 def run():
     """Main function to run the crew"""
     parser = argparse.ArgumentParser(description='Process leads from a CSV file')
-    parser.add_argument('--file', type=str, help='Path to CSV file')
+    parser.add_argument('command', nargs='?', choices=['run', 'enqueue', 'worker', 'status'],
+                       default='run',
+                       help='run: process the input files now; enqueue: add their leads to the work queue; '
+                            'worker: process leads from the work queue; status: report progress from Airtable')
+    parser.add_argument('--file', type=str, help='Path to a lead file (CSV, Parquet or Arrow IPC)')
     parser.add_argument('--mode', type=str, choices=['find-best', 'evaluate-single'], 
                        default='find-best', help='Operation mode: find best offer or evaluate single offer')
     parser.add_argument('--offer-id', type=str, help='Offer ID to evaluate (required for evaluate-single mode)')
+    parser.add_argument('--batch-size', type=int, default=LEAD_BATCH_SIZE,
+                       help='Leads read from the CSV and processed per crew run')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='With worker, the number of worker processes to start')
+    parser.add_argument('--visibility-timeout', type=float, default=VISIBILITY_TIMEOUT_SECONDS,
+                       help='With worker, seconds before a lead leased by an unresponsive worker is retried')
+    parser.add_argument('--max-attempts', type=int, default=MAX_ATTEMPTS,
+                       help='With worker, attempts before a lead is marked failed')
+    parser.add_argument('--wait', action='store_true',
+                       help='With worker, keep polling for new leads instead of exiting once the queue is empty')
+    parser.add_argument('--stale-days', type=float, default=STALE_LEAD_DAYS,
+                       help='With status, days without activity after which an unfinished lead counts as stale')
+    parser.add_argument('--metrics-port', type=int,
+                       help='Serve Prometheus metrics on this port while the batch runs; '
+                            'with several workers, worker N serves on this port + N')
+    parser.add_argument('--profile', action='store_true',
+                       help='Profile the run (CPU samples, stage timings, peak memory) and write a report to logs/; '
+                            'with several workers, one report per worker')
+    parser.add_argument('--profile-memory', action='store_true',
+                       help='With --profile, also record top allocation sites (slows the run down)')
     args = parser.parse_args()
     
     if args.mode == 'evaluate-single' and not args.offer_id:
         parser.error("--offer-id is required when using evaluate-single mode")
     
-    if not args.file:
+    configure_logging()
+    
+    if args.command == 'worker' and args.workers > 1:
+        # This process only waits for the workers, so each worker serves
+        # metrics on its own port and writes its own profile
+        run_workers(args.workers, metrics_port=metrics_port(args.metrics_port), profile=args.profile,
+                    profile_memory=args.profile_memory, batch_size=args.batch_size,
+                    visibility_timeout=args.visibility_timeout, max_attempts=args.max_attempts, wait=args.wait)
+        return
+    
+    start_metrics(args.metrics_port)
+    with profiled(args.profile, args.profile_memory):
         input_dir = Path(__file__).parent.parent.parent / 'inputs'
-        process_csv_files(input_dir)
-    else:
-        file_path = Path(args.file)
-        process_leads([transform_lead_data(pd.read_csv(file_path))])
+        if args.command == 'enqueue':
+            from getting_automated_sales_ai_agent.utils.lead_reader import lead_files
+            enqueue_lead_files([Path(args.file)] if args.file else lead_files(input_dir))
+        elif args.command == 'status':
+            report_status(args.stale_days)
+        elif args.command == 'worker':
+            work_queue(batch_size=args.batch_size, visibility_timeout=args.visibility_timeout,
+                       max_attempts=args.max_attempts, wait=args.wait)
+        elif not args.file:
+            process_csv_files(input_dir, args.batch_size)
+        else:
+            process_lead_files([Path(args.file)], args.batch_size)
 
 if __name__ == "__main__":
     run()
@@ -1,17 +1,27 @@
-from .airtable_tool import AirtableTool
-from .company_data_tool import CompanyDataTool
-from .news_tool import NewsTool
-from .openai_tool import OpenAITool
-from .perplexity_tool import PerplexityTool
-from .proxycurl_tool import ProxycurlTool
-from .reddit_tool import RedditTool
+import importlib
 
-__all__ = [
-    'AirtableTool',
-    'CompanyDataTool',
-    'NewsTool',
-    'OpenAITool',
-    'PerplexityTool',
-    'ProxycurlTool',
-    'RedditTool'
-]
\ No newline at end of file
+# Each tool pulls in its own client library (crewai, openai, praw, bs4, ...),
+# so a tool's module is imported the first time the tool is looked up here
+_TOOL_MODULES = {
+    'AirtableTool': 'airtable_tool',
+    'CompanyDataTool': 'company_data_tool',
+    'NewsTool': 'news_tool',
+    'OpenAITool': 'openai_tool',
+    'PerplexityTool': 'perplexity_tool',
+    'ProxycurlTool': 'proxycurl_tool',
+    'RedditTool': 'reddit_tool'
+}
+
+__all__ = list(_TOOL_MODULES)
+
+
+def __getattr__(name):
+    if name not in _TOOL_MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    tool = getattr(importlib.import_module(f".{_TOOL_MODULES[name]}", __name__), name)
+    globals()[name] = tool
+    return tool
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -9,8 +9,8 @@ import logging
 import json
 from datetime import datetime
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+from ..utils import metering
+
 logger = logging.getLogger(__name__)
 
 class AirtableToolArgs(BaseModel):
@@ -46,6 +46,7 @@ class AirtableTool(BaseTool):
     args_schema: Type[BaseModel] = AirtableToolArgs
     api_key: str = Field(default_factory=lambda: os.environ.get("AI_AGENT_AIRTABLE_API_KEY"))
     base_id: str = Field(default_factory=lambda: os.environ.get("AIRTABLE_BASE_ID"))
+    endpoint_url: str = Field(default_factory=lambda: os.environ.get("AIRTABLE_ENDPOINT_URL", "https://api.airtable.com"))
 
     def __init__(self, **data):
         super().__init__(**data)
@@ -59,17 +60,18 @@ class AirtableTool(BaseTool):
             search_value: Optional[str] = None) -> Dict:
         """Execute the Airtable operation"""
         try:
-            logger.debug(f"AirtableTool executing action: {action}")
-            logger.debug(f"Input data: {data}")
+            logger.debug("AirtableTool executing action: %s", action)
+            logger.debug("Input data: %s", data)
             
-            table = Table(self.api_key, self.base_id, table_name)
+            table = Table(self.api_key, self.base_id, table_name, endpoint_url=self.endpoint_url)
             
             if action == "search":
                 if not search_field or not search_value:
                     return {"error": "Search field and value are required for search operation"}
                 # Search for existing record
                 formula = f"LOWER({search_field}) = LOWER('{search_value}')"
-                records = table.all(formula=formula)
+                with metering.tool_call('airtable', 'search', table=table_name):
+                    records = table.all(formula=formula)
                 if records:
                     return {"record": records[0], "record_id": records[0]["id"]}
                 return {"records": []}
@@ -79,9 +81,10 @@ class AirtableTool(BaseTool):
                     return {"error": "Data is required for create operation"}
                 # Clean and validate data before creation
                 cleaned_data = self._clean_data_for_schema(data, table_name)
-                logger.debug(f"Cleaned data for create: {cleaned_data}")
+                logger.debug("Cleaned data for create: %s", cleaned_data)
                 # Enable typecast for automatic data conversion
-                created_record = table.create(cleaned_data, typecast=True)
+                with metering.tool_call('airtable', 'create', table=table_name):
+                    created_record = table.create(cleaned_data, typecast=True)
                 return {"record": created_record, "record_id": created_record["id"]}
                 
             elif action == "update":
@@ -91,22 +94,24 @@ class AirtableTool(BaseTool):
                     return {"error": "Data is required for update operation"}
                 # Clean and validate data before update
                 cleaned_data = self._clean_data_for_schema(data, table_name)
-                logger.debug(f"Cleaned data for update: {cleaned_data}")
+                logger.debug("Cleaned data for update: %s", cleaned_data)
                 # Enable typecast for automatic data conversion
-                updated_record = table.update(record_id, cleaned_data, typecast=True)
+                with metering.tool_call('airtable', 'update', table=table_name):
+                    updated_record = table.update(record_id, cleaned_data, typecast=True)
                 return {"record": updated_record, "record_id": record_id}
                 
             elif action == "get":
                 if not record_id:
                     return {"error": "Record ID is required for get operation"}
-                record = table.get(record_id)
+                with metering.tool_call('airtable', 'get', table=table_name):
+                    record = table.get(record_id)
                 return {"record": record, "record_id": record_id}
                 
             else:
                 return {"error": f"Unsupported action: {action}"}
                 
         except Exception as e:
-            logger.error(f"Error in AirtableTool: {str(e)}")
+            logger.error("Error in AirtableTool: %s", e)
             return {"error": str(e)}
 
     def _clean_data_for_schema(self, data: dict, table_name: str) -> dict:
@@ -146,8 +151,8 @@ class AirtableTool(BaseTool):
         
         cleaned_data = {}
         schema = schemas.get(table_name, {})
-        logger.debug(f"Cleaning data for table {table_name}")
-        logger.debug(f"Input data: {data}")
+        logger.debug("Cleaning data for table %s", table_name)
+        logger.debug("Input data: %s", data)
         
         # Score conversion mapping
         score_mapping = {
@@ -159,10 +164,13 @@ class AirtableTool(BaseTool):
             "Weak": 30
         }
         
+        # Checked once: this loop runs for every field of every record
+        debug = logger.isEnabledFor(logging.DEBUG)
         for field, value in data.items():
             if field in schema:
                 field_type = schema[field]
-                logger.debug(f"Processing field: {field}, value: {value}, expected type: {field_type}")
+                if debug:
+                    logger.debug("Processing field: %s, value: %s, expected type: %s", field, value, field_type)
                 
                 # Skip empty values
                 if value is None or value == "":
@@ -178,7 +186,7 @@ class AirtableTool(BaseTool):
                             # Convert to ISO format YYYY-MM-DD
                             cleaned_data[field] = datetime.now().strftime("%Y-%m-%d")
                     except Exception as e:
-                        logger.warning(f"Failed to process date for {field}: {str(e)}")
+                        logger.warning("Failed to process date for %s: %s", field, e)
                         cleaned_data[field] = datetime.now().strftime("%Y-%m-%d")
                     continue
                     
@@ -200,7 +208,7 @@ class AirtableTool(BaseTool):
                     if value in field_type:
                         cleaned_data[field] = value
                     else:
-                        logger.warning(f"Value {value} not in allowed values for field {field}: {field_type}")
+                        logger.warning("Value %s not in allowed values for field %s: %s", value, field, field_type)
                         # Set default value for status fields
                         if "Status" in field:
                             cleaned_data[field] = "Not Started"
@@ -226,7 +234,7 @@ class AirtableTool(BaseTool):
                             # Direct numeric conversion
                             cleaned_data[field] = field_type(value)
                     except (ValueError, TypeError) as e:
-                        logger.warning(f"Failed to convert {field} value {value} to {field_type}: {str(e)}")
+                        logger.warning("Failed to convert %s value %s to %s: %s", field, value, field_type, e)
                         continue
                 
                 # Handle string fields
@@ -240,5 +248,5 @@ class AirtableTool(BaseTool):
                 elif isinstance(value, field_type):
                     cleaned_data[field] = value
                 
-        logger.debug(f"Cleaned data output: {cleaned_data}")
+        logger.debug("Cleaned data output: %s", cleaned_data)
         return cleaned_data
@@ -2,27 +2,83 @@
 
 from crewai.tools import BaseTool
 from pydantic import Field, BaseModel
-from typing import Any, Type
+from typing import Any, List, Optional, Set, Type
+from dataclasses import dataclass, field
 import requests
 from bs4 import BeautifulSoup
 import tldextract
+import os
 import time
 from urllib.parse import urljoin, urlparse
 import json
+import gzip
+import logging
+from xml.etree import ElementTree
 from urllib.robotparser import RobotFileParser
 from openai import OpenAI
 
+from ..utils.link_ranker import normalize_url, rank_links
+from ..utils.company_domain import normalize_domain
+from ..utils.company_store import get_company_store
+from ..utils import metering
+from ..utils.budget import budget_error
+
+logger = logging.getLogger(__name__)
+
 class CompanyDataToolArgs(BaseModel):
     domain: str = Field(description="The domain to crawl")
 
+@dataclass
+class CrawlContext:
+    """State for a single crawl of one domain.
+
+    A fresh context is created for every `_run` call, so one shared tool
+    instance can crawl many domains concurrently without sharing state.
+    """
+    domain: str
+    base_url: str
+    session: requests.Session
+    store_key: Optional[str] = None
+    visited_urls: Set[str] = field(default_factory=set)
+    extracted_texts: List[str] = field(default_factory=list)
+    # Sitemap locations declared in robots.txt
+    sitemap_urls: List[str] = field(default_factory=list)
+
+    def fetch(self, url: str, timeout: int = 10, **kwargs) -> requests.Response:
+        """GET a URL with this crawl's session, reporting the request to metering."""
+        with metering.tool_call('crawl', 'fetch', url=url) as call:
+            response = self.session.get(url, timeout=timeout, **kwargs)
+            call['status_code'] = response.status_code
+            if not kwargs.get('stream'):
+                call['bytes'] = len(response.content)
+            return response
+
+    def mark_visited(self, url: str) -> bool:
+        """Record a URL as visited. Returns False if it was already visited."""
+        key = normalize_url(url)
+        if key in self.visited_urls:
+            return False
+        self.visited_urls.add(key)
+        return True
+
 class CompanyDataTool(BaseTool):
     name: str = "company_data_tool"
     description: str = "Crawls the company's website to extract relevant information."
     llm: Any = Field(description="LLM instance to use for text analysis")
     args_schema: Type[BaseModel] = CompanyDataToolArgs
-    visited_urls: set = Field(default_factory=set)
     max_depth: int = 2
     max_pages: int = 20
+    max_important_links: int = 5
+    # Below this confidence the local link ranking defers to the LLM
+    link_ranking_min_confidence: float = 0.5
+    # Reuse crawl results stored for the domain by earlier runs
+    use_company_store: bool = True
+    # Stop reading a sitemap after this many <loc> entries
+    max_sitemap_urls: int = 5000
+    # Pause between page fetches on the same site
+    politeness_delay: float = 1.0
+    # Overridable so the crawler can be pointed at a local fixture site farm
+    url_scheme: str = Field(default_factory=lambda: os.getenv('COMPANY_CRAWL_SCHEME', 'https'))
     headers: dict = Field(default_factory=lambda: {
         'User-Agent': 'Mozilla/5.0 (iPhone; CPU iPhone OS 14_0 like Mac OS X) '
                       'AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.0 Mobile/15A372 '
@@ -37,104 +93,226 @@ class CompanyDataTool(BaseTool):
         super().__init__(**kwargs)
 
     def _run(self, domain: str) -> dict:
-        """Fetch and analyze company data from the company's website."""
-        print(f"Starting analysis of domain: {domain}")
+        """Fetch and analyze company data from the company's website.
+
+        All crawl state lives in a per-call CrawlContext, so this method is
+        safe to call from many threads on the same tool instance.
+        """
+        logger.info("Starting analysis of domain: %s", domain, extra={'domain': domain})
         
         try:
-            # Clean up domain if it's a full URL
-            if domain.startswith(('http://', 'https://')):
-                parsed = urlparse(domain)
-                domain = parsed.netloc or parsed.path
-            
-            # Validate domain
-            if not domain:
-                print("Error: No domain provided")
-                return {"error": "No domain provided."}
-
-            # Prepare base URL
-            domain_info = tldextract.extract(domain)
-            if not domain_info.domain:
-                print("Error: Invalid domain provided")
-                return {"error": "Invalid domain provided."}
-
-            base_url = f"https://{domain_info.domain}.{domain_info.suffix}"
-            print(f"Base URL: {base_url}")
-
-            # Check robots.txt
-            if not self.is_allowed_by_robots(base_url):
-                print(f"Warning: Crawling is disallowed by robots.txt for {base_url}")
-                return {"error": f"Crawling is disallowed by robots.txt for {base_url}"}
-
-            # Reset visited URLs for this domain
-            self.visited_urls = set()
-            extracted_texts = []
-            
-            # Start with the homepage
-            response = requests.get(base_url, headers=self.headers, timeout=10)
-            if response.status_code != 200:
-                return {"error": f"Failed to access homepage: {response.status_code}"}
+            store_key = normalize_domain(domain) if self.use_company_store else None
+            if store_key:
+                cached = get_company_store().get(store_key, 'crawl')
+                if cached is not None:
+                    logger.info("Using stored company data for %s", store_key)
+                    return cached
 
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Get homepage content
-            extracted_texts = [soup.get_text(separator=' ', strip=True)]
-            print("Extracted homepage content")
-
-            # Get important links to crawl
-            important_urls = self.get_important_links(soup, base_url)
-            print(f"Selected {len(important_urls)} important pages to analyze")
-
-            # Crawl selected pages
-            for url in important_urls:
-                try:
-                    print(f"Analyzing important page: {url}")
-                    response = requests.get(url, headers=self.headers, timeout=10)
-                    if response.status_code == 200:
-                        soup = BeautifulSoup(response.content, 'html.parser')
-                        text = soup.get_text(separator=' ', strip=True)
-                        extracted_texts.append(text)
-                        print(f"Successfully extracted content from {url}")
-                    time.sleep(1)  # Politeness delay
-                except Exception as e:
-                    print(f"Error fetching {url}: {str(e)}")
-                    continue
+            budget_msg = budget_error('openai')
+            if budget_msg:
+                logger.warning("Skipping analysis of %s: %s", domain, budget_msg)
+                return {"error": budget_msg}
 
-            if not extracted_texts:
-                return {"error": "No content extracted from the website"}
-
-            # Combine all extracted texts
-            combined_text = ' '.join(extracted_texts)
-            print(f"Extracted content from {len(extracted_texts)} pages")
-
-            # Use the LLM to extract structured company data
-            company_data = self.extract_company_data_with_llm(combined_text)
-            print("Completed company data extraction")
+            ctx = self._create_context(domain)
+            if isinstance(ctx, dict):
+                return ctx
+            ctx.store_key = store_key
+            with ctx.session:
+                company_data = self._crawl(ctx)
 
+            if store_key and isinstance(company_data, dict) and 'error' not in company_data:
+                get_company_store().put(store_key, 'crawl', company_data)
             return company_data
             
         except Exception as e:
-            print(f"Error analyzing domain {domain}: {str(e)}")
+            logger.error("Error analyzing domain %s: %s", domain, e)
             return {"error": f"Analysis error: {str(e)}"}
 
-    def is_allowed_by_robots(self, base_url):
-        """Check if crawling is allowed by robots.txt."""
+    def _create_context(self, domain: str):
+        """Validate the domain and build a crawl context, or return an error dict."""
+        # Clean up domain if it's a full URL
+        if domain.startswith(('http://', 'https://')):
+            parsed = urlparse(domain)
+            domain = parsed.netloc or parsed.path
+        
+        # Validate domain
+        if not domain:
+            logger.error("No domain provided")
+            return {"error": "No domain provided."}
+
+        # Prepare base URL
+        domain_info = tldextract.extract(domain)
+        if not domain_info.domain:
+            logger.error("Invalid domain provided")
+            return {"error": "Invalid domain provided."}
+
+        base_url = f"{self.url_scheme}://{domain_info.domain}.{domain_info.suffix}"
+        logger.debug("Base URL: %s", base_url)
+
+        session = requests.Session()
+        session.headers.update(self.headers)
+        return CrawlContext(domain=domain, base_url=base_url, session=session)
+
+    def _crawl(self, ctx: CrawlContext) -> dict:
+        """Crawl the homepage and the most important pages for one domain."""
+        # Check robots.txt
+        if not self.is_allowed_by_robots(ctx.base_url, ctx=ctx):
+            logger.warning("Crawling is disallowed by robots.txt for %s", ctx.base_url)
+            return {"error": f"Crawling is disallowed by robots.txt for {ctx.base_url}"}
+
+        # Start with the homepage
+        ctx.mark_visited(ctx.base_url)
+        response = ctx.fetch(ctx.base_url, timeout=10)
+        if response.status_code != 200:
+            return {"error": f"Failed to access homepage: {response.status_code}"}
+
+        soup = BeautifulSoup(response.content, 'html.parser')
+        
+        # Get homepage content
+        ctx.extracted_texts.append(soup.get_text(separator=' ', strip=True))
+        logger.debug("Extracted homepage content")
+
+        # Pick pages from a stored selection or the sitemap, and only read
+        # homepage anchors when neither gives a confident answer
+        important_urls = self.select_pages_from_store(ctx)
+        if not important_urls:
+            important_urls = self.discover_pages_from_sitemap(ctx)
+            if important_urls and ctx.store_key:
+                get_company_store().put(ctx.store_key, 'pages', important_urls)
+        if not important_urls:
+            important_urls = self.get_important_links(soup, ctx.base_url)
+        logger.info("Selected %s important pages to analyze", len(important_urls))
+
+        # Crawl selected pages
+        for url in important_urls[:self.max_pages]:
+            if not ctx.mark_visited(url):
+                continue
+            try:
+                logger.debug("Analyzing important page: %s", url)
+                response = ctx.fetch(url, timeout=10)
+                if response.status_code == 200:
+                    soup = BeautifulSoup(response.content, 'html.parser')
+                    text = soup.get_text(separator=' ', strip=True)
+                    ctx.extracted_texts.append(text)
+                    logger.debug("Successfully extracted content from %s", url)
+                time.sleep(self.politeness_delay)
+            except Exception as e:
+                logger.warning("Error fetching %s: %s", url, e)
+                continue
+
+        if not ctx.extracted_texts:
+            return {"error": "No content extracted from the website"}
+
+        # Combine all extracted texts
+        combined_text = ' '.join(ctx.extracted_texts)
+        logger.info("Extracted content from %s pages", len(ctx.extracted_texts))
+
+        # Use the LLM to extract structured company data
+        company_data = self.extract_company_data_with_llm(combined_text)
+        logger.info("Completed company data extraction")
+
+        return company_data
+
+    def is_allowed_by_robots(self, base_url, ctx: Optional[CrawlContext] = None):
+        """Check if crawling is allowed by robots.txt.
+
+        When a crawl context is given, sitemaps declared in robots.txt are
+        recorded on it so sitemap discovery needs no extra request.
+        """
         robots_url = urljoin(base_url, '/robots.txt')
         try:
-            response = requests.get(robots_url, headers=self.headers, timeout=5)
+            if ctx is not None:
+                response = ctx.fetch(robots_url, timeout=5)
+            else:
+                response = requests.get(robots_url, headers=self.headers, timeout=5)
             if response.status_code == 200:
                 robots_txt = response.text
                 rp = RobotFileParser()
                 rp.parse(robots_txt.splitlines())
+                if ctx is not None:
+                    ctx.sitemap_urls = list(rp.site_maps() or [])
                 return rp.can_fetch(self.headers['User-Agent'], base_url)
             return True
         except requests.exceptions.RequestException:
-            print(f"Warning: Could not access robots.txt for {base_url}")
+            logger.warning("Could not access robots.txt for %s", base_url)
             return True
 
+    def select_pages_from_store(self, ctx: CrawlContext) -> List[str]:
+        """Return the page selection stored for this domain by an earlier crawl."""
+        if not ctx.store_key:
+            return []
+        pages = get_company_store().get(ctx.store_key, 'pages')
+        if pages:
+            logger.info("Using stored page selection for %s", ctx.store_key)
+        return pages or []
+
+    def discover_pages_from_sitemap(self, ctx: CrawlContext) -> List[str]:
+        """Pick important pages from the site's sitemap without calling the LLM.
+
+        Uses the first sitemap declared in robots.txt, or /sitemap.xml. When that
+        is a sitemap index, only the single child most likely to list regular
+        pages is read. Returns an empty list when the sitemap is missing or the
+        ranking is not confident enough.
+        """
+        sitemap_url = ctx.sitemap_urls[0] if ctx.sitemap_urls else urljoin(ctx.base_url, '/sitemap.xml')
+        page_urls, child_sitemaps = self._read_sitemap(ctx, sitemap_url)
+        if not page_urls and child_sitemaps:
+            child_sitemaps.sort(key=_sitemap_preference)
+            page_urls, _ = self._read_sitemap(ctx, child_sitemaps[0])
+
+        page_urls = [url for url in page_urls if _same_site(url, ctx.base_url)]
+        if not page_urls:
+            return []
+
+        ranking = rank_links([{"url": url} for url in page_urls], max_links=self.max_important_links)
+        logger.info("Sitemap listed %s pages, selected %s (confidence %s)", len(page_urls), len(ranking.urls), ranking.confidence)
+        if ranking.confidence < self.link_ranking_min_confidence:
+            return []
+        return ranking.urls
+
+    def _read_sitemap(self, ctx: CrawlContext, sitemap_url: str):
+        """Stream-parse a sitemap and return (page URLs, child sitemap URLs)."""
+        page_urls: List[str] = []
+        child_sitemaps: List[str] = []
+        try:
+            with ctx.fetch(sitemap_url, timeout=10, stream=True) as response:
+                if response.status_code != 200:
+                    return page_urls, child_sitemaps
+                response.raw.decode_content = True
+                stream = response.raw
+                if sitemap_url.endswith('.gz'):
+                    stream = gzip.GzipFile(fileobj=stream)
+
+                is_index = False
+                for event, element in ElementTree.iterparse(stream, events=('start', 'end')):
+                    tag = element.tag.rsplit('}', 1)[-1]
+                    if event == 'start':
+                        if tag == 'sitemapindex':
+                            is_index = True
+                        continue
+                    if tag == 'loc' and element.text:
+                        (child_sitemaps if is_index else page_urls).append(element.text.strip())
+                        if len(page_urls) + len(child_sitemaps) >= self.max_sitemap_urls:
+                            break
+                    elif tag in ('url', 'sitemap'):
+                        # Drop parsed entries so memory stays flat on large sitemaps
+                        element.clear()
+        except (requests.exceptions.RequestException, ElementTree.ParseError, OSError) as e:
+            logger.warning("Could not read sitemap %s: %s", sitemap_url, e)
+        return page_urls, child_sitemaps
+
+    def _chat_completion(self, operation: str, **kwargs):
+        """Call the OpenAI chat completions API, reporting the call to metering."""
+        with metering.tool_call('openai', operation, model=kwargs.get('model')) as call:
+            response = self.client.chat.completions.create(**kwargs)
+            metering.add_response_usage(call, response)
+            return response
+
     def extract_company_data_with_llm(self, text_content):
         """Use OpenAI directly to extract structured company data."""
         try:
-            response = self.client.chat.completions.create(
+            response = self._chat_completion(
+                'extract_company_data',
                 model="gpt-4o-mini",  # or your preferred model
                 messages=[
                     {
@@ -168,16 +346,16 @@ class CompanyDataTool(BaseTool):
             return json.loads(response.choices[0].message.content)
             
         except Exception as e:
-            print(f"Error processing with OpenAI: {str(e)}")
+            logger.error("Error processing with OpenAI: %s", e)
             return {"error": f"OpenAI processing error: {str(e)}"}
 
     def get_important_links(self, soup, base_url):
-        """Use OpenAI directly to identify important links."""
+        """Identify important links, using local ranking and the LLM only as a fallback."""
         try:
             # Get all links and their surrounding text
             link_data = []
             all_links = soup.find_all('a', href=True)
-            print(f"\nFound {len(all_links)} total links on the page")
+            logger.debug("Found %s total links on the page", len(all_links))
             
             for link in all_links:
                 href = link.get('href', '')
@@ -185,30 +363,44 @@ class CompanyDataTool(BaseTool):
                 
                 # Skip external links and non-http(s) links
                 parsed_url = urlparse(full_url)
-                if (parsed_url.netloc != urlparse(base_url).netloc or
+                if (not _same_site(full_url, base_url) or
                     parsed_url.scheme not in ['http', 'https']):
                     continue
                 
-                # Get context around the link
                 context = link.get_text(strip=True)
-                parent_text = link.parent.get_text(strip=True)[:200]
-                
                 if context:  # Only add links with visible text
                     link_data.append({
                         "url": full_url,
-                        "text": context,
-                        "context": parent_text
+                        "text": context
                     })
-                    print(f"Found link: {context} -> {full_url}")
 
-            print(f"\nFiltered to {len(link_data)} internal links with text")
+            logger.debug("Filtered to %s internal links with text", len(link_data))
 
             if not link_data:
-                print("No valid links found for analysis")
+                logger.info("No valid links found for analysis")
                 return []
 
-            print("\nSending links to OpenAI for analysis...")
-            response = self.client.chat.completions.create(
+            ranking = rank_links(link_data, max_links=self.max_important_links)
+            if ranking.confidence >= self.link_ranking_min_confidence:
+                logger.info("Selected %s links locally (confidence %s)", len(ranking.urls), ranking.confidence)
+                return ranking.urls
+
+            logger.info("Local link ranking confidence %s is low, falling back to OpenAI", ranking.confidence)
+            llm_urls = self.get_important_links_with_llm(link_data, base_url)
+            return llm_urls or ranking.urls
+
+        except Exception as e:
+            logger.error("Error selecting important links: %s", e)
+            return []
+
+    def get_important_links_with_llm(self, link_data, base_url):
+        """Use OpenAI directly to identify important links."""
+        try:
+            # Compact payload: the model only needs each URL and its anchor text
+            compact_links = [[link["url"], link["text"][:80]] for link in link_data[:150]]
+
+            response = self._chat_completion(
+                'select_links',
                 model="gpt-4o-mini",
                 messages=[
                     {
@@ -221,17 +413,15 @@ class CompanyDataTool(BaseTool):
                         "role": "user",
                         "content": f"""
                         Analyze these links from {base_url} and return a JSON object with an array of the most important URLs
-                        that would contain valuable company information. Consider the link text and surrounding context.
+                        that would contain valuable company information. Consider the link text.
                         
-                        Link data:
-                        {json.dumps(link_data, indent=2)}
+                        Links as [url, text] pairs:
+                        {json.dumps(compact_links, separators=(',', ':'))}
                         
                         Return format:
                         {{
                             "urls": ["url1", "url2", "url3", "url4", "url5"]
                         }}
-                        
-                        Include any URLs that might contain company
                         """
                     }
                 ],
@@ -239,8 +429,27 @@ class CompanyDataTool(BaseTool):
             )
             
             result = json.loads(response.choices[0].message.content)
-            return result.get("urls", [])  # Expect a JSON object with "urls" array
+            return result.get("urls", [])[:self.max_important_links]  # Expect a JSON object with "urls" array
 
         except Exception as e:
-            print(f"Error selecting important links: {str(e)}")
+            logger.error("Error selecting important links with OpenAI: %s", e)
             return []
+
+
+def _same_site(url: str, base_url: str) -> bool:
+    """Return True if url is on the same host as base_url, ignoring a www. prefix."""
+    def host(value):
+        netloc = urlparse(value).netloc.lower()
+        return netloc[4:] if netloc.startswith('www.') else netloc
+    return host(url) == host(base_url)
+
+
+def _sitemap_preference(sitemap_url: str) -> int:
+    """Sort key preferring child sitemaps that list regular pages over posts or products."""
+    name = urlparse(sitemap_url).path.lower()
+    for rank, hint in enumerate(('page', 'main', 'site', 'default')):
+        if hint in name:
+            return rank
+    if any(hint in name for hint in ('post', 'blog', 'news', 'product', 'tag', 'category', 'author', 'image', 'video')):
+        return 10
+    return 5
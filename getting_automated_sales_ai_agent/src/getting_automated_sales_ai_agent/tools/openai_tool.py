@@ -2,11 +2,17 @@
 
 from crewai.tools import BaseTool
 import os
+import logging
 from typing import ClassVar, Optional, Any
 from pydantic import Field, ConfigDict
 from openai import OpenAI
 from dotenv import load_dotenv
 
+from ..utils import metering
+from ..utils.budget import budget_error
+
+logger = logging.getLogger(__name__)
+
 class OpenAITool(BaseTool):
     name: ClassVar[str] = "openai_tool"
     tool_description: ClassVar[str] = "Performs NLP tasks using OpenAI's GPT-4 model."
@@ -37,6 +43,11 @@ class OpenAITool(BaseTool):
             max_tokens: Maximum number of tokens to generate
             temperature: Temperature for response generation
         """
+        budget_msg = budget_error('openai')
+        if budget_msg:
+            logger.warning("Skipping OpenAI completion: %s", budget_msg)
+            return f"Error during completion: {budget_msg}"
+        
         try:
             # Handle dictionary input
             if isinstance(prompt, dict):
@@ -45,17 +56,19 @@ class OpenAITool(BaseTool):
             # Ensure prompt is a string
             prompt = str(prompt)
             
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=max_tokens,
-                temperature=temperature
-            )
+            with metering.tool_call('openai', 'chat', model="gpt-4o-mini") as call:
+                response = self.client.chat.completions.create(
+                    model="gpt-4o-mini",
+                    messages=[
+                        {"role": "user", "content": prompt}
+                    ],
+                    max_tokens=max_tokens,
+                    temperature=temperature
+                )
+                metering.add_response_usage(call, response)
             return response.choices[0].message.content.strip()
             
         except Exception as e:
             error_msg = f"OpenAI API error: {str(e)}"
-            print(error_msg)
+            logger.error(error_msg)
             return f"Error during completion: {error_msg}"
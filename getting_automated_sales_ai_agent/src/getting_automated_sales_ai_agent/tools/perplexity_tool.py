@@ -1,10 +1,26 @@
 from crewai.tools import BaseTool
 import os
+import logging
 from typing import ClassVar, Optional, Any
 from pydantic import Field, ConfigDict
 from dotenv import load_dotenv
 from openai import OpenAI
 
+from ..utils.company_domain import normalize_company_key
+from ..utils.company_store import get_company_store
+from ..utils import metering
+from ..utils.budget import budget_error
+
+logger = logging.getLogger(__name__)
+
+# Research about a company asks this instead of the agent's query, whose
+# wording differs from run to run, so the result can be stored and reused
+# for every later question about the company with the same focus
+COMPANY_RESEARCH_PROMPT = (
+    "Research the company at {company}: what it sells and to whom, its market and main "
+    "competitors, recent news, funding and growth, and the challenges it is likely facing."
+)
+
 class PerplexityTool(BaseTool):
     name: ClassVar[str] = "perplexity_tool"
     tool_description: ClassVar[str] = "Performs web research using Perplexity API"
@@ -23,21 +39,38 @@ class PerplexityTool(BaseTool):
         
         self.client = OpenAI(
             api_key=self.api_key,
-            base_url="https://api.perplexity.ai"
+            base_url=os.getenv('PERPLEXITY_BASE_URL', "https://api.perplexity.ai")
         )
 
     @property
     def description(self) -> str:
         return self.tool_description
 
-    def _run(self, query: str, focus: str = 'business') -> str:
+    def _run(self, query: str, focus: str = 'business', domain: Optional[str] = None) -> str:
         """
         Perform research using Perplexity API
         
         Args:
             query (str): Research query
             focus (str): Research focus area (business, tech, general)
+            domain (str): Optional company domain or LinkedIn company URL;
+                with it, the tool returns a standard brief on the company
+                for the focus (COMPANY_RESEARCH_PROMPT) instead of answering
+                the query, stored and reused for the company
         """
+        store_key = normalize_company_key(domain) if domain else None
+        if store_key:
+            cached = get_company_store().get(store_key, 'research', item_key=focus)
+            if cached is not None:
+                logger.info("Using stored %s research for %s", focus, store_key)
+                return cached
+            query = COMPANY_RESEARCH_PROMPT.format(company=store_key)
+
+        budget_msg = budget_error('perplexity')
+        if budget_msg:
+            logger.warning("Skipping Perplexity research: %s", budget_msg)
+            return f"Error during research: {budget_msg}"
+
         try:
             messages = [
                 {
@@ -54,24 +87,28 @@ class PerplexityTool(BaseTool):
                 }
             ]
             
-            response = self.client.chat.completions.create(
-                model="llama-3.1-sonar-large-128k-online",
-                messages=messages,
-            )
+            with metering.tool_call('perplexity', 'chat', model="llama-3.1-sonar-large-128k-online") as call:
+                response = self.client.chat.completions.create(
+                    model="llama-3.1-sonar-large-128k-online",
+                    messages=messages,
+                )
+                metering.add_response_usage(call, response)
             
             result = response.choices[0].message.content
             
             if not self._validate_response(result):
                 raise ValueError("Invalid or empty response from Perplexity API")
             
-            print(f"Perplexity Research Query: {query}")
-            print(f"Response length: {len(result)} characters")
+            logger.info("Perplexity Research Query: %s", query)
+            logger.debug("Response length: %s characters", len(result))
             
+            if store_key:
+                get_company_store().put(store_key, 'research', result, item_key=focus)
             return result
             
         except Exception as e:
             error_msg = f"Perplexity API error: {str(e)}"
-            print(error_msg)
+            logger.error(error_msg)
             return f"Error during research: {error_msg}"
 
     def _validate_response(self, response: str) -> bool:
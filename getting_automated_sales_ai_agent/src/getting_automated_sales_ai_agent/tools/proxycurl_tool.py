@@ -2,10 +2,16 @@
 
 from crewai.tools import BaseTool
 import os
+import logging
 import requests
 from typing import Dict, Any, Optional
 from pydantic import Field, BaseModel
 
+from ..utils import metering
+from ..utils.budget import budget_error
+
+logger = logging.getLogger(__name__)
+
 class ProxycurlParams(BaseModel):
     linkedin_profile_url: Optional[str] = None
     twitter_profile_url: Optional[str] = None
@@ -34,13 +40,14 @@ class ProxycurlTool(BaseTool):
     """
     llm: Any = Field(..., description="LLM to use for the tool")
     api_key: Optional[str] = Field(default=None, description="Proxycurl API key")
-    base_url: str = "https://nubela.co/proxycurl/api/v2/linkedin"
+    base_url: str = Field(default_factory=lambda: os.getenv('PROXYCURL_BASE_URL', "https://nubela.co/proxycurl")
+                          + "/api/v2/linkedin")
 
     def __init__(self, llm: Any = None, **kwargs):
         super().__init__(llm=llm, **kwargs)
         self.api_key = os.getenv('PROXYCURL_API_KEY')
         if not self.api_key:
-            print("WARNING: PROXYCURL_API_KEY not found in environment variables")
+            logger.warning("PROXYCURL_API_KEY not found in environment variables")
             raise ValueError("PROXYCURL_API_KEY is required but not found in environment variables")
 
     def _run(self, profile_url: str, platform: str = "linkedin", **kwargs) -> Dict:
@@ -54,9 +61,15 @@ class ProxycurlTool(BaseTool):
         """
         if not self.api_key:
             error_msg = "Proxycurl API key not found. Please set PROXYCURL_API_KEY environment variable."
-            print(f"ERROR: {error_msg}")
+            logger.error(error_msg)
             return {"error": error_msg}
         
+        # Stop spending credits on a lead or run that is over budget
+        budget_msg = budget_error('proxycurl')
+        if budget_msg:
+            logger.warning("Skipping Proxycurl lookup: %s", budget_msg)
+            return {"error": budget_msg}
+        
         # Set up the parameters
         params = ProxycurlParams(
             **{f"{platform}_profile_url": profile_url},
@@ -75,17 +88,22 @@ class ProxycurlTool(BaseTool):
         headers = {'Authorization': f'Bearer {self.api_key}'}
         
         try:
-            response = requests.get(
-                self.base_url,
-                headers=headers,
-                params=params
-            )
-            response.raise_for_status()
+            with metering.tool_call('proxycurl', f"{platform}_profile") as call:
+                response = requests.get(
+                    self.base_url,
+                    headers=headers,
+                    params=params
+                )
+                call['status_code'] = response.status_code
+                response.raise_for_status()
             
-            # Log the number of credits used (if available in headers)
-            credits_used = response.headers.get('x-credits-used', 'Unknown')
-            credits_remaining = response.headers.get('x-credits-remaining', 'Unknown')
-            print(f"Credits used: {credits_used}, Credits remaining: {credits_remaining}")
+                # Log the number of credits used (if available in headers)
+                credits_used = response.headers.get('x-credits-used', 'Unknown')
+                credits_remaining = response.headers.get('x-credits-remaining', 'Unknown')
+                call['credits_used'] = credits_used
+                call['credits_remaining'] = credits_remaining
+            logger.info("Credits used: %s, Credits remaining: %s", credits_used, credits_remaining,
+                        extra={'credits_used': credits_used, 'credits_remaining': credits_remaining})
             
             return response.json()
             
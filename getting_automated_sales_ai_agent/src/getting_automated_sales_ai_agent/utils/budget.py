@@ -0,0 +1,167 @@
+"""Per-run and per-lead spending ceilings for tokens, dollars and API credits."""
+
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+import yaml
+
+from . import metering
+from .pricing import parse_credits
+
+METRICS = ('tokens', 'usd', 'proxycurl_credits', 'perplexity_calls')
+
+# Metric that each provider's outbound calls are additionally limited by
+PROVIDER_METRICS = {
+    'proxycurl': 'proxycurl_credits',
+    'perplexity': 'perplexity_calls',
+}
+
+
+class BudgetExceeded(RuntimeError):
+    """Raised when a lead or the whole run has used up one of its ceilings."""
+
+    def __init__(self, scope: str, metric: str, used: float, limit: float, lead_id: Optional[str] = None):
+        self.scope = scope
+        self.metric = metric
+        self.used = used
+        self.limit = limit
+        self.lead_id = lead_id
+        target = f"lead {lead_id}" if scope == 'lead' else "run"
+        super().__init__(f"Budget exceeded for {target}: {metric} {used:g} of {limit:g}")
+
+
+def _new_usage() -> Dict[str, float]:
+    return dict.fromkeys(METRICS, 0)
+
+
+class BudgetController:
+    """Tracks spending from metering events and enforces configured ceilings.
+
+    Usage is counted per lead and for the whole run. Callers check
+    `exceeded()` before doing more work: tools skip outbound calls and return
+    an error (degrading the lead), and the crew skips or cancels the
+    remaining tasks of a lead that is out of tokens or dollars.
+    """
+
+    def __init__(self, per_run: Optional[Dict] = None, per_lead: Optional[Dict] = None):
+        config = self._load_config()
+        self.per_run = self._limits({**(config.get('per_run') or {}), **(per_run or {})})
+        self.per_lead = self._limits({**(config.get('per_lead') or {}), **(per_lead or {})})
+        self.run_usage = _new_usage()
+        self.lead_usage: Dict[str, Dict[str, float]] = {}
+        self.cancelled_leads: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        metering.subscribe(self.record)
+
+    def _load_config(self) -> Dict:
+        """Load budget configuration from YAML file"""
+        config_path = Path(__file__).parent.parent / "config" / "budget.yaml"
+        if not config_path.exists():
+            return {}
+        with open(config_path, 'r') as f:
+            return yaml.safe_load(f) or {}
+
+    @staticmethod
+    def _limits(values: Dict) -> Dict[str, float]:
+        return {metric: float(values[metric]) for metric in METRICS if values.get(metric) is not None}
+
+    def record(self, event: Dict):
+        """Metering listener: add an LLM or tool event to the run and lead usage."""
+        if event.get('kind') in ('task', 'cache'):
+            return
+        amounts = {'tokens': event.get('total_tokens') or 0, 'usd': event.get('cost') or 0}
+        provider = event.get('provider')
+        if provider == 'proxycurl' and not event.get('error'):
+            amounts['proxycurl_credits'] = parse_credits(event.get('credits_used'))
+        elif provider == 'perplexity':
+            amounts['perplexity_calls'] = 1
+        lead_id = event.get('lead_id')
+        with self._lock:
+            lead_usage = self.lead_usage.setdefault(lead_id, _new_usage()) if lead_id != 'unknown' else None
+            for metric, amount in amounts.items():
+                self.run_usage[metric] += amount
+                if lead_usage is not None:
+                    lead_usage[metric] += amount
+
+    def exceeded(self, lead_id: Optional[str] = None, provider: Optional[str] = None) -> Optional[BudgetExceeded]:
+        """Return the first ceiling the run or the lead has reached, or None.
+
+        Tokens and dollars are always checked. With `provider` set, that
+        provider's own metric (credits, calls) is checked as well, so running
+        out of Proxycurl credits only stops Proxycurl calls.
+        """
+        return self.run_exceeded(provider) or self.lead_exceeded(lead_id, provider)
+
+    def run_exceeded(self, provider: Optional[str] = None) -> Optional[BudgetExceeded]:
+        """Return the first per-run ceiling reached, or None."""
+        with self._lock:
+            for metric in self._metrics(provider):
+                limit = self.per_run.get(metric)
+                if limit is not None and self.run_usage[metric] >= limit:
+                    return BudgetExceeded('run', metric, self.run_usage[metric], limit)
+        return None
+
+    def lead_exceeded(self, lead_id: Optional[str], provider: Optional[str] = None) -> Optional[BudgetExceeded]:
+        """Return the first per-lead ceiling the lead has reached, or None."""
+        with self._lock:
+            lead_usage = self.lead_usage.get(lead_id) if lead_id else None
+            if lead_usage is None:
+                return None
+            for metric in self._metrics(provider):
+                limit = self.per_lead.get(metric)
+                if limit is not None and lead_usage[metric] >= limit:
+                    return BudgetExceeded('lead', metric, lead_usage[metric], limit, lead_id)
+        return None
+
+    @staticmethod
+    def _metrics(provider: Optional[str]):
+        if provider in PROVIDER_METRICS:
+            return 'tokens', 'usd', PROVIDER_METRICS[provider]
+        return 'tokens', 'usd'
+
+    def check(self, lead_id: Optional[str] = None, provider: Optional[str] = None):
+        """Raise BudgetExceeded if the run or the lead is over budget."""
+        exceeded = self.exceeded(lead_id, provider)
+        if exceeded is not None:
+            raise exceeded
+
+    def cancel_lead(self, lead_id: str, reason: str):
+        """Record that the remaining work for a lead was dropped."""
+        with self._lock:
+            self.cancelled_leads.setdefault(lead_id, reason)
+
+    def get_summary(self) -> Dict:
+        """Return the ceilings, usage so far and cancelled leads."""
+        with self._lock:
+            return {
+                'per_run_limits': dict(self.per_run),
+                'per_lead_limits': dict(self.per_lead),
+                'run_usage': dict(self.run_usage),
+                'lead_usage': {lead_id: dict(usage) for lead_id, usage in self.lead_usage.items()},
+                'cancelled_leads': dict(self.cancelled_leads)
+            }
+
+    def close(self):
+        """Stop receiving usage events."""
+        metering.unsubscribe(self.record)
+
+
+def budget_error(provider: str) -> Optional[str]:
+    """Return why a call to `provider` for the current lead must be skipped, or None."""
+    exceeded = get_budget_controller().exceeded(metering.current_attribution().get('lead_id'), provider)
+    return str(exceeded) if exceeded is not None else None
+
+
+_default_controller: Optional[BudgetController] = None
+_default_controller_lock = threading.Lock()
+
+
+def get_budget_controller() -> BudgetController:
+    """Return the process-wide budget controller, creating it on first use."""
+    global _default_controller
+    if _default_controller is None:
+        with _default_controller_lock:
+            if _default_controller is None:
+                _default_controller = BudgetController()
+    return _default_controller
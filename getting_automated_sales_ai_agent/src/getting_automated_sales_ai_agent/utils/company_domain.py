@@ -0,0 +1,71 @@
+"""Helpers for identifying the company a lead belongs to."""
+
+import re
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import tldextract
+
+from .leads import Lead
+
+# Prefix of the placeholder key given to leads with no usable company identifier
+UNGROUPED_KEY_PREFIX = 'lead:'
+
+_LINKEDIN_COMPANY_RE = re.compile(r'linkedin\.com/(?:company|school|showcase)/([^/?#]+)', re.IGNORECASE)
+
+
+def normalize_domain(url: str) -> Optional[str]:
+    """Reduce a website URL or bare domain to its registered domain (e.g. "acme.com")."""
+    if not url or not isinstance(url, str):
+        return None
+    url = url.strip()
+    if not url:
+        return None
+    if '://' not in url:
+        url = f"http://{url}"
+    host = urlparse(url).netloc.split('@')[-1].split(':')[0]
+    info = tldextract.extract(host)
+    if not info.domain or not info.suffix:
+        return None
+    return f"{info.domain}.{info.suffix}".lower()
+
+
+def normalize_linkedin_company(url: str) -> Optional[str]:
+    """Reduce a LinkedIn company URL to a stable key (e.g. "linkedin.com/company/acme")."""
+    if not url or not isinstance(url, str):
+        return None
+    match = _LINKEDIN_COMPANY_RE.search(url)
+    if not match:
+        return None
+    return f"linkedin.com/company/{match.group(1).lower()}"
+
+
+def normalize_company_key(value: str) -> Optional[str]:
+    """Normalize a LinkedIn company URL, website URL or domain to a company key."""
+    return normalize_linkedin_company(value) or normalize_domain(value)
+
+
+def company_key(lead: Lead) -> Optional[str]:
+    """Return the normalized company key for a lead.
+
+    The company website domain is preferred; the LinkedIn company page is used
+    when no usable website is present. Returns None if neither is available.
+    """
+    return normalize_domain(lead.company_website) or normalize_linkedin_company(lead.company_linkedin_url)
+
+
+def group_leads_by_company(leads: List[Lead]) -> Dict[str, List[Lead]]:
+    """Group leads by normalized company key, preserving input order.
+
+    Leads without a usable company key are kept in their own single-lead group.
+    """
+    groups: Dict[str, List[Lead]] = {}
+    for index, lead in enumerate(leads):
+        key = company_key(lead) or f"{UNGROUPED_KEY_PREFIX}{index}"
+        groups.setdefault(key, []).append(lead)
+    return groups
+
+
+def is_company_key(key: Optional[str]) -> bool:
+    """Return True if a group key identifies a real company rather than a single ungrouped lead."""
+    return bool(key) and not key.startswith(UNGROUPED_KEY_PREFIX)
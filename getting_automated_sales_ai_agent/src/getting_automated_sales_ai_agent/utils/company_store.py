@@ -0,0 +1,143 @@
+"""Persistent company knowledge store keyed by normalized company domain."""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import yaml
+
+from . import metering
+
+SECONDS_PER_DAY = 86400
+
+
+class CompanyStore:
+    """Local SQLite store holding one record per company domain.
+
+    Each record is made of sections ("crawl", "research", "evaluation"), and a
+    section can hold several items (e.g. one per research query). Every item
+    carries its own timestamp, and reads ignore items older than the section's
+    freshness policy.
+    """
+
+    def __init__(self, path: Optional[str] = None, freshness_days: Optional[Dict[str, float]] = None):
+        config = self._load_config()
+        package_dir = Path(__file__).parent.parent
+        path = path or os.getenv('COMPANY_STORE_PATH')
+        self.path = Path(path) if path else package_dir / config.get('path', 'data/company_store.sqlite3')
+        self.freshness_days = {**config.get('freshness_days', {}), **(freshness_days or {})}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._init_schema()
+
+    def _load_config(self) -> Dict:
+        """Load store configuration from YAML file"""
+        config_path = Path(__file__).parent.parent / "config" / "company_store.yaml"
+        if not config_path.exists():
+            return {}
+        with open(config_path, 'r') as f:
+            return yaml.safe_load(f) or {}
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, creating it on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        conn = self._connection()
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS company_data (
+                    domain TEXT NOT NULL,
+                    section TEXT NOT NULL,
+                    item_key TEXT NOT NULL DEFAULT '',
+                    data TEXT NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (domain, section, item_key)
+                )
+            """)
+
+    def _is_fresh(self, section: str, updated_at: float, max_age_days: Optional[float]) -> bool:
+        if max_age_days is None:
+            max_age_days = self.freshness_days.get(section)
+        if max_age_days is None:
+            return True
+        return time.time() - updated_at <= max_age_days * SECONDS_PER_DAY
+
+    def get(self, domain: str, section: str, item_key: str = '', max_age_days: Optional[float] = None) -> Optional[Any]:
+        """Return stored data for a domain section, or None if missing or stale."""
+        entry = self.get_with_timestamp(domain, section, item_key, max_age_days)
+        return entry['data'] if entry else None
+
+    def get_with_timestamp(self, domain: str, section: str, item_key: str = '',
+                           max_age_days: Optional[float] = None) -> Optional[Dict]:
+        """Like get(), but return {"data": ..., "updated_at": ISO timestamp}."""
+        if not domain:
+            return None
+        with metering.tool_call('company_store', 'get', kind='cache', section=section) as call:
+            row = self._connection().execute(
+                "SELECT data, updated_at FROM company_data WHERE domain = ? AND section = ? AND item_key = ?",
+                (domain.lower(), section, item_key)
+            ).fetchone()
+            call['cache_hit'] = bool(row) and self._is_fresh(section, row[1], max_age_days)
+        if not call['cache_hit']:
+            return None
+        return {'data': json.loads(row[0]), 'updated_at': datetime.fromtimestamp(row[1]).isoformat()}
+
+    def put(self, domain: str, section: str, data: Any, item_key: str = ''):
+        """Insert or replace data for a domain section."""
+        if not domain:
+            return
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO company_data (domain, section, item_key, data, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (domain.lower(), section, item_key, json.dumps(data), time.time())
+            )
+
+    def get_record(self, domain: str) -> Dict:
+        """Return everything stored for a domain, including stale items, with timestamps."""
+        record = {'domain': domain.lower(), 'sections': {}}
+        rows = self._connection().execute(
+            "SELECT section, item_key, data, updated_at FROM company_data WHERE domain = ?",
+            (domain.lower(),)
+        ).fetchall()
+        for section, item_key, data, updated_at in rows:
+            record['sections'].setdefault(section, {})[item_key] = {
+                'data': json.loads(data),
+                'updated_at': datetime.fromtimestamp(updated_at).isoformat(),
+                'fresh': self._is_fresh(section, updated_at, None)
+            }
+        return record
+
+    def close(self):
+        """Close this thread's connection."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+_default_store: Optional[CompanyStore] = None
+_default_store_lock = threading.Lock()
+
+
+def get_company_store() -> CompanyStore:
+    """Return the process-wide company store, creating it on first use."""
+    global _default_store
+    if _default_store is None:
+        with _default_store_lock:
+            if _default_store is None:
+                _default_store = CompanyStore()
+    return _default_store
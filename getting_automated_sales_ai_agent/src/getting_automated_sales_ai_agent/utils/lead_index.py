@@ -0,0 +1,151 @@
+"""Deduplicating leads across the CSV files of one run.
+
+Overlapping exports list the same contact several times. `LeadIndex` keys
+each lead by normalized email, LinkedIn profile and Apollo Contact Id; a lead
+matching any key already indexed is merged into the first occurrence, so each
+person goes through the pipeline once.
+
+Every file has to be indexed before the first lead can be processed, so the
+unique leads wait in a temporary SQLite database rather than in memory and
+are read back a batch at a time.
+"""
+
+import operator
+import pickle
+import sqlite3
+from typing import Dict, Iterable, Iterator, List, Set
+
+# The normalizers live with Lead, which builds its lead_id from them
+from .leads import CompanyDetails, Lead, Phone, SocialMedia, normalize_email, normalize_linkedin_profile
+
+# Keys per IN (...) lookup, well under SQLite's bound parameter limit
+_LOOKUP_CHUNK = 500
+
+_NESTED_FIELDS = ('social_media', 'phone', 'company_details')
+_LEAD_FIELDS = tuple(name for name in Lead.__slots__ if name not in _NESTED_FIELDS and not name.startswith('_'))
+_lead_values = operator.attrgetter(*_LEAD_FIELDS)
+_social_media_values = operator.attrgetter(*SocialMedia.__slots__)
+_phone_values = operator.attrgetter(*Phone.__slots__)
+_company_details_values = operator.attrgetter(*CompanyDetails.__slots__)
+
+
+def lead_keys(lead: Lead) -> List[str]:
+    """Every identity key of a lead, prefixed by kind so kinds never collide."""
+    keys = []
+    email = normalize_email(lead.email)
+    if email:
+        keys.append(f"email:{email}")
+    profile = normalize_linkedin_profile(lead.linkedin_url)
+    if profile:
+        keys.append(f"linkedin:{profile}")
+    contact_id = str(lead.contact_id).strip()
+    if contact_id:
+        keys.append(f"apollo:{contact_id}")
+    return keys
+
+
+class LeadIndex:
+    """Unique leads in first-seen order, indexed by identity key.
+
+    Leads with no identity key at all cannot be matched and are always kept.
+    """
+
+    def __init__(self):
+        # An empty path opens a private on-disk database, deleted on close;
+        # only SQLite's page cache stays in memory
+        self._conn = sqlite3.connect('')
+        # Nothing to recover if the process dies, so skip the rollback journal and fsyncs
+        self._conn.execute("PRAGMA journal_mode=OFF")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute("CREATE TABLE leads (id INTEGER PRIMARY KEY, lead BLOB NOT NULL)")
+        self._conn.execute("CREATE TABLE lead_keys (key TEXT PRIMARY KEY, lead_row INTEGER NOT NULL)")
+        self._count = 0
+        self.duplicates = 0
+
+    def add(self, lead: Lead) -> bool:
+        """Index a lead; return False if it duplicated (and was merged into) an earlier one."""
+        return self.add_all([lead]) == 1
+
+    def add_all(self, leads: Iterable[Lead]) -> int:
+        """Index several leads; return how many were new.
+
+        The batch's keys are looked up in one pass and its rows written in
+        one transaction; duplicates within the batch are merged in memory.
+        """
+        keyed = [(lead, lead_keys(lead)) for lead in leads]
+        indexed = self._lookup({key for _, keys in keyed for key in keys})
+        new_leads: Dict[int, Lead] = {}
+        merged_leads: Dict[int, Lead] = {}
+        new_keys = []
+        for lead, keys in keyed:
+            row_id = next((indexed[key] for key in keys if key in indexed), None)
+            if row_id is None:
+                self._count += 1
+                row_id = self._count
+                new_leads[row_id] = lead
+            else:
+                existing = new_leads.get(row_id) or merged_leads.get(row_id)
+                if existing is None:
+                    existing = merged_leads[row_id] = self._load(row_id)
+                existing.merge(lead)
+                self.duplicates += 1
+            # A duplicate may carry identifiers the first occurrence lacked
+            for key in keys:
+                if key not in indexed:
+                    indexed[key] = row_id
+                    new_keys.append((key, row_id))
+        with self._conn:
+            self._conn.executemany("INSERT INTO leads (id, lead) VALUES (?, ?)",
+                                   [(row_id, _pack(lead)) for row_id, lead in new_leads.items()])
+            self._conn.executemany("UPDATE leads SET lead = ? WHERE id = ?",
+                                   [(_pack(lead), row_id) for row_id, lead in merged_leads.items()])
+            self._conn.executemany("INSERT INTO lead_keys (key, lead_row) VALUES (?, ?)", new_keys)
+        return len(new_leads)
+
+    def _lookup(self, keys: Set[str]) -> Dict[str, int]:
+        """The lead row of each of `keys` already indexed."""
+        keys = list(keys)
+        found = {}
+        for start in range(0, len(keys), _LOOKUP_CHUNK):
+            chunk = keys[start:start + _LOOKUP_CHUNK]
+            found.update(self._conn.execute(
+                f"SELECT key, lead_row FROM lead_keys WHERE key IN ({', '.join('?' * len(chunk))})", chunk
+            ))
+        return found
+
+    def _load(self, row_id: int) -> Lead:
+        (payload,) = self._conn.execute("SELECT lead FROM leads WHERE id = ?", (row_id,)).fetchone()
+        return _unpack(payload)
+
+    def batches(self, batch_size: int) -> Iterator[List[Lead]]:
+        """The unique leads in first-seen order, `batch_size` at a time."""
+        cursor = self._conn.execute("SELECT lead FROM leads ORDER BY id")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield [_unpack(payload) for (payload,) in rows]
+
+    def __iter__(self) -> Iterator[Lead]:
+        for batch in self.batches(500):
+            yield from batch
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self):
+        """Drop the index and its temporary database."""
+        self._conn.close()
+
+
+def _pack(lead: Lead) -> bytes:
+    # Field values as tuples rather than to_dict() JSON: several times faster
+    # both ways, and only ever read back by this process
+    return pickle.dumps((_lead_values(lead), _social_media_values(lead.social_media), _phone_values(lead.phone),
+                         _company_details_values(lead.company_details)), pickle.HIGHEST_PROTOCOL)
+
+
+def _unpack(payload: bytes) -> Lead:
+    values, social_media, phone, company_details = pickle.loads(payload)
+    return Lead(**dict(zip(_LEAD_FIELDS, values)), social_media=SocialMedia(*social_media), phone=Phone(*phone),
+                company_details=CompanyDetails(*company_details))
@@ -0,0 +1,186 @@
+"""Durable SQLite work queue of leads, shared by the worker processes of one host."""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .leads import Lead
+
+# A leased lead becomes visible to other workers again after this long
+# without being acknowledged or having its lease extended
+VISIBILITY_TIMEOUT_SECONDS = 1800
+MAX_ATTEMPTS = 3
+# Failed leads wait this long, times the attempt number, before a retry
+RETRY_DELAY_SECONDS = 60
+
+
+class LeadQueue:
+    """Leads waiting to be processed, leased in enqueue order.
+
+    A lead is `queued` until a worker leases it, `leased` while a worker runs
+    it, then `done`, or `failed` after MAX_ATTEMPTS attempts. A lease that is
+    neither acknowledged nor extended before its visibility timeout runs out
+    (the worker crashed or hung) makes the lead leasable again. Each lead id
+    is enqueued once, so overlapping producers do not duplicate work.
+
+    Every process opens its own connection to the same file in WAL mode,
+    which needs all of them on one host: SQLite locking is not reliable on
+    network filesystems. Spreading workers over several hosts needs a real
+    broker (e.g. Redis or SQS) in place of this queue.
+    """
+
+    def __init__(self, path: Optional[str] = None, visibility_timeout: float = VISIBILITY_TIMEOUT_SECONDS,
+                 max_attempts: int = MAX_ATTEMPTS, retry_delay: float = RETRY_DELAY_SECONDS):
+        package_dir = Path(__file__).parent.parent
+        path = path or os.getenv('LEAD_QUEUE_PATH')
+        self.path = Path(path) if path else package_dir / 'data' / 'lead_queue.sqlite3'
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._init_schema()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, creating it on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Transactions are opened explicitly, so leases can take the write lock up front
+            conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """A write transaction that holds the database lock from its first statement."""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _update(self, sql: str, params: Iterable[Tuple]):
+        with self._transaction() as conn:
+            conn.executemany(sql, params)
+
+    def _init_schema(self):
+        with self._transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS lead_queue (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    lead_id TEXT NOT NULL UNIQUE,
+                    lead TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    available_at REAL NOT NULL,
+                    worker TEXT,
+                    last_error TEXT,
+                    enqueued_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS lead_queue_ready ON lead_queue (status, available_at)")
+
+    def enqueue(self, leads: Iterable[Lead]) -> int:
+        """Add leads not already in the queue; return how many were added."""
+        now = time.time()
+        payloads = [(lead, json.dumps(lead.to_dict())) for lead in leads]
+        rows = [(_queue_key(lead, payload), payload, now, now, now) for lead, payload in payloads]
+        if not rows:
+            return 0
+        with self._transaction() as conn:
+            cursor = conn.executemany(
+                "INSERT OR IGNORE INTO lead_queue (lead_id, lead, available_at, enqueued_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+        return cursor.rowcount
+
+    def lease(self, worker: str, count: int) -> List[Tuple[int, Lead]]:
+        """Lease up to `count` leads that are queued or whose lease expired, oldest first."""
+        now = time.time()
+        with self._transaction() as conn:
+            # Expired leases that used their last attempt will not be retried
+            conn.execute(
+                "UPDATE lead_queue SET status = 'failed', last_error = 'lease expired', updated_at = ? "
+                "WHERE status = 'leased' AND available_at <= ? AND attempts >= ?",
+                (now, now, self.max_attempts)
+            )
+            rows = conn.execute(
+                "SELECT id, lead FROM lead_queue WHERE status IN ('queued', 'leased') AND available_at <= ? "
+                "ORDER BY id LIMIT ?",
+                (now, count)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE lead_queue SET status = 'leased', attempts = attempts + 1, available_at = ?, "
+                "worker = ?, updated_at = ? WHERE id = ?",
+                [(now + self.visibility_timeout, worker, now, row[0]) for row in rows]
+            )
+        return [(row_id, Lead.from_dict(json.loads(lead))) for row_id, lead in rows]
+
+    def extend(self, ids: List[int], worker: str):
+        """Push back the visibility timeout of leads this worker still holds."""
+        now = time.time()
+        self._update(
+            "UPDATE lead_queue SET available_at = ?, updated_at = ? WHERE id = ? AND status = 'leased' AND worker = ?",
+            [(now + self.visibility_timeout, now, row_id, worker) for row_id in ids]
+        )
+
+    def ack(self, ids: List[int], worker: str):
+        """Mark leased leads as done."""
+        now = time.time()
+        self._update(
+            "UPDATE lead_queue SET status = 'done', updated_at = ? WHERE id = ? AND status = 'leased' AND worker = ?",
+            [(now, row_id, worker) for row_id in ids]
+        )
+
+    def fail(self, ids: List[int], worker: str, error: str):
+        """Queue leased leads for a retry after a delay, or mark them failed after their last attempt."""
+        now = time.time()
+        self._update(
+            "UPDATE lead_queue SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, "
+            "available_at = ? + attempts * ?, last_error = ?, updated_at = ? "
+            "WHERE id = ? AND status = 'leased' AND worker = ?",
+            [(self.max_attempts, now, self.retry_delay, error, now, row_id, worker) for row_id in ids]
+        )
+
+    def release(self, ids: List[int], worker: str):
+        """Return leased leads to the queue without using up an attempt."""
+        now = time.time()
+        self._update(
+            "UPDATE lead_queue SET status = 'queued', attempts = attempts - 1, available_at = ?, updated_at = ? "
+            "WHERE id = ? AND status = 'leased' AND worker = ?",
+            [(now, now, row_id, worker) for row_id in ids]
+        )
+
+    def counts(self) -> Dict[str, int]:
+        """Number of leads in each status."""
+        rows = self._connection().execute("SELECT status, COUNT(*) FROM lead_queue GROUP BY status").fetchall()
+        return {'queued': 0, 'leased': 0, 'done': 0, 'failed': 0, **dict(rows)}
+
+    def close(self):
+        """Close this thread's connection."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def _queue_key(lead: Lead, payload: str) -> str:
+    # A lead with no email, LinkedIn profile or Apollo Contact Id only has a
+    # per-process lead_id; key it by its content so re-enqueueing the same
+    # file does not add it twice and distinct leads are never merged
+    if lead.identified:
+        return lead.lead_id
+    return f"LEAD_row_{hashlib.sha1(payload.encode('utf-8')).hexdigest()}"
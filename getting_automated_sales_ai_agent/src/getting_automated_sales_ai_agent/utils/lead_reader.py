@@ -0,0 +1,202 @@
+"""Reading lead files into Lead records.
+
+Two formats are supported: Apollo exports (`transform_lead_data`,
+`iter_lead_batches`) and the simple Name/Email/Company CSV
+(`read_simple_leads`). `iter_lead_batches` streams an export in fixed-size
+chunks and parses only the columns the pipeline uses, so memory depends on
+the batch size rather than on the size of the file. Apollo-shaped exports
+may also be Parquet or Arrow IPC files, which are memory-mapped and read
+with the same column projection; pyarrow is imported only for those.
+"""
+
+import csv
+from pathlib import Path
+from typing import Iterator, List
+
+import pandas as pd
+
+from .leads import CompanyDetails, Lead, Phone, SocialMedia
+
+# Lead field -> Apollo export column, in Lead field order after 'name'; a
+# tuple of columns is joined with ', '
+LEAD_COLUMNS = {
+    'company': 'Company',
+    'linkedin_url': 'Person Linkedin Url',
+    'role': 'Title',
+    'industry': 'Industry',
+    'company_website': 'Website',
+    'email': 'Email',
+    'company_linkedin_url': 'Company Linkedin Url',
+    'technologies': 'Technologies',
+    'employees': '# Employees',
+    'revenue': 'Annual Revenue',
+    'location': ('City', 'State', 'Country'),
+    'company_location': ('Company City', 'Company State', 'Company Country'),
+    'keywords': 'Keywords',
+    'seo_description': 'SEO Description',
+    'departments': 'Departments',
+    'seniority': 'Seniority',
+    'contact_id': 'Apollo Contact Id',
+}
+# Nested record -> its fields' export columns, in field order
+NESTED_LEAD_COLUMNS = {
+    'social_media': {
+        'facebook': 'Facebook Url',
+        'twitter': 'Twitter Url'
+    },
+    'phone': {
+        'work': 'Work Direct Phone',
+        'mobile': 'Mobile Phone',
+        'corporate': 'Corporate Phone'
+    },
+    'company_details': {
+        'address': 'Company Address',
+        'phone': 'Company Phone',
+        'total_funding': 'Total Funding',
+        'latest_funding': 'Latest Funding',
+        'latest_funding_amount': 'Latest Funding Amount'
+    }
+}
+NESTED_LEAD_TYPES = {
+    'social_media': SocialMedia,
+    'phone': Phone,
+    'company_details': CompanyDetails,
+}
+
+# Suffixes of the Apollo-shaped files iter_lead_batches reads
+CSV_SUFFIXES = ('.csv',)
+PARQUET_SUFFIXES = ('.parquet', '.pq')
+ARROW_SUFFIXES = ('.arrow', '.feather', '.ipc')
+LEAD_FILE_SUFFIXES = CSV_SUFFIXES + PARQUET_SUFFIXES + ARROW_SUFFIXES
+
+# Lead field -> column of the simple lead CSV
+SIMPLE_LEAD_COLUMNS = {
+    'name': 'Name',
+    'email': 'Email',
+    'company': 'Company',
+    'role': 'Title',
+    'linkedin_url': 'LinkedIn URL',
+    'company_website': 'Company Website',
+}
+
+
+def transform_lead_data(df: pd.DataFrame) -> List[Lead]:
+    """Transform an Apollo export DataFrame into Lead records.
+
+    Works column by column: missing values (and missing columns) become '',
+    name and locations are joined as whole columns, and each column is
+    converted to Python values once before rows are zipped up.
+    """
+    columns = [_filled(df, 'First Name').astype(str) + ' ' + _filled(df, 'Last Name').astype(str)]
+    for column in LEAD_COLUMNS.values():
+        if isinstance(column, tuple):
+            parts = [_filled(df, part).astype(str) for part in column]
+            columns.append(parts[0].str.cat(parts[1:], sep=', '))
+        else:
+            columns.append(_filled(df, column))
+    values = [series.tolist() for series in columns]
+
+    for key, nested_columns in NESTED_LEAD_COLUMNS.items():
+        values.append(_records(NESTED_LEAD_TYPES[key], [_filled(df, column) for column in nested_columns.values()]))
+    return [Lead(*row) for row in zip(*values)]
+
+
+def read_simple_leads(path) -> List[Lead]:
+    """Read a simple lead CSV (see SIMPLE_LEAD_COLUMNS) into Lead records."""
+    with open(path, 'r', newline='') as file:
+        return [Lead(**{field: row.get(column) or '' for field, column in SIMPLE_LEAD_COLUMNS.items()})
+                for row in csv.DictReader(file)]
+
+
+def _filled(df: pd.DataFrame, column: str) -> pd.Series:
+    """One export column with missing values, or the whole column if absent, as ''."""
+    if column not in df.columns:
+        return pd.Series('', index=df.index, dtype=object)
+    values = df[column]
+    missing = values.isna()
+    if not missing.any():
+        return values
+    return values.astype(object).where(~missing, '')
+
+
+def _records(record_type: type, columns: List[pd.Series]) -> List:
+    """Zip columns, in field order, into one `record_type` per row."""
+    return [record_type(*row) for row in zip(*(column.tolist() for column in columns))]
+
+
+def apollo_columns() -> List[str]:
+    """Every export column transform_lead_data reads."""
+    columns = ['First Name', 'Last Name']
+    for column in LEAD_COLUMNS.values():
+        columns.extend(column if isinstance(column, tuple) else [column])
+    for nested in NESTED_LEAD_COLUMNS.values():
+        columns.extend(nested.values())
+    return columns
+
+
+def lead_files(directory) -> List[Path]:
+    """The lead files in a directory that iter_lead_batches can read, by name."""
+    return sorted(path for path in Path(directory).iterdir()
+                  if path.is_file() and path.suffix.lower() in LEAD_FILE_SUFFIXES)
+
+
+def iter_lead_batches(path, batch_size: int = 50, chunk_rows: int = 5000) -> Iterator[List[Lead]]:
+    """Yield lists of up to `batch_size` leads, reading the file `chunk_rows` rows at a time.
+
+    Parsing and transforming carry a fixed cost per chunk, so chunks are
+    larger than batches; memory is bounded by the chunk, not the file. The
+    format is chosen by suffix (see LEAD_FILE_SUFFIXES).
+    """
+    chunk_rows = max(chunk_rows, batch_size)
+    suffix = Path(path).suffix.lower()
+    if suffix in PARQUET_SUFFIXES:
+        chunks = _parquet_chunks(path, chunk_rows)
+    elif suffix in ARROW_SUFFIXES:
+        chunks = _arrow_chunks(path, chunk_rows)
+    else:
+        chunks = _csv_chunks(path, chunk_rows)
+    for chunk in chunks:
+        leads = transform_lead_data(chunk)
+        for start in range(0, len(leads), batch_size):
+            yield leads[start:start + batch_size]
+
+
+def _csv_chunks(path, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    wanted = set(apollo_columns())
+    with pd.read_csv(path, usecols=lambda column: column in wanted, chunksize=chunk_rows) as reader:
+        yield from reader
+
+
+def _parquet_chunks(path, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    import pyarrow.parquet as pq
+
+    with pq.ParquetFile(path, memory_map=True) as parquet_file:
+        columns = _projection(parquet_file.schema_arrow.names)
+        for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pandas()
+
+
+def _arrow_chunks(path, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    """Chunks of an Arrow IPC file; record batches are sliced without copying the mapped file."""
+    import pyarrow as pa
+
+    with pa.memory_map(str(path)) as source:
+        try:
+            reader = pa.ipc.open_file(source)
+            batches = (reader.get_batch(index) for index in range(reader.num_record_batches))
+        except pa.ArrowInvalid:
+            # Not the file format; Arrow IPC streams have no footer
+            source.seek(0)
+            reader = pa.ipc.open_stream(source)
+            batches = iter(reader)
+        columns = _projection(reader.schema.names)
+        for batch in batches:
+            batch = batch.select(columns)
+            for offset in range(0, batch.num_rows, chunk_rows):
+                yield batch.slice(offset, chunk_rows).to_pandas()
+
+
+def _projection(names: List[str]) -> List[str]:
+    """The columns transform_lead_data reads, of those a file has."""
+    wanted = set(apollo_columns())
+    return [name for name in names if name in wanted]
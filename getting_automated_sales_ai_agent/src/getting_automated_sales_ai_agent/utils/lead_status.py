@@ -0,0 +1,103 @@
+"""Pipeline progress from one bulk read of the Airtable Leads table."""
+
+import json
+import os
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from . import metering
+
+STATUS_FIELDS = ('Individual Evaluation Status', 'Company Evaluation Status')
+# Only the fields the report needs; the analysis and raw data fields are large
+REPORT_FIELDS = [*STATUS_FIELDS, 'Lead Tier', 'Last Evaluated']
+# Airtable's largest page
+PAGE_SIZE = 100
+# An unfinished lead not evaluated (or, if never evaluated, created) for this long is stale
+STALE_LEAD_DAYS = 7
+
+
+@dataclass
+class LeadStatusReport:
+    """Lead counts at one point in time."""
+    generated_at: float
+    total: int = 0
+    completed: int = 0
+    stale: int = 0
+    by_status: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    by_tier: Dict[str, int] = field(default_factory=dict)
+
+
+def fetch_lead_records(table_name: str = 'Leads') -> List[Dict]:
+    """Read every lead with only REPORT_FIELDS, a page of PAGE_SIZE records per request."""
+    # pyairtable is imported here so the rest of the CLI does not pay for it
+    from pyairtable import Table
+
+    table = Table(os.environ.get('AI_AGENT_AIRTABLE_API_KEY'), os.environ.get('AIRTABLE_BASE_ID'), table_name,
+                  endpoint_url=os.environ.get('AIRTABLE_ENDPOINT_URL', 'https://api.airtable.com'))
+    with metering.tool_call('airtable', 'list', table=table_name) as event:
+        records = table.all(fields=REPORT_FIELDS, page_size=PAGE_SIZE)
+        event['records'] = len(records)
+    return records
+
+
+def summarize_leads(records: Iterable[Dict], stale_days: float = STALE_LEAD_DAYS,
+                    now: Optional[float] = None) -> LeadStatusReport:
+    """Count leads by evaluation status and tier, and those that look stuck."""
+    now = time.time() if now is None else now
+    stale_before = datetime.fromtimestamp(now, timezone.utc) - timedelta(days=stale_days)
+    by_status = {name: Counter() for name in STATUS_FIELDS}
+    by_tier = Counter()
+    report = LeadStatusReport(generated_at=now)
+    for record in records:
+        fields = record.get('fields', {})
+        report.total += 1
+        statuses = [fields.get(name) or 'Not Started' for name in STATUS_FIELDS]
+        for name, status in zip(STATUS_FIELDS, statuses):
+            by_status[name][status] += 1
+        by_tier[fields.get('Lead Tier') or 'Unscored'] += 1
+        if all(status == 'Completed' for status in statuses):
+            report.completed += 1
+        else:
+            last_activity = _parse_time(fields.get('Last Evaluated')) or _parse_time(record.get('createdTime'))
+            if last_activity and last_activity < stale_before:
+                report.stale += 1
+    report.by_status = {name: dict(counts.most_common()) for name, counts in by_status.items()}
+    report.by_tier = dict(by_tier.most_common())
+    return report
+
+
+def _parse_time(value) -> Optional[datetime]:
+    # Last Evaluated is a date (YYYY-MM-DD), createdTime an ISO timestamp ending in Z
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+class StatusSnapshots:
+    """The last status report, kept so the next one can report throughput."""
+
+    def __init__(self, path: Optional[str] = None):
+        package_dir = Path(__file__).parent.parent
+        path = path or os.getenv('LEAD_STATUS_PATH')
+        self.path = Path(path) if path else package_dir / 'data' / 'lead_status.json'
+
+    def load(self) -> Optional[LeadStatusReport]:
+        """The previous report, or None on the first run."""
+        try:
+            return LeadStatusReport(**json.loads(self.path.read_text()))
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def save(self, report: LeadStatusReport):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(asdict(report)))
+        tmp_path.replace(self.path)
@@ -0,0 +1,187 @@
+"""The lead record passed from CSV parsing through the crew's tasks.
+
+Leads used to be nested dicts with one key per field. These slotted
+dataclasses hold the same fields without a per-instance dict, so a batch of
+leads takes a fraction of the memory, and `to_dict` gives the old nested
+dict shape back for prompts and Airtable's Raw Data field.
+"""
+
+import itertools
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+_LINKEDIN_PROFILE_RE = re.compile(r'linkedin\.com/(?:in|pub)/([^/?#]+)', re.IGNORECASE)
+
+# Numbers the leads of this process that have no identifier of their own
+_row_ids = itertools.count(1)
+
+
+def normalize_email(email: str) -> Optional[str]:
+    """Lowercase and strip an email address; None if it is not one."""
+    if not email or not isinstance(email, str):
+        return None
+    email = email.strip().lower()
+    return email if '@' in email else None
+
+
+def normalize_linkedin_profile(url: str) -> Optional[str]:
+    """Reduce a LinkedIn profile URL to a stable key (e.g. "linkedin.com/in/jane-doe")."""
+    if not url or not isinstance(url, str):
+        return None
+    match = _LINKEDIN_PROFILE_RE.search(url)
+    if not match:
+        return None
+    return f"linkedin.com/in/{match.group(1).lower()}"
+
+
+@dataclass(slots=True)
+class SocialMedia:
+    facebook: str = ''
+    twitter: str = ''
+
+    def to_dict(self) -> Dict[str, Any]:
+        return _as_dict(self)
+
+    def merge(self, other) -> None:
+        _fill_missing(self, other)
+
+
+@dataclass(slots=True)
+class Phone:
+    work: Any = ''
+    mobile: Any = ''
+    corporate: Any = ''
+
+    def to_dict(self) -> Dict[str, Any]:
+        return _as_dict(self)
+
+    def merge(self, other) -> None:
+        _fill_missing(self, other)
+
+
+@dataclass(slots=True)
+class CompanyDetails:
+    address: str = ''
+    phone: Any = ''
+    total_funding: Any = ''
+    latest_funding: str = ''
+    latest_funding_amount: Any = ''
+
+    def to_dict(self) -> Dict[str, Any]:
+        return _as_dict(self)
+
+    def merge(self, other) -> None:
+        _fill_missing(self, other)
+
+
+@dataclass(slots=True)
+class Lead:
+    """One contact, as read from an Apollo export or a simple lead CSV.
+
+    Fields missing from the source are ''. Numeric export columns (employees,
+    revenue, phone numbers, funding) keep the type pandas parsed them as.
+    """
+    name: str = ''
+    company: str = ''
+    linkedin_url: str = ''
+    role: str = ''
+    industry: str = ''
+    company_website: str = ''
+    email: str = ''
+    company_linkedin_url: str = ''
+    technologies: str = ''
+    employees: Any = ''
+    revenue: Any = ''
+    location: str = ''
+    company_location: str = ''
+    keywords: str = ''
+    seo_description: str = ''
+    departments: str = ''
+    seniority: str = ''
+    contact_id: str = ''
+    social_media: SocialMedia = field(default_factory=SocialMedia)
+    phone: Phone = field(default_factory=Phone)
+    company_details: CompanyDetails = field(default_factory=CompanyDetails)
+    # Assigned on first use of lead_id for a lead with no identifier; not part of the record
+    _row_id: str = field(default='', init=False, repr=False, compare=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The lead as a JSON-serializable dict, nested records included."""
+        data = _as_dict(self)
+        for key in ('social_media', 'phone', 'company_details'):
+            data[key] = data[key].to_dict()
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Lead':
+        """Rebuild a lead from to_dict() output, e.g. after a JSON round trip."""
+        data = dict(data)
+        data['social_media'] = SocialMedia(**data.get('social_media', {}))
+        data['phone'] = Phone(**data.get('phone', {}))
+        data['company_details'] = CompanyDetails(**data.get('company_details', {}))
+        return cls(**data)
+
+    @property
+    def lead_id(self) -> str:
+        """The id tasks, usage and the run journal are attributed to.
+
+        Built from the normalized email address, else the LinkedIn profile,
+        else the Apollo Contact Id, so it matches how LeadIndex deduplicates.
+        A lead with none of them gets an id of its own for this process
+        (LEAD_row_<n>): its usage and budget stay apart from other such
+        leads, but it is never journaled.
+        """
+        lead_id = self._identity_id()
+        if lead_id:
+            return lead_id
+        if not self._row_id:
+            self._row_id = f"LEAD_row_{next(_row_ids)}"
+        return self._row_id
+
+    @property
+    def identified(self) -> bool:
+        """Whether the lead has an email, LinkedIn profile or Apollo Contact Id that identifies it across runs."""
+        return bool(self._identity_id())
+
+    def _identity_id(self) -> str:
+        email = normalize_email(self.email)
+        if email:
+            return f"LEAD_{email.replace('@', '_at_').replace('.', '_dot_')}"
+        profile = normalize_linkedin_profile(self.linkedin_url)
+        if profile:
+            return f"LEAD_linkedin_{profile.rsplit('/', 1)[1]}"
+        contact_id = str(self.contact_id).strip()
+        if contact_id:
+            return f"LEAD_apollo_{contact_id}"
+        return ''
+
+    def merge(self, other: 'Lead') -> None:
+        """Fill fields that are '' on this lead from another record of the same person."""
+        _fill_missing(self, other)
+        self.social_media.merge(other.social_media)
+        self.phone.merge(other.phone)
+        self.company_details.merge(other.company_details)
+
+    def airtable_fields(self) -> Dict[str, Any]:
+        """Fields for a new record in the Airtable Leads table."""
+        return {
+            'Name': self.name,
+            'Email': self.email,
+            'Company': self.company,
+            'Role': self.role,
+            'LinkedIn URL': self.linkedin_url,
+            'Company LinkedIn': self.company_linkedin_url,
+        }
+
+
+def _as_dict(record) -> Dict[str, Any]:
+    # dataclasses.asdict deep-copies every value; the fields here are flat.
+    # Underscore slots are bookkeeping, not fields of the record
+    return {name: getattr(record, name) for name in record.__slots__ if not name.startswith('_')}
+
+
+def _fill_missing(record, other) -> None:
+    for name in record.__slots__:
+        if not name.startswith('_') and getattr(record, name) == '':
+            setattr(record, name, getattr(other, name))
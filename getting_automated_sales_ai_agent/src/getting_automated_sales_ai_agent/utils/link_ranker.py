@@ -0,0 +1,153 @@
+"""Local link ranking used to choose which company pages to crawl."""
+
+import re
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlparse, urlunparse
+
+# Page categories we want to cover, with the keywords that identify them in a
+# URL path segment or in the anchor text. Weights express how valuable the
+# category is for company research.
+CATEGORY_KEYWORDS: Dict[str, Tuple[float, Tuple[str, ...]]] = {
+    'about': (10.0, ('about', 'about-us', 'aboutus', 'who-we-are', 'our-story', 'company', 'overview', 'mission', 'history')),
+    'products': (9.0, ('products', 'product', 'services', 'service', 'solutions', 'solution', 'platform', 'what-we-do', 'offerings', 'features')),
+    'leadership': (7.0, ('leadership', 'team', 'our-team', 'management', 'executives', 'founders', 'people', 'board')),
+    'customers': (6.0, ('customers', 'clients', 'case-studies', 'case-study', 'success-stories', 'testimonials', 'partners', 'industries')),
+    'contact': (4.0, ('contact', 'contact-us', 'locations', 'offices')),
+}
+
+# Segments that never carry company information worth paying to crawl.
+EXCLUDED_SEGMENTS = frozenset((
+    'login', 'log-in', 'signin', 'sign-in', 'signup', 'sign-up', 'register', 'account',
+    'cart', 'checkout', 'privacy', 'privacy-policy', 'terms', 'terms-of-service',
+    'cookies', 'cookie-policy', 'legal', 'tag', 'tags', 'category', 'author', 'feed',
+    'search', 'wp-admin', 'wp-login.php', 'cdn-cgi',
+))
+
+# File extensions that point at assets rather than pages.
+EXCLUDED_EXTENSIONS = ('.pdf', '.jpg', '.jpeg', '.png', '.gif', '.svg', '.zip', '.mp4', '.xml', '.css', '.js')
+
+# The categories a confident selection is expected to cover.
+CORE_CATEGORIES = ('about', 'products')
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+class LinkRanking(NamedTuple):
+    urls: List[str]
+    confidence: float
+
+
+@lru_cache(maxsize=4096)
+def classify_segment(segment: str) -> Tuple[Optional[str], float]:
+    """Classify a single path segment or anchor phrase into a page category.
+
+    Returns the category name and its weight, or (None, 0.0) when nothing matches.
+    Results are cached because the same segments recur across every site.
+    """
+    normalized = segment.lower().strip().replace('_', '-').replace(' ', '-')
+    if not normalized:
+        return None, 0.0
+
+    best: Tuple[Optional[str], float] = (None, 0.0)
+    tokens = set(_TOKEN_RE.findall(normalized))
+    for category, (weight, keywords) in CATEGORY_KEYWORDS.items():
+        for keyword in keywords:
+            if normalized == keyword:
+                score = weight
+            elif '-' not in keyword and keyword in tokens:
+                # Partial match such as "about-acme" or "our products"
+                score = weight * 0.8
+            elif '-' in keyword and keyword in normalized:
+                score = weight * 0.8
+            else:
+                continue
+            if score > best[1]:
+                best = (category, score)
+    return best
+
+
+def normalize_url(url: str) -> str:
+    """Strip fragments, query strings and trailing slashes so duplicates collapse."""
+    parsed = urlparse(url)
+    path = parsed.path.rstrip('/') or '/'
+    return urlunparse((parsed.scheme, parsed.netloc.lower(), path, '', '', ''))
+
+
+def score_link(url: str, text: str = '') -> Tuple[Optional[str], float]:
+    """Score a link by its URL path and anchor text.
+
+    Returns the detected category and a score; excluded links score below zero.
+    """
+    path = urlparse(url).path.lower()
+    if path.endswith(EXCLUDED_EXTENSIONS):
+        return None, -1.0
+
+    segments = [s for s in path.split('/') if s]
+    if any(segment in EXCLUDED_SEGMENTS for segment in segments):
+        return None, -1.0
+
+    category, path_score = None, 0.0
+    for segment in segments:
+        seg_category, seg_score = classify_segment(segment)
+        if seg_score > path_score:
+            category, path_score = seg_category, seg_score
+
+    text_category, text_score = classify_segment(text[:60]) if text else (None, 0.0)
+    if text_score > path_score:
+        category = text_category
+    score = max(path_score, text_score) + 0.5 * min(path_score, text_score)
+
+    # Prefer top-level pages over deep ones such as /products/widget/spec-sheet
+    if len(segments) > 2:
+        score -= 2.0 * (len(segments) - 2)
+
+    return category, score
+
+
+def rank_links(link_data: List[Dict], max_links: int = 5, min_score: float = 3.0) -> LinkRanking:
+    """Pick the most useful company-information pages from a list of links.
+
+    Args:
+        link_data: Dicts with "url" and optional "text" keys
+        max_links: Maximum number of URLs to return
+        min_score: Minimum score for a link to be considered relevant
+
+    Returns:
+        LinkRanking with the selected URLs and a confidence between 0 and 1.
+        Confidence reflects how many core categories (about, products) are covered.
+    """
+    best_by_url: Dict[str, Tuple[float, Optional[str], str]] = {}
+    for link in link_data:
+        url = link.get('url', '')
+        if not url:
+            continue
+        category, score = score_link(url, link.get('text', ''))
+        if score < min_score:
+            continue
+        key = normalize_url(url)
+        if key not in best_by_url or score > best_by_url[key][0]:
+            best_by_url[key] = (score, category, url)
+
+    ranked = sorted(best_by_url.values(), key=lambda item: item[0], reverse=True)
+
+    # Take the best page from each category first, then fill by score
+    selected: List[str] = []
+    covered = set()
+    for score, category, url in ranked:
+        if category not in covered:
+            covered.add(category)
+            selected.append(url)
+    for score, category, url in ranked:
+        if url not in selected:
+            selected.append(url)
+    selected = selected[:max_links]
+
+    if not selected:
+        return LinkRanking([], 0.0)
+
+    core_hits = sum(1 for category in CORE_CATEGORIES if category in covered)
+    confidence = core_hits / len(CORE_CATEGORIES)
+    if len(selected) < min(max_links, 3):
+        confidence *= 0.8
+    return LinkRanking(selected, round(confidence, 2))
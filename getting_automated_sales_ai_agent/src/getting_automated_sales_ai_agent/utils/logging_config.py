@@ -0,0 +1,74 @@
+"""Logging setup with per-module levels and optional JSON output.
+
+Modules log through `logging.getLogger(__name__)` with %-style arguments, so
+messages (and payload dumps at debug level) are only formatted when a
+handler will actually emit them. Levels and format come from environment
+variables:
+
+    LOG_LEVEL=INFO                     default level for everything
+    LOG_LEVELS=getting_automated_sales_ai_agent.tools.company_data_tool=DEBUG,crewai=WARNING
+    LOG_FORMAT=json                    one JSON object per line (default: text)
+"""
+
+import json
+import logging
+import os
+import sys
+from typing import Dict, Optional
+
+# Attributes every LogRecord has; anything else was passed via `extra=`
+_RECORD_FIELDS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_configured = False
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as single-line JSON, including fields passed via `extra=`."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage()
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in _RECORD_FIELDS})
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def parse_module_levels(spec: Optional[str]) -> Dict[str, str]:
+    """Parse "module=LEVEL,other.module=LEVEL" into a dict."""
+    levels = {}
+    for item in (spec or '').split(','):
+        if '=' in item:
+            module, level = item.split('=', 1)
+            levels[module.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging(level: Optional[str] = None, module_levels: Optional[Dict[str, str]] = None,
+                      fmt: Optional[str] = None, force: bool = False):
+    """Configure the root logger once per process; later calls are no-ops unless `force` is set."""
+    global _configured
+    if _configured and not force:
+        return
+    level = (level or os.getenv('LOG_LEVEL', 'INFO')).upper()
+    module_levels = {**parse_module_levels(os.getenv('LOG_LEVELS')), **(module_levels or {})}
+    fmt = (fmt or os.getenv('LOG_FORMAT', 'text')).lower()
+
+    handler = logging.StreamHandler(sys.stdout)
+    if fmt == 'json':
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+    for module, module_level in module_levels.items():
+        logging.getLogger(module).setLevel(module_level)
+    _configured = True
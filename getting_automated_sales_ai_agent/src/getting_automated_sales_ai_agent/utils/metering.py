@@ -0,0 +1,137 @@
+"""Attribution and event dispatch for LLM, tool and task calls.
+
+Every LLM call, outbound tool call, local cache lookup and finished crew task
+is reported here as a usage event (a plain dict). Events are tagged with the current attribution
+(lead_id, task, stage), priced from config/pricing.yaml when the reporter did
+not set a cost, and passed to every subscribed listener, such as the
+TokenTracker and the BudgetController.
+"""
+
+import contextvars
+import inspect
+import logging
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from .pricing import get_pricing, usage_from_response
+
+logger = logging.getLogger(__name__)
+
+_attribution: contextvars.ContextVar = contextvars.ContextVar('usage_attribution', default=None)
+
+# Run-level attribution, used when an event is reported from a thread that did
+# not inherit the caller's context (LiteLLM runs success callbacks in its own
+# thread pool). One crew runs per process, so this is the active lead/task.
+_run_attribution: Dict[str, Any] = {}
+
+_listeners: tuple = ()
+_listeners_lock = threading.Lock()
+
+
+def current_attribution() -> Dict[str, Any]:
+    """Return the lead_id/task/stage the current code is working on."""
+    attribution = _attribution.get()
+    return dict(attribution) if attribution else dict(_run_attribution)
+
+
+@contextmanager
+def attribution(**fields) -> Iterator[Dict[str, Any]]:
+    """Tag every event reported inside the block with the given fields."""
+    token = _attribution.set({**current_attribution(), **fields})
+    try:
+        yield _attribution.get()
+    finally:
+        _attribution.reset(token)
+
+
+def set_run_attribution(**fields):
+    """Replace the run-level attribution (used by the crew as tasks advance)."""
+    global _run_attribution
+    _run_attribution = dict(fields)
+
+
+def clear_run_attribution():
+    """Clear the run-level attribution at the end of a run."""
+    set_run_attribution()
+
+
+def subscribe(listener: Callable[[Dict], None]):
+    """Register a listener for usage events.
+
+    Bound methods are held weakly, so an object that subscribes itself is
+    unsubscribed automatically when it is garbage collected.
+    """
+    global _listeners
+    ref = weakref.WeakMethod(listener) if inspect.ismethod(listener) else (lambda: listener)
+    with _listeners_lock:
+        _listeners = tuple(r for r in _listeners if r() is not None and r() != listener) + (ref,)
+
+
+def unsubscribe(listener: Callable[[Dict], None]):
+    """Remove a previously registered listener."""
+    global _listeners
+    with _listeners_lock:
+        _listeners = tuple(r for r in _listeners if r() is not None and r() != listener)
+
+
+def emit(event: Dict):
+    """Tag and price an event, then send it to all listeners.
+
+    Listener errors are swallowed so metering can never break a lead run.
+    """
+    for key, value in current_attribution().items():
+        event.setdefault(key, value)
+    if 'cost' not in event and event.get('kind') not in ('task', 'cache'):
+        try:
+            event['cost'] = get_pricing().cost(event)
+        except Exception as e:
+            logger.warning("Could not price usage event: %s", e)
+    event.setdefault('lead_id', 'unknown')
+    event.setdefault('stage', 'unknown')
+    event.setdefault('timestamp', datetime.now().isoformat())
+    for ref in _listeners:  # the tuple is replaced, never mutated
+        listener = ref()
+        if listener is None:
+            continue
+        try:
+            listener(event)
+        except Exception as e:
+            logger.warning("Usage listener failed: %s", e)
+
+
+@contextmanager
+def tool_call(provider: str, operation: str = 'request', kind: str = 'tool', **fields) -> Iterator[Dict]:
+    """Time an outbound call and emit a 'tool' event when it finishes.
+
+    The yielded dict is the event itself, so callers can add details such as
+    token counts or credits used before the block exits. Local lookups pass
+    kind='cache', which usage totals and budgets leave out.
+    """
+    event = {'kind': kind, 'provider': provider, 'operation': operation, **fields}
+    event.update({key: value for key, value in current_attribution().items() if key not in event})
+    event['start_time'] = time.time()
+    start = time.perf_counter()
+    try:
+        yield event
+    except Exception:
+        event['error'] = True
+        raise
+    finally:
+        event['latency_ms'] = round((time.perf_counter() - start) * 1000, 1)
+        emit(event)
+
+
+def add_response_usage(event: Dict, response: Any):
+    """Copy token counts (including cached prompt tokens) from an API response into an event."""
+    event.update(usage_from_response(response))
+
+
+def latency_ms(start_time: Optional[datetime], end_time: Optional[datetime]) -> Optional[float]:
+    """Convert LiteLLM callback start/end datetimes to milliseconds."""
+    if isinstance(start_time, datetime) and isinstance(end_time, datetime):
+        return round((end_time - start_time).total_seconds() * 1000, 1)
+    return None
@@ -0,0 +1,169 @@
+"""In-process metrics with a Prometheus text-format endpoint.
+
+Counters and histograms are fed from metering events (LLM calls, tool calls,
+company store lookups and finished tasks) plus lead outcomes reported by the
+crew. Recording an event is a few dict updates under one lock, so metrics can
+stay on in production; the HTTP server only runs when a port is given.
+"""
+
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+from . import metering
+
+PREFIX = 'sales_agent'
+
+# Upper bounds in seconds, from a store lookup to a long hierarchical task
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+TASK_BUCKETS = (1, 5, 10, 30, 60, 120, 300, 600, 1200)
+
+_HELP = {
+    'leads_processed_total': ('counter', 'Leads finished by a crew run, by outcome'),
+    'provider_requests_total': ('counter', 'Outbound LLM and API requests'),
+    'provider_errors_total': ('counter', 'Outbound requests that failed'),
+    'provider_rate_limited_total': ('counter', 'Outbound requests answered with HTTP 429'),
+    'provider_request_duration_seconds': ('histogram', 'Outbound request latency'),
+    'cache_lookups_total': ('counter', 'Company store lookups, by section and result'),
+    'tokens_total': ('counter', 'LLM tokens used'),
+    'cost_usd_total': ('counter', 'Estimated spend in USD'),
+    'task_duration_seconds': ('histogram', 'Crew task wall time, by stage'),
+}
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels: Tuple) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}'
+
+
+class MetricsRegistry:
+    """Thread-safe counters and histograms, rendered in Prometheus text format."""
+
+    def __init__(self):
+        self._counters: Dict[str, Dict[Tuple, float]] = {}
+        self._histograms: Dict[str, Dict[Tuple, list]] = {}
+        self._buckets: Dict[str, Tuple] = {}
+        self._lock = threading.Lock()
+        metering.subscribe(self.record)
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        """Add to a counter."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, buckets: Tuple = LATENCY_BUCKETS, **labels):
+        """Add an observation to a histogram."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._buckets.setdefault(name, buckets)
+            series = self._histograms.setdefault(name, {})
+            state = series.get(key)
+            if state is None:
+                # Per-bucket counts (plus +Inf), then sum and count
+                state = series[key] = [[0] * (len(buckets) + 1), 0.0, 0]
+            state[0][bisect_left(self._buckets[name], value)] += 1
+            state[1] += value
+            state[2] += 1
+
+    def record(self, event: Dict):
+        """Metering listener: update request, cache, token, cost and task metrics."""
+        kind = event.get('kind', 'llm')
+        seconds = (event.get('latency_ms') or 0) / 1000
+        if kind == 'task':
+            self.observe('task_duration_seconds', seconds, TASK_BUCKETS, stage=event.get('stage', 'unknown'))
+            return
+
+        if kind == 'cache':
+            self.inc('cache_lookups_total', section=event.get('section', 'unknown'),
+                     result='hit' if event.get('cache_hit') else 'miss')
+            return
+
+        provider = event.get('provider', 'unknown')
+        operation = event.get('operation', 'completion')
+        self.inc('provider_requests_total', provider=provider, operation=operation)
+        self.observe('provider_request_duration_seconds', seconds, provider=provider)
+        if event.get('error') or (event.get('status_code') or 0) >= 400:
+            self.inc('provider_errors_total', provider=provider, operation=operation)
+        if event.get('status_code') == 429:
+            self.inc('provider_rate_limited_total', provider=provider)
+        if event.get('total_tokens'):
+            self.inc('tokens_total', event['total_tokens'], provider=provider, model=event.get('model') or 'unknown')
+        if event.get('cost'):
+            self.inc('cost_usd_total', event['cost'], provider=provider)
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            histograms = {name: {key: [list(state[0]), state[1], state[2]] for key, state in series.items()}
+                          for name, series in self._histograms.items()}
+        for name, series in counters.items():
+            self._header(lines, name)
+            for key, value in series.items():
+                lines.append(f"{PREFIX}_{name}{_labels(key)} {value:g}")
+        for name, series in histograms.items():
+            self._header(lines, name)
+            bounds = [f"{bound:g}" for bound in self._buckets[name]] + ['+Inf']
+            for key, (counts, total, count) in series.items():
+                cumulative = 0
+                for bound, bucket_count in zip(bounds, counts):
+                    cumulative += bucket_count
+                    lines.append(f"{PREFIX}_{name}_bucket{_labels(key + (('le', bound),))} {cumulative}")
+                lines.append(f"{PREFIX}_{name}_sum{_labels(key)} {total:g}")
+                lines.append(f"{PREFIX}_{name}_count{_labels(key)} {count}")
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _header(lines, name):
+        metric_type, help_text = _HELP.get(name, ('untyped', name))
+        lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+        lines.append(f"# TYPE {PREFIX}_{name} {metric_type}")
+
+
+_default_registry: Optional[MetricsRegistry] = None
+_default_registry_lock = threading.Lock()
+
+
+def get_metrics() -> MetricsRegistry:
+    """Return the process-wide metrics registry, creating it on first use."""
+    global _default_registry
+    if _default_registry is None:
+        with _default_registry_lock:
+            if _default_registry is None:
+                _default_registry = MetricsRegistry()
+    return _default_registry
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = get_metrics().render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes every few seconds would flood stdout
+
+
+def start_metrics_server(port: int, host: str = '0.0.0.0') -> ThreadingHTTPServer:
+    """Serve /metrics on a daemon thread and return the server."""
+    get_metrics()  # Start collecting before the first scrape
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True)
+    thread.start()
+    print(f"Serving metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
@@ -0,0 +1,120 @@
+"""Prices for every provider the pipeline calls, from config/pricing.yaml."""
+
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import yaml
+
+
+def parse_credits(value, default: float = 1) -> float:
+    """Parse a credit count such as Proxycurl's x-credits-used header."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def usage_from_response(response: Any) -> Dict[str, int]:
+    """Extract token counts, including cached prompt tokens, from a chat completion.
+
+    Works for OpenAI SDK responses (used for OpenAI and Perplexity) and LiteLLM
+    ModelResponse objects.
+    """
+    usage = getattr(response, 'usage', None)
+    if usage is None:
+        return {}
+    prompt_tokens = getattr(usage, 'prompt_tokens', 0) or 0
+    completion_tokens = getattr(usage, 'completion_tokens', 0) or 0
+    details = getattr(usage, 'prompt_tokens_details', None)
+    return {
+        'prompt_tokens': prompt_tokens,
+        'completion_tokens': completion_tokens,
+        'total_tokens': getattr(usage, 'total_tokens', 0) or prompt_tokens + completion_tokens,
+        'cached_tokens': getattr(details, 'cached_tokens', 0) or 0
+    }
+
+
+class Pricing:
+    """Computes the dollar cost of LLM and tool usage events.
+
+    Token-priced models use standard, cached-input and batch rates. Models can
+    also charge per request (Perplexity search), and providers such as
+    Proxycurl are priced per credit.
+    """
+
+    def __init__(self, config: Optional[Dict] = None):
+        config = config if config is not None else self._load_config()
+        self.models = config.get('models') or {}
+        self.providers = config.get('providers') or {}
+        self._warned = set()
+
+    def _load_config(self) -> Dict:
+        """Load pricing configuration from YAML file"""
+        config_path = Path(__file__).parent.parent / "config" / "pricing.yaml"
+        with open(config_path, 'r') as f:
+            return yaml.safe_load(f) or {}
+
+    def model_config(self, model: Optional[str]) -> Optional[Dict]:
+        """Find pricing for a model, ignoring provider prefixes and version suffixes."""
+        if not model:
+            return None
+        model = model.split('/')[-1]
+        if model in self.models:
+            return self.models[model]
+        # e.g. "gpt-4o-mini-2024-07-18" -> "gpt-4o-mini" rather than "gpt-4o"
+        matches = [name for name in self.models if model.startswith(f"{name}-")]
+        if matches:
+            return self.models[max(matches, key=len)]
+        if model not in self._warned:
+            self._warned.add(model)
+            print(f"Warning: Model {model} not found in pricing config. Using default pricing.")
+        return None
+
+    def token_cost(self, model: str, prompt_tokens: int, completion_tokens: int,
+                   cached_tokens: int = 0, batch: bool = False) -> float:
+        """Cost of one call; cached tokens are part of prompt_tokens but billed at the cached rate."""
+        model_config = self.model_config(model)
+        if model_config is None:
+            return 0.0
+        unit = model_config.get('unit_of_tokens', 1000000)
+        input_price = model_config.get('input_price', 0)
+        output_price = model_config.get('output_price', 0)
+        if batch:
+            input_price = model_config.get('batch_input_price', input_price)
+            output_price = model_config.get('batch_output_price', output_price)
+        cached_price = model_config.get('cached_input_price', input_price)
+        cached_tokens = min(cached_tokens, prompt_tokens)
+
+        cost = ((prompt_tokens - cached_tokens) * input_price
+                + cached_tokens * cached_price
+                + completion_tokens * output_price) / unit
+        cost += model_config.get('request_price', 0)
+        return round(cost, 6)
+
+    def cost(self, event: Dict) -> float:
+        """Cost of a metering event: token usage plus any per-credit charges."""
+        cost = 0.0
+        if event.get('prompt_tokens') or event.get('completion_tokens'):
+            cost += self.token_cost(event.get('model'), event.get('prompt_tokens', 0),
+                                    event.get('completion_tokens', 0), event.get('cached_tokens', 0),
+                                    event.get('batch', False))
+        provider_config = self.providers.get(event.get('provider')) or {}
+        if 'credit_price' in provider_config and not event.get('error'):
+            credits = parse_credits(event.get('credits_used'), provider_config.get('default_credits', 1))
+            cost += credits * provider_config['credit_price']
+        return round(cost, 6)
+
+
+_default_pricing: Optional[Pricing] = None
+_default_pricing_lock = threading.Lock()
+
+
+def get_pricing() -> Pricing:
+    """Return the process-wide pricing table, loading it on first use."""
+    global _default_pricing
+    if _default_pricing is None:
+        with _default_pricing_lock:
+            if _default_pricing is None:
+                _default_pricing = Pricing()
+    return _default_pricing
@@ -0,0 +1,202 @@
+"""Sampling profiler for a full lead run.
+
+RunProfiler samples every thread's Python stack at a fixed interval, records
+peak resident memory and collects wall-clock time per pipeline stage and per
+provider from metering events. `write_report()` produces one JSON file with:
+
+- totals: wall time, process CPU time and their ratio (close to 1 means
+  CPU-bound, close to 0 means the run mostly waited on I/O);
+- the hottest functions by own and cumulative samples;
+- collapsed stacks ("thread;file:func;file:func count"), loadable in
+  speedscope or flamegraph.pl;
+- per-stage and per-provider timings and named sections;
+- the top allocation sites, when `trace_allocations` is on (tracemalloc
+  slows allocation-heavy code several times over, so it is off by default).
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+from . import metering
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Leaf frames in these modules mean the thread was blocked on I/O or a lock
+_WAITING_MODULES = ('socket', 'ssl', 'selectors', 'threading', 'queue', 'subprocess',
+                    'http/client', 'http\\client', 'urllib3/connection', 'urllib3\\connection')
+
+
+_active: Optional['RunProfiler'] = None
+
+
+def profile_section(name: str):
+    """Time a named phase with the running profiler; a no-op when not profiling."""
+    return _active.section(name) if _active else nullcontext()
+
+
+def _frame_label(code) -> str:
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+def _is_waiting(code) -> bool:
+    filename = code.co_filename.replace('.py', '')
+    return any(filename.endswith(module) for module in _WAITING_MODULES)
+
+
+def _peak_rss_bytes() -> Optional[int]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024  # Linux reports KiB
+
+
+class RunProfiler:
+    """Profiles everything that runs between start() and stop()."""
+
+    def __init__(self, interval: float = 0.01, max_depth: int = 64, trace_allocations: bool = False):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.trace_allocations = trace_allocations
+        self.stacks = Counter()
+        self.own = Counter()
+        self.cumulative = Counter()
+        self.thread_samples: Dict[str, Counter] = {}
+        self.sections: Dict[str, float] = {}
+        self.stages: Dict[str, Dict] = {}
+        self.providers: Dict[str, Dict] = {}
+        self.samples = 0
+        self.peak_memory = None
+        self.top_allocations = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        global _active
+        _active = self
+        if self.trace_allocations:
+            tracemalloc.start()
+        metering.subscribe(self.record)
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample_loop, name='run-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        global _active
+        _active = None
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.wall_time = time.perf_counter() - self._wall_start
+        self.cpu_time = time.process_time() - self._cpu_start
+        self.peak_memory = _peak_rss_bytes()
+        if self.trace_allocations:
+            self.top_allocations = [
+                {'location': str(stat.traceback), 'size_kb': round(stat.size / 1024, 1), 'count': stat.count}
+                for stat in tracemalloc.take_snapshot().statistics('lineno')[:20]
+            ]
+            tracemalloc.stop()
+        metering.unsubscribe(self.record)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @contextmanager
+    def section(self, name: str) -> Iterator[None]:
+        """Time a named phase of the run (e.g. reading the CSV)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.sections[name] = self.sections.get(name, 0) + time.perf_counter() - start
+
+    def _sample_loop(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own_id:
+                    self._sample(names.get(thread_id, str(thread_id)), frame)
+            self.samples += 1
+
+    def _sample(self, thread_name: str, frame):
+        labels = []
+        leaf = frame.f_code
+        while frame is not None and len(labels) < self.max_depth:
+            labels.append(_frame_label(frame.f_code))
+            frame = frame.f_back
+        labels.reverse()
+        state = 'waiting' if _is_waiting(leaf) else 'running'
+        self.thread_samples.setdefault(thread_name, Counter())[state] += 1
+        self.stacks[';'.join([thread_name] + labels)] += 1
+        if state == 'running':
+            self.own[labels[-1]] += 1
+            for label in set(labels):
+                self.cumulative[label] += 1
+
+    def record(self, event: Dict):
+        """Metering listener: add wall time per stage (tasks) and per provider (calls)."""
+        seconds = (event.get('latency_ms') or 0) / 1000
+        if event.get('kind') == 'task':
+            key, target = event.get('stage', 'unknown'), self.stages
+        else:
+            key, target = event.get('provider', 'unknown'), self.providers
+        with self._lock:
+            totals = target.setdefault(key, {'count': 0, 'seconds': 0.0, 'max_seconds': 0.0})
+            totals['count'] += 1
+            totals['seconds'] += seconds
+            totals['max_seconds'] = max(totals['max_seconds'], seconds)
+
+    def get_report(self, top: int = 30) -> Dict:
+        running = sum(self.own.values()) or 1
+        return {
+            'totals': {
+                'wall_time_s': round(self.wall_time, 3),
+                'cpu_time_s': round(self.cpu_time, 3),
+                'cpu_utilization': round(self.cpu_time / self.wall_time, 3) if self.wall_time else None,
+                'peak_rss_mb': round(self.peak_memory / 1024 / 1024, 2) if self.peak_memory else None,
+                'sample_interval_s': self.interval,
+                'samples': self.samples
+            },
+            'threads': {name: dict(counts) for name, counts in self.thread_samples.items()},
+            'sections_s': {name: round(seconds, 3) for name, seconds in self.sections.items()},
+            'stages': self._rounded(self.stages),
+            'providers': self._rounded(self.providers),
+            'top_functions_own': [{'function': label, 'samples': count, 'share': round(count / running, 3)}
+                                  for label, count in self.own.most_common(top)],
+            'top_functions_cumulative': [{'function': label, 'samples': count, 'share': round(count / running, 3)}
+                                         for label, count in self.cumulative.most_common(top)],
+            'top_allocations': self.top_allocations,
+            'collapsed_stacks': [f"{stack} {count}" for stack, count in self.stacks.most_common()]
+        }
+
+    @staticmethod
+    def _rounded(timings: Dict) -> Dict:
+        return {key: {field: round(value, 3) if isinstance(value, float) else value
+                      for field, value in totals.items()}
+                for key, totals in timings.items()}
+
+    def write_report(self, path) -> Path:
+        """Write the report as one JSON file and return its path."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.get_report(), f, indent=2)
+        return path
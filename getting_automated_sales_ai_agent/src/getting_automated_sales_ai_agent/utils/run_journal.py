@@ -0,0 +1,137 @@
+"""Durable journal of finished crew tasks, so interrupted batch runs can resume."""
+
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, NamedTuple, Optional, Set
+
+
+class JournaledOutput(NamedTuple):
+    """A task finished by an earlier run, standing in for the task in create_tasks."""
+    task: str
+    output: str
+    completed_at: str
+
+
+class RunJournal:
+    """Append-only SQLite log of each lead's finished tasks and their outputs.
+
+    Every finished task appends a row as soon as its callback fires, so a crash
+    loses at most the task that was running. A restarted run reuses the latest
+    output of each finished task instead of running (and paying for) it again,
+    and leads whose crew run completed are skipped outright.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        package_dir = Path(__file__).parent.parent
+        path = path or os.getenv('RUN_JOURNAL_PATH')
+        self.path = Path(path) if path else package_dir / 'data' / 'run_journal.sqlite3'
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._init_schema()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, creating it on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        conn = self._connection()
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS task_journal (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    lead_id TEXT NOT NULL,
+                    task TEXT NOT NULL,
+                    output TEXT NOT NULL,
+                    completed_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS task_journal_lead ON task_journal (lead_id)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS lead_journal (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    lead_id TEXT NOT NULL,
+                    completed_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS lead_journal_lead ON lead_journal (lead_id)")
+
+    def record_task(self, lead_id: str, task: str, output: str):
+        """Append a finished task's output."""
+        if not lead_id or not task or not output:
+            return
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "INSERT INTO task_journal (lead_id, task, output, completed_at) VALUES (?, ?, ?, ?)",
+                (lead_id, task, output, time.time())
+            )
+
+    def completed_tasks(self, lead_id: str) -> Dict[str, JournaledOutput]:
+        """The latest journaled output of each task finished for a lead."""
+        rows = self._connection().execute(
+            "SELECT task, output, completed_at FROM task_journal WHERE lead_id = ? ORDER BY id",
+            (lead_id,)
+        ).fetchall()
+        return {task: JournaledOutput(task, output, datetime.fromtimestamp(completed_at).isoformat())
+                for task, output, completed_at in rows}
+
+    def record_leads(self, lead_ids: Iterable[str]):
+        """Append leads whose crew run completed."""
+        now = time.time()
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                "INSERT INTO lead_journal (lead_id, completed_at) VALUES (?, ?)",
+                [(lead_id, now) for lead_id in lead_ids if lead_id]
+            )
+
+    def completed_leads(self, lead_ids: Iterable[str]) -> Set[str]:
+        """The given leads that have a completed crew run in the journal."""
+        return self._matching_leads("SELECT DISTINCT lead_id FROM lead_journal WHERE lead_id IN ({})", lead_ids)
+
+    def leads_with_task(self, lead_ids: Iterable[str], task: str) -> Set[str]:
+        """The given leads that have a journaled output of `task`."""
+        return self._matching_leads(
+            "SELECT DISTINCT lead_id FROM task_journal WHERE task = ? AND lead_id IN ({})", lead_ids, task
+        )
+
+    def _matching_leads(self, query: str, lead_ids: Iterable[str], *params) -> Set[str]:
+        lead_ids = list(lead_ids)
+        matching = set()
+        # Stay under SQLite's bound parameter limit
+        for start in range(0, len(lead_ids), 500):
+            chunk = lead_ids[start:start + 500]
+            rows = self._connection().execute(query.format(', '.join('?' * len(chunk))), (*params, *chunk)).fetchall()
+            matching.update(row[0] for row in rows)
+        return matching
+
+    def close(self):
+        """Close this thread's connection."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+_default_journal: Optional[RunJournal] = None
+_default_journal_lock = threading.Lock()
+
+
+def get_run_journal() -> RunJournal:
+    """Return the process-wide run journal, creating it on first use."""
+    global _default_journal
+    if _default_journal is None:
+        with _default_journal_lock:
+            if _default_journal is None:
+                _default_journal = RunJournal()
+    return _default_journal
@@ -1,119 +1,240 @@
 from typing import Dict, Optional
-from litellm import completion
+import threading
+import litellm
 from litellm.utils import ModelResponse
 import json
 from datetime import datetime
-import yaml
-from pathlib import Path
 
-class TokenTracker:
+from .usage_log import JsonlUsageSink
+from .pricing import get_pricing, usage_from_response
+from . import metering
+
+def _new_totals() -> Dict:
+    return {'total_tokens': 0, 'total_cost': 0, 'calls': 0, 'latency_ms': 0.0, 'wall_time_ms': 0.0}
+
+
+class _UsageShard:
+    """Usage totals and rollups accumulated by a single thread.
+
+    Only the owning thread writes to a shard, so no locking is needed; readers
+    merge all shards when a summary is requested.
+    """
+    __slots__ = ('total_tokens', 'total_prompt_tokens', 'total_completion_tokens',
+                 'total_cost', 'call_count', 'by_agent', 'by_model', 'by_provider',
+                 'by_lead', 'by_stage', 'by_lead_stage')
+
     def __init__(self):
-        self.usage_log = []
         self.total_tokens = 0
         self.total_prompt_tokens = 0
         self.total_completion_tokens = 0
         self.total_cost = 0.0
-        self._load_pricing_config()
+        self.call_count = 0
+        self.by_agent = {}
+        self.by_model = {}
+        self.by_provider = {}
+        self.by_lead = {}
+        self.by_stage = {}
+        self.by_lead_stage = {}
+
+    def add(self, entry: Dict):
+        kind = entry.get('kind', 'llm')
+        tokens = entry.get('total_tokens', 0)
+        cost = entry.get('cost', 0)
+        self.total_tokens += tokens
+        self.total_prompt_tokens += entry.get('prompt_tokens', 0)
+        self.total_completion_tokens += entry.get('completion_tokens', 0)
+        self.total_cost += cost
+
+        rollups = [(self.by_lead, entry['lead_id']),
+                   (self.by_stage, entry['stage']),
+                   (self.by_lead_stage, (entry['lead_id'], entry['stage']))]
+        if kind == 'llm':
+            rollups.append((self.by_agent, entry.get('agent', 'unknown')))
+        if entry.get('model'):
+            rollups.append((self.by_model, entry['model']))
+        if entry.get('provider'):
+            rollups.append((self.by_provider, entry['provider']))
+
+        for rollup, key in rollups:
+            totals = rollup.get(key)
+            if totals is None:
+                totals = rollup[key] = _new_totals()
+            totals['total_tokens'] += tokens
+            totals['total_cost'] += cost
+            if kind == 'task':
+                # Task events carry the wall time of a whole task, not a call
+                totals['wall_time_ms'] += entry.get('latency_ms') or 0
+            else:
+                totals['calls'] += 1
+                totals['latency_ms'] += entry.get('latency_ms') or 0
+
+        if kind != 'task':
+            self.call_count += 1
+
+
+class TokenTracker:
+    """Tracks LLM and tool usage, cost and latency.
+
+    The tracker subscribes to utils.metering, so it receives every LLM call,
+    tool call and finished task tagged with its lead_id, task and stage.
+
+    Safe to use from many threads: each thread accumulates into its own shard
+    and summaries merge the shards, so callbacks never contend on a lock.
+
+    Only aggregates are kept in memory. When `log_path` is given, every usage
+    event is streamed to that JSONL file as it happens.
+    """
 
-    def _load_pricing_config(self):
-        """Load pricing configuration from YAML file"""
-        config_path = Path(__file__).parent.parent / "config" / "pricing.yaml"
-        with open(config_path, 'r') as f:
-            self.pricing_config = yaml.safe_load(f)['models']
+    def __init__(self, log_path: Optional[str] = None):
+        self.log_path = log_path
+        self._sink = JsonlUsageSink(log_path) if log_path else None
+        self._local = threading.local()
+        self._shards = []
+        metering.subscribe(self.record)
+
+    def _shard(self) -> _UsageShard:
+        """Return the calling thread's shard, registering it on first use."""
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = _UsageShard()
+            self._shards.append(shard)  # list.append is atomic
+        return shard
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(shard.total_tokens for shard in list(self._shards))
+
+    @property
+    def total_prompt_tokens(self) -> int:
+        return sum(shard.total_prompt_tokens for shard in list(self._shards))
+
+    @property
+    def total_completion_tokens(self) -> int:
+        return sum(shard.total_completion_tokens for shard in list(self._shards))
+
+    @property
+    def total_cost(self) -> float:
+        return sum(shard.total_cost for shard in list(self._shards))
+
+    def register_litellm_callback(self):
+        """Receive every LiteLLM completion, replacing trackers registered by earlier crews.
+
+        CrewAI replaces `litellm.callbacks` with its own token counter on each
+        agent call, so the tracker is added to `litellm.success_callback`,
+        which CrewAI only prunes of its own callback types.
+        """
+        litellm.success_callback = [callback for callback in litellm.success_callback
+                                    if not isinstance(getattr(callback, '__self__', None), TokenTracker)]
+        litellm.success_callback.append(self.callback)
 
     def callback(self, kwargs: Dict, response: Optional[ModelResponse], start_time: Optional[datetime], end_time: Optional[datetime]):
         """Callback function for LiteLLM to track token usage"""
         if response:
-            usage = response.usage
+            usage = usage_from_response(response)
             if usage:
-                # Extract usage information
-                prompt_tokens = usage.get('prompt_tokens', 0)
-                completion_tokens = usage.get('completion_tokens', 0)
-                total_tokens = usage.get('total_tokens', 0)
-                
                 # Calculate cost based on model
                 model = kwargs.get('model', '').replace('openai/', '')  # Remove provider prefix
-                cost = self._calculate_cost(model, prompt_tokens, completion_tokens)
+                cost = self._calculate_cost(model, usage['prompt_tokens'], usage['completion_tokens'],
+                                            usage['cached_tokens'])
                 
-                # Update totals
-                self.total_tokens += total_tokens
-                self.total_prompt_tokens += prompt_tokens
-                self.total_completion_tokens += completion_tokens
-                self.total_cost += cost
-
-                # Log the usage
-                log_entry = {
-                    'timestamp': datetime.now().isoformat(),
+                # Report the call; attribution (lead, task, stage) is added by metering
+                metering.emit({
+                    'kind': 'llm',
+                    'provider': 'openai',
                     'model': model,
-                    'prompt_tokens': prompt_tokens,
-                    'completion_tokens': completion_tokens,
-                    'total_tokens': total_tokens,
+                    **usage,
                     'cost': cost,
+                    'start_time': start_time.timestamp() if isinstance(start_time, datetime) else None,
+                    'latency_ms': metering.latency_ms(start_time, end_time),
                     'agent': kwargs.get('agent_name', 'unknown')
-                }
-                self.usage_log.append(log_entry)
-
-    def _calculate_cost(self, model: str, prompt_tokens: int, completion_tokens: int) -> float:
-        """Calculate cost based on pricing configuration"""
-        if model not in self.pricing_config:
-            print(f"Warning: Model {model} not found in pricing config. Using default pricing.")
-            return 0.0
-
-        model_config = self.pricing_config[model]
-        unit = model_config.get('unit_of_tokens', 1000000)  # Default to 1M tokens if not specified
-        
-        # Calculate costs using standard pricing (not batch or cached)
-        input_price = model_config.get('input_price', 0)
-        output_price = model_config.get('output_price', 0)
-        
-        prompt_cost = (prompt_tokens * input_price) / unit
-        completion_cost = (completion_tokens * output_price) / unit
-        
-        return round(prompt_cost + completion_cost, 6)
+                })
+
+    def record(self, event: Dict):
+        """Metering listener: aggregate an event and stream it to the usage log"""
+        if event.get('kind') == 'cache':
+            # Local lookups are neither provider calls nor billed
+            return
+        self._shard().add(event)
+        if self._sink:
+            self._sink.write(event)
+
+    def _calculate_cost(self, model: str, prompt_tokens: int, completion_tokens: int,
+                        cached_tokens: int = 0) -> float:
+        """Calculate cost based on pricing configuration, billing cached prompt tokens at the cached rate"""
+        return get_pricing().token_cost(model, prompt_tokens, completion_tokens, cached_tokens)
 
     def get_usage_summary(self) -> Dict:
         """Get a summary of token usage and costs"""
+        shards = list(self._shards)
         return {
-            'total_tokens': self.total_tokens,
-            'total_prompt_tokens': self.total_prompt_tokens,
-            'total_completion_tokens': self.total_completion_tokens,
-            'total_cost': round(self.total_cost, 4),
+            'total_tokens': sum(shard.total_tokens for shard in shards),
+            'total_prompt_tokens': sum(shard.total_prompt_tokens for shard in shards),
+            'total_completion_tokens': sum(shard.total_completion_tokens for shard in shards),
+            'total_cost': round(sum(shard.total_cost for shard in shards), 4),
+            'call_count': sum(shard.call_count for shard in shards),
             'usage_by_agent': self._get_usage_by_agent(),
-            'usage_by_model': self._get_usage_by_model()
+            'usage_by_model': self._get_usage_by_model(),
+            'usage_by_provider': self._merge_rollup('by_provider'),
+            'usage_by_lead': self._get_usage_by_lead(),
+            'usage_by_stage': self._merge_rollup('by_stage')
         }
 
+    def _merge_rollup(self, name: str) -> Dict:
+        """Merge one rollup (by_agent, by_model or by_lead) across all thread shards"""
+        merged = {}
+        for shard in list(self._shards):
+            # dict() copies are atomic, so a concurrent insert can't break iteration
+            for key, totals in dict(getattr(shard, name)).items():
+                target = merged.setdefault(key, _new_totals())
+                for field, value in dict(totals).items():
+                    target[field] += value
+        return merged
+
     def _get_usage_by_agent(self) -> Dict:
         """Get token usage breakdown by agent"""
-        usage_by_agent = {}
-        for entry in self.usage_log:
-            agent = entry['agent']
-            if agent not in usage_by_agent:
-                usage_by_agent[agent] = {
-                    'total_tokens': 0,
-                    'total_cost': 0
-                }
-            usage_by_agent[agent]['total_tokens'] += entry['total_tokens']
-            usage_by_agent[agent]['total_cost'] += entry['cost']
-        return usage_by_agent
+        return self._merge_rollup('by_agent')
 
     def _get_usage_by_model(self) -> Dict:
         """Get token usage breakdown by model"""
-        usage_by_model = {}
-        for entry in self.usage_log:
-            model = entry['model']
-            if model not in usage_by_model:
-                usage_by_model[model] = {
-                    'total_tokens': 0,
-                    'total_cost': 0
-                }
-            usage_by_model[model]['total_tokens'] += entry['total_tokens']
-            usage_by_model[model]['total_cost'] += entry['cost']
-        return usage_by_model
+        return self._merge_rollup('by_model')
+
+    def _get_usage_by_lead(self) -> Dict:
+        """Get token usage breakdown by lead"""
+        return self._merge_rollup('by_lead')
+
+    def get_lead_report(self) -> Dict:
+        """Get cost, tokens, call count and time per lead, broken down by stage"""
+        report = {}
+        for lead_id, totals in self._get_usage_by_lead().items():
+            report[lead_id] = {**totals, 'stages': {}}
+        for (lead_id, stage), totals in self._merge_rollup('by_lead_stage').items():
+            report.setdefault(lead_id, {**_new_totals(), 'stages': {}})['stages'][stage] = totals
+        for entry in report.values():
+            entry['total_cost'] = round(entry['total_cost'], 6)
+            for totals in entry['stages'].values():
+                totals['total_cost'] = round(totals['total_cost'], 6)
+        return report
 
     def save_usage_log(self, filepath: str):
-        """Save the usage log to a JSON file"""
+        """Flush streamed events and save the usage summary to a JSON file"""
+        self.flush()
         with open(filepath, 'w') as f:
             json.dump({
                 'summary': self.get_usage_summary(),
-                'detailed_log': self.usage_log
+                'lead_report': self.get_lead_report(),
+                'detailed_log': self.log_path
             }, f, indent=2)
+
+    def flush(self):
+        """Write buffered usage events to the streaming log"""
+        if self._sink:
+            self._sink.flush()
+
+    def close(self):
+        """Stop tracking, then flush and close the streaming usage log"""
+        metering.unsubscribe(self.record)
+        # The LiteLLM callback list would otherwise keep this tracker alive until the next one registers
+        if self.callback in litellm.success_callback:
+            litellm.success_callback.remove(self.callback)
+        if self._sink:
+            self._sink.close()
@@ -0,0 +1,242 @@
+"""Tracing spans for the lead pipeline, built from metering events.
+
+Every run is one trace. Each lead gets a span, each crew task a child span of
+its lead, and each LLM or tool call (Airtable, Proxycurl, Perplexity, OpenAI,
+crawl, company store) a child span of the task it ran in. Spans can be
+exported as OTLP-style JSON lines, as a Chrome trace (open in Perfetto or
+chrome://tracing for a flame graph), and posted to an OTLP/HTTP collector.
+"""
+
+import json
+import os
+import secrets
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import requests
+
+from . import metering
+
+SERVICE_NAME = os.getenv('OTEL_SERVICE_NAME', 'getting_automated_sales_ai_agent')
+
+# Event fields that describe the span itself rather than being attributes
+_STRUCTURAL_FIELDS = {'kind', 'provider', 'operation', 'task', 'start_time', 'latency_ms', 'timestamp'}
+
+
+def _new_id(num_bytes: int) -> str:
+    return secrets.token_hex(num_bytes)
+
+
+def _otlp_value(value) -> Dict:
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+class Tracer:
+    """Collects spans for one batch from metering events and exports them.
+
+    Tool and LLM spans are recorded when their event arrives. Task spans are
+    recorded when the crew reports the task finished, and lead spans are
+    derived at export time from the tasks and calls they contain (as are
+    spans for tasks that never finished, e.g. in a cancelled run).
+    """
+
+    def __init__(self, path: Optional[str] = None, otlp_endpoint: Optional[str] = None):
+        self.path = Path(path) if path else None
+        self.otlp_endpoint = otlp_endpoint if otlp_endpoint is not None else os.getenv('OTEL_EXPORTER_OTLP_ENDPOINT')
+        self.trace_id = _new_id(16)
+        self.spans: List[Dict] = []
+        self._task_span_ids: Dict[tuple, str] = {}
+        self._lead_span_ids: Dict[str, str] = {}
+        self._exported = 0
+        self._lock = threading.Lock()
+        metering.subscribe(self.record)
+
+    def _lead_span_id(self, lead_id: str) -> str:
+        if lead_id not in self._lead_span_ids:
+            self._lead_span_ids[lead_id] = _new_id(8)
+        return self._lead_span_ids[lead_id]
+
+    def _task_span_id(self, lead_id: str, task: str) -> str:
+        key = (lead_id, task)
+        if key not in self._task_span_ids:
+            self._task_span_ids[key] = _new_id(8)
+        return self._task_span_ids[key]
+
+    def record(self, event: Dict):
+        """Metering listener: turn an LLM, tool or task event into a span."""
+        end = time.time()
+        duration = (event.get('latency_ms') or 0) / 1000
+        start = event.get('start_time') or end - duration
+        lead_id = event.get('lead_id', 'unknown')
+        task = event.get('task')
+        kind = event.get('kind', 'llm')
+        attributes = {key: value for key, value in event.items()
+                      if key not in _STRUCTURAL_FIELDS and value is not None}
+
+        with self._lock:
+            if kind == 'task':
+                name = task or 'task'
+                span_id = self._task_span_id(lead_id, name)
+                parent_id = self._lead_span_id(lead_id)
+            else:
+                name = f"{event.get('provider', kind)}.{event.get('operation', 'completion')}"
+                span_id = _new_id(8)
+                lead_span_id = self._lead_span_id(lead_id)
+                parent_id = self._task_span_id(lead_id, task) if task else lead_span_id
+            self.spans.append({
+                'trace_id': self.trace_id,
+                'span_id': span_id,
+                'parent_span_id': parent_id,
+                'name': name,
+                'kind': kind,
+                'lead_id': lead_id,
+                'start': start,
+                'end': start + duration,
+                'error': bool(event.get('error')),
+                'attributes': attributes
+            })
+
+    def _unfinished_task_spans(self, spans: List[Dict]) -> List[Dict]:
+        """Build spans for tasks that have calls but never reported finishing."""
+        finished = {span['span_id'] for span in spans if span['kind'] == 'task'}
+        with self._lock:
+            task_keys = {span_id: key for key, span_id in self._task_span_ids.items()}
+        tasks = {}
+        for span in spans:
+            key = task_keys.get(span['parent_span_id'])
+            if key is None or span['parent_span_id'] in finished:
+                continue
+            task = tasks.setdefault(span['parent_span_id'], {
+                'trace_id': self.trace_id,
+                'span_id': span['parent_span_id'],
+                'parent_span_id': self._lead_span_ids.get(key[0]),
+                'name': key[1],
+                'kind': 'task',
+                'lead_id': key[0],
+                'start': span['start'],
+                'end': span['end'],
+                'error': True,
+                'attributes': {'lead_id': key[0], 'unfinished': True}
+            })
+            task['start'] = min(task['start'], span['start'])
+            task['end'] = max(task['end'], span['end'])
+        return list(tasks.values())
+
+    def _lead_spans(self, spans: List[Dict]) -> List[Dict]:
+        """Build one span per lead covering all of that lead's spans."""
+        with self._lock:
+            lead_span_ids = {span['lead_id']: self._lead_span_id(span['lead_id']) for span in spans}
+        leads = {}
+        for span in spans:
+            lead = leads.setdefault(span['lead_id'], {
+                'trace_id': self.trace_id,
+                'span_id': lead_span_ids[span['lead_id']],
+                'parent_span_id': None,
+                'name': f"lead {span['lead_id']}",
+                'kind': 'lead',
+                'lead_id': span['lead_id'],
+                'start': span['start'],
+                'end': span['end'],
+                'error': False,
+                'attributes': {'lead_id': span['lead_id'], 'total_tokens': 0, 'cost': 0.0, 'calls': 0}
+            })
+            lead['start'] = min(lead['start'], span['start'])
+            lead['end'] = max(lead['end'], span['end'])
+            if span['kind'] != 'task':
+                lead['attributes']['total_tokens'] += span['attributes'].get('total_tokens', 0)
+                lead['attributes']['cost'] = round(lead['attributes']['cost'] + span['attributes'].get('cost', 0), 6)
+                lead['attributes']['calls'] += 1
+        return list(leads.values())
+
+    def get_spans(self) -> List[Dict]:
+        """Return all lead, task and call spans recorded so far, ordered by start time."""
+        with self._lock:
+            spans = list(self.spans)
+        spans += self._unfinished_task_spans(spans)
+        return sorted(self._lead_spans(spans) + spans, key=lambda span: span['start'])
+
+    def export(self):
+        """Write the JSONL and Chrome trace files and post new spans to the OTLP collector."""
+        spans = self.get_spans()
+        if self.path:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'w', encoding='utf-8') as f:
+                for span in spans:
+                    f.write(json.dumps(span, separators=(',', ':'), default=str) + '\n')
+            chrome_path = self.path.with_suffix('.chrome.json')
+            with open(chrome_path, 'w', encoding='utf-8') as f:
+                json.dump(self.to_chrome_trace(spans), f, default=str)
+            print(f"Trace written to {self.path} (flame graph: load {chrome_path.name} in Perfetto)")
+
+        if self.otlp_endpoint:
+            with self._lock:
+                new_spans = self.spans[self._exported:]
+                self._exported = len(self.spans)
+            if new_spans:
+                new_spans += self._unfinished_task_spans(new_spans)
+                self._post_otlp(self._lead_spans(new_spans) + new_spans)
+
+    def to_chrome_trace(self, spans: List[Dict]) -> Dict:
+        """Chrome trace event format, one track per lead."""
+        tracks = {}
+        events = []
+        for span in spans:
+            tid = tracks.setdefault(span['lead_id'], len(tracks) + 1)
+            events.append({
+                'name': span['name'],
+                'cat': span['kind'],
+                'ph': 'X',
+                'ts': round(span['start'] * 1e6),
+                'dur': round((span['end'] - span['start']) * 1e6),
+                'pid': 1,
+                'tid': tid,
+                'args': span['attributes']
+            })
+        for lead_id, tid in tracks.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': tid, 'args': {'name': lead_id}})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def to_otlp(self, spans: List[Dict]) -> Dict:
+        """OTLP/HTTP JSON payload for the given spans."""
+        otlp_spans = []
+        for span in spans:
+            otlp_span = {
+                'traceId': span['trace_id'],
+                'spanId': span['span_id'],
+                'name': span['name'],
+                'kind': 1 if span['kind'] in ('lead', 'task') else 3,  # INTERNAL / CLIENT
+                'startTimeUnixNano': str(int(span['start'] * 1e9)),
+                'endTimeUnixNano': str(int(span['end'] * 1e9)),
+                'attributes': [{'key': key, 'value': _otlp_value(value)}
+                               for key, value in span['attributes'].items()],
+                'status': {'code': 2 if span['error'] else 0}
+            }
+            if span['parent_span_id']:
+                otlp_span['parentSpanId'] = span['parent_span_id']
+            otlp_spans.append(otlp_span)
+        return {
+            'resourceSpans': [{
+                'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': SERVICE_NAME}}]},
+                'scopeSpans': [{'scope': {'name': 'getting_automated_sales_ai_agent'}, 'spans': otlp_spans}]
+            }]
+        }
+
+    def _post_otlp(self, spans: List[Dict]):
+        url = f"{self.otlp_endpoint.rstrip('/')}/v1/traces"
+        try:
+            response = requests.post(url, json=self.to_otlp(spans), timeout=10)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            print(f"Warning: could not export trace to {url}: {str(e)}")
+
+    def close(self):
+        """Stop receiving events."""
+        metering.unsubscribe(self.record)
@@ -0,0 +1,81 @@
+"""Append-only JSONL sink for usage events."""
+
+import atexit
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Union
+
+
+class JsonlUsageSink:
+    """Streams usage events to a rotating JSONL file with buffered writes.
+
+    Events are buffered in memory and written when the buffer fills, when
+    `flush_interval` seconds have passed since the last write, or at
+    interpreter exit, so a crashed run keeps everything but the last few
+    events. When the file grows past `max_bytes` it is rotated to
+    `<name>.1`, `<name>.2`, ... keeping at most `backup_count` old files.
+    """
+
+    def __init__(self, path: Union[str, Path], max_bytes: int = 50 * 1024 * 1024,
+                 backup_count: int = 5, buffer_events: int = 100, flush_interval: float = 5.0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.buffer_events = buffer_events
+        self.flush_interval = flush_interval
+        self._buffer: List[str] = []
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._closed = False
+        atexit.register(self.close)
+
+    def write(self, event: Dict):
+        """Queue one event; flushes to disk when the buffer is due."""
+        line = json.dumps(event, separators=(',', ':'), default=str)
+        with self._lock:
+            if self._closed:
+                return
+            self._buffer.append(line)
+            if (len(self._buffer) >= self.buffer_events
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self._flush_locked()
+
+    def flush(self):
+        """Write any buffered events to disk."""
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        """Flush remaining events and stop accepting new ones."""
+        with self._lock:
+            if self._closed:
+                return
+            self._flush_locked()
+            self._closed = True
+        atexit.unregister(self.close)
+
+    def _flush_locked(self):
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        data = '\n'.join(self._buffer) + '\n'
+        self._buffer = []
+        if self.max_bytes and self.path.exists() and self.path.stat().st_size + len(data) > self.max_bytes:
+            self._rotate()
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(data)
+
+    def _rotate(self):
+        """Shift <name>.N files up by one and move the current file to <name>.1."""
+        if self.backup_count <= 0:
+            os.remove(self.path)
+            return
+        for index in range(self.backup_count - 1, 0, -1):
+            source = self.path.with_name(f"{self.path.name}.{index}")
+            if source.exists():
+                os.replace(source, self.path.with_name(f"{self.path.name}.{index + 1}"))
+        os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
@@ -1,4 +1,5 @@
 import os
+import logging
 import pandas as pd
 from dotenv import load_dotenv
 from pyairtable import Table, Api
@@ -10,13 +11,21 @@ from config.airtable_config import BASE_NAME, WORKSPACE_ID, Tables
 # Load environment variables
 load_dotenv()
 API_KEY = os.getenv('AI_AGENT_AIRTABLE_API_KEY')
+ENDPOINT_URL = os.getenv('AIRTABLE_ENDPOINT_URL', 'https://api.airtable.com')
+
+# Record and response payloads are only dumped with LOG_LEVEL=DEBUG
+logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO').upper(), format='%(levelname)s %(message)s')
+logger = logging.getLogger(__name__)
+
+# Rows read from the CSV at a time; memory stays flat however large the file
+CHUNK_SIZE = 500
 
 class DataLoader:
     def __init__(self):
         if not API_KEY:
             raise ValueError("AI_AGENT_AIRTABLE_API_KEY not found in environment variables")
             
-        self.api = Api(API_KEY)
+        self.api = Api(API_KEY, endpoint_url=ENDPOINT_URL)
         self.base_id = self._get_base_id()
         
         if not self.base_id:
@@ -24,36 +33,36 @@ class DataLoader:
     
     def _get_base_id(self):
         """Get base ID by looking up the base name"""
-        url = "https://api.airtable.com/v0/meta/bases"
+        url = f"{ENDPOINT_URL}/v0/meta/bases"
         headers = {
             "Authorization": f"Bearer {API_KEY}",
             "Content-Type": "application/json"
         }
         
         try:
-            print(f"Looking for base named: {BASE_NAME}")
+            logger.info("Looking for base named: %s", BASE_NAME)
             response = requests.get(url, headers=headers)
-            print(f"Response status: {response.status_code}")
+            logger.debug("Response status: %s", response.status_code)
             
             if response.status_code == 200:
                 bases = response.json().get('bases', [])
-                print(f"Found {len(bases)} bases:")
+                logger.debug("Found %s bases", len(bases))
                 for base in bases:
-                    print(f"- {base.get('name')} ({base.get('id')})")
+                    logger.debug("- %s (%s)", base.get('name'), base.get('id'))
                     if base.get('name') == BASE_NAME:
-                        print(f"\nFound matching base! ID: {base.get('id')}")
+                        logger.info("Found matching base! ID: %s", base.get('id'))
                         return base.get('id')
-                print("\nNo matching base found!")
+                logger.warning("No matching base found!")
             else:
-                print(f"Error response: {response.text}")
+                logger.error("Error response: %s", response.text)
         except Exception as e:
-            print(f"Error looking up base: {str(e)}")
+            logger.error("Error looking up base: %s", e)
         return None
         
     def load_table(self, table_name, csv_path):
         """Load data from CSV into specified Airtable table"""
-        print(f"\nLoading data for table: {table_name}")
-        print(f"Base ID: {self.base_id}")
+        logger.info("Loading data for table: %s", table_name)
+        logger.debug("Base ID: %s", self.base_id)
         
         if not os.path.exists(csv_path):
             raise FileNotFoundError(f"CSV file not found: {csv_path}")
@@ -64,58 +73,57 @@ class DataLoader:
         except Exception as e:
             raise Exception(f"Error connecting to Airtable table '{table_name}': {str(e)}")
         
-        # Read CSV file
+        # Stream the CSV in chunks so large files are never held in memory at once
         try:
-            df = pd.read_csv(csv_path)
-            print(f"\nFound {len(df)} records to load")
-            print("\nCSV Data Preview:")
-            print(df.head())
-            print("\nColumns in CSV:")
-            print(df.columns.tolist())
+            reader = pd.read_csv(csv_path, chunksize=CHUNK_SIZE)
         except Exception as e:
             raise Exception(f"Error reading CSV file: {str(e)}")
         
-        # Convert DataFrame to list of dictionaries
-        records = df.to_dict('records')
-        
         # Process and upload each record
         successful = 0
         failed = 0
-        
-        for record in records:
-            try:
-                # Pre-process specific fields based on table
-                processed_record = self._preprocess_record(table_name, record)
+        # Payload dumps are expensive at thousands of records; only build them for debug runs
+        debug = logger.isEnabledFor(logging.DEBUG)
+        
+        with reader:
+            for chunk_number, chunk in enumerate(reader):
+                if chunk_number == 0:
+                    logger.debug("CSV Data Preview:\n%s", chunk.head())
+                    logger.debug("Columns in CSV: %s", chunk.columns.tolist())
+                logger.info("Loading records %s-%s", successful + failed + 1, successful + failed + len(chunk))
                 
-                print("\nSending record to Airtable:")
-                print(json.dumps(processed_record, indent=2))
-                
-                # Create record in Airtable
-                result = table.create(processed_record, typecast=True)
-                successful += 1
-                print(f"\nAirtable response:")
-                print(json.dumps(result, indent=2))
-                
-            except Exception as e:
-                failed += 1
-                print(f"Error creating record in {table_name}: {str(e)}")
-        
-        print(f"\nTable {table_name} Summary:")
-        print(f"Successfully loaded: {successful}")
-        print(f"Failed: {failed}")
-        
-        # Verify final record count
-        final_records = table.all()
-        print(f"Final table record count: {len(final_records)}")
+                for record in chunk.to_dict('records'):
+                    try:
+                        # Pre-process specific fields based on table
+                        processed_record = self._preprocess_record(table_name, record)
+                        
+                        if debug:
+                            logger.debug("Sending record to Airtable:\n%s", json.dumps(processed_record, indent=2, default=str))
+                        
+                        # Create record in Airtable
+                        result = table.create(processed_record, typecast=True)
+                        successful += 1
+                        if debug:
+                            logger.debug("Airtable response:\n%s", json.dumps(result, indent=2))
+                        
+                    except Exception as e:
+                        failed += 1
+                        logger.error("Error creating record in %s: %s", table_name, e)
+        
+        logger.info("Table %s Summary: successfully loaded %s, failed %s", table_name, successful, failed)
+        
+        # Verify final record count, one page of records at a time
+        final_count = sum(len(page) for page in table.iterate())
+        logger.info("Final table record count: %s", final_count)
         
     def _preprocess_record(self, table_name, record):
         """Preprocess record based on table-specific requirements"""
-        if table_name == Tables.OFFERS:
+        if table_name == "Offers":
             # Convert Target Client Type from string to list if it exists
             if isinstance(record.get('Target Client Type'), str):
                 record['Target Client Type'] = [x.strip() for x in record['Target Client Type'].split(',')]
                 
-        elif table_name == Tables.CAMPAIGNS:
+        elif table_name == Tables.EMAIL_CAMPAIGNS:
             # Convert date strings to proper format if they exist
             for date_field in ['Last Sent Date', 'Next Send Date']:
                 if record.get(date_field):